@@ -0,0 +1,242 @@
+"""
+Frame-by-frame parity of the rep counters between two revisions.
+
+Replays the same landmark traces (counters/landmark_trace.py) through the
+counters of a baseline revision and of a candidate (the working tree by
+default) and compares, on every frame, the count, good and bad reps, stage,
+ready state, form feedback and, for lunges, the leading leg. Each side runs
+in its own Python process with its revision's backend tree (extracted with
+git archive) first on sys.path, so the two never share a module.
+
+The default baseline is the last revision before counters/engine.py, i.e.
+the three hand-written counters the engine replaced. The counters of that
+revision set up the legacy mediapipe.solutions API even without a pose graph,
+so replaying them needs a MediaPipe build that still has it. Form checks are
+in body proportions rather than pixels since then, so against that baseline
+the squat ready state and good/bad verdicts can differ where the synthetic
+figure's knees sit near the alignment limit.
+
+Traces are recorded ones or the randomized synthetic ones of
+benchmark_keypoint_flow.py, with some extra cases per seed: bursts of
+unrealistic angles, a lost plank (push-ups) and a switch of the leading leg
+(lunges).
+
+Usage:
+  python benchmark_counter_parity.py
+  python benchmark_counter_parity.py --traces 100 --json
+  python benchmark_counter_parity.py --baseline HEAD~3 --candidate HEAD
+  python benchmark_counter_parity.py --trace squats=recordings/squats.npz
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+import numpy as np
+
+# counters is imported inside the functions: the replay processes put their
+# revision's tree first on sys.path before importing it
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FIELDS = ("count", "good", "bad", "stage", "ready", "feedback", "leg")
+
+
+# ============================================
+# TRACES
+# ============================================
+
+def parity_trace(exercise, seed):
+    """A randomized trace (benchmark_keypoint_flow.py) with extra edge cases for some seeds."""
+    from benchmark_counters import SYNTHETIC_POSES
+    from benchmark_keypoint_flow import randomized_trace
+
+    trace = randomized_trace(exercise, seed)
+    landmarks = trace.landmarks
+    pose_fn, _ = SYNTHETIC_POSES[exercise]
+    rng = np.random.default_rng(1_000_000 + seed)
+    frames = len(landmarks)
+
+    if seed % 2:
+        # Bursts of unrealistic angles (a false detection): one while getting ready, others later
+        starts = [int(rng.integers(5, 25))] + rng.integers(0, frames - 8, frames // 150).tolist()
+        for start in starts:
+            landmarks[start:start + int(rng.integers(3, 9))] = pose_fn(float(rng.uniform(5, 25)))
+    if exercise == "pushups" and seed % 3 == 0:
+        # Hips sag out of the plank for a while
+        start = int(rng.integers(0, frames - 30))
+        landmarks[start:start + int(rng.integers(10, 60)), 23:25, 1] += 0.15
+    if exercise == "lunges" and seed % 3 == 0:
+        # The other leg leads from some frame on
+        start = int(rng.integers(frames // 4, frames))
+        for left, right in ((23, 24), (25, 26), (27, 28)):
+            landmarks[start:, [left, right]] = landmarks[start:, [right, left]]
+            landmarks[start:, [left, right], 0] = 1.0 - landmarks[start:, [left, right], 0]
+    return trace
+
+
+# ============================================
+# REPLAY (one process per revision)
+# ============================================
+
+def replay_states(paths):
+    """Per-frame counter state for each trace file, using the counters first on sys.path."""
+    from counters import load_counter_class
+    from counters.landmark_trace import load_trace
+
+    results = []
+    for exercise, path in paths:
+        trace = load_trace(path)
+        width, height = trace.frame_size
+        states = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            counter = load_counter_class(exercise)(pose_graph=False)
+            current_time = [0.0]
+            counter.clock = lambda: current_time[0]
+            for landmarks, timestamp in zip(trace.landmarks, trace.timestamps):
+                current_time[0] = float(timestamp)
+                counter.process_landmarks(landmarks, width, height)
+                states.append([counter.counter, counter.good_reps, counter.bad_reps, counter.stage,
+                               bool(counter.system_ready), counter.last_feedback,
+                               getattr(counter, "current_leg", None)])
+        results.append(states)
+    return results
+
+
+def export_tree(revision, directory):
+    """Extracts the backend directory of a revision into directory."""
+    archive = subprocess.run(["git", "archive", "--format=tar", revision, "."], cwd=BACKEND_DIR,
+                             check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    return directory
+
+
+def engine_baseline():
+    """The revision before counters/engine.py was added."""
+    added = subprocess.run(["git", "log", "--diff-filter=A", "--format=%H", "-1", "--", "counters/engine.py"],
+                           cwd=BACKEND_DIR, check=True, capture_output=True, text=True).stdout.strip()
+    if not added:
+        raise SystemExit("counters/engine.py has no history here; pass --baseline")
+    return f"{added}^"
+
+
+def run_side(root, paths, workdir, name):
+    """Replays the traces in a child process on root's counters. Returns per-trace states."""
+    manifest = os.path.join(workdir, f"{name}.json")
+    output = os.path.join(workdir, f"{name}-states.json")
+    with open(manifest, "w") as f:
+        json.dump(paths, f)
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--replay", manifest, "--root", root,
+                    "--output", output], check=True)
+    with open(output) as f:
+        return json.load(f)
+
+
+# ============================================
+# COMPARISON
+# ============================================
+
+def compare(exercise, baseline, candidate):
+    """Frames and fields where two per-frame state lists differ."""
+    frames_differing = 0
+    fields = set()
+    for before, after in zip(baseline, candidate):
+        if before != after:
+            frames_differing += 1
+            fields.update(name for name, a, b in zip(STATE_FIELDS, before, after) if a != b)
+    return {
+        "exercise": exercise,
+        "frames": len(baseline),
+        "frames_differing": frames_differing,
+        "fields_differing": sorted(fields),
+        "reps_baseline": baseline[-1][0] if baseline else 0,
+        "reps_candidate": candidate[-1][0] if candidate else 0,
+    }
+
+
+def summarize(comparisons):
+    summary = []
+    for exercise in dict.fromkeys(c["exercise"] for c in comparisons):
+        rows = [c for c in comparisons if c["exercise"] == exercise]
+        differences = [abs(c["reps_candidate"] - c["reps_baseline"]) for c in rows]
+        summary.append({
+            "exercise": exercise,
+            "traces": len(rows),
+            "frames": sum(c["frames"] for c in rows),
+            "traces_identical": sum(not c["frames_differing"] for c in rows),
+            "frames_differing": sum(c["frames_differing"] for c in rows),
+            "fields_differing": sorted(set().union(*(c["fields_differing"] for c in rows))),
+            "reps_baseline": sum(c["reps_baseline"] for c in rows),
+            "reps_candidate": sum(c["reps_candidate"] for c in rows),
+            "traces_count_differs": sum(difference > 0 for difference in differences),
+            "max_rep_difference": max(differences, default=0),
+        })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare rep counters of two revisions frame by frame")
+    parser.add_argument("--baseline", help="Git revision (default: the one before counters/engine.py)")
+    parser.add_argument("--candidate", help="Git revision (default: the working tree)")
+    parser.add_argument("--trace", action="append", default=[], metavar="EXERCISE=PATH",
+                        help="Recorded trace to compare (repeatable); without any, randomized synthetic traces")
+    parser.add_argument("--exercises", default="squats,pushups,lunges")
+    parser.add_argument("--traces", type=int, default=40, help="Synthetic traces per exercise")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--replay", help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.replay:
+        # Child process: count with the counters of one revision
+        sys.path.insert(0, args.root)
+        with open(args.replay) as f:
+            paths = json.load(f)
+        with open(args.output, "w") as f:
+            json.dump(replay_states(paths), f)
+        return
+
+    from counters.landmark_trace import save_trace
+
+    baseline = args.baseline or engine_baseline()
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.trace:
+            paths = [item.split("=", 1) for item in args.trace]
+        else:
+            paths = []
+            for exercise in args.exercises.split(","):
+                for seed in range(args.traces):
+                    path = os.path.join(workdir, f"{exercise}-{seed}.npz")
+                    save_trace(path, parity_trace(exercise, seed))
+                    paths.append([exercise, path])
+
+        baseline_root = export_tree(baseline, os.path.join(workdir, "baseline"))
+        candidate_root = export_tree(args.candidate, os.path.join(workdir, "candidate")) if args.candidate else BACKEND_DIR
+        before = run_side(baseline_root, paths, workdir, "baseline")
+        after = run_side(candidate_root, paths, workdir, "candidate")
+
+    comparisons = [compare(exercise, states_before, states_after)
+                   for (exercise, _), states_before, states_after in zip(paths, before, after)]
+    summary = summarize(comparisons)
+    if args.json:
+        print(json.dumps({"baseline": baseline, "candidate": args.candidate or "working tree",
+                          "exercises": summary}, indent=2))
+        return
+    print(f"{baseline} -> {args.candidate or 'working tree'}")
+    print(f"{'exercise':<10}{'traces':>8}{'identical':>11}{'frames diff':>13}{'reps':>13}{'max diff':>10}  fields")
+    for result in summary:
+        reps = f"{result['reps_baseline']}->{result['reps_candidate']}"
+        print(f"{result['exercise']:<10}{result['traces']:>8}{result['traces_identical']:>11}"
+              f"{result['frames_differing']:>13}{reps:>13}{result['max_rep_difference']:>10}  "
+              f"{','.join(result['fields_differing']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
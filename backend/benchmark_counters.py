@@ -0,0 +1,153 @@
+"""
+Microbenchmark for the rep-counting logic alone.
+
+Replays landmark traces (counters/landmark_trace.py) through each exercise's
+counter with no pose graph, so only the counting state machine is timed:
+landmark checks, angles, smoothing, stage transitions and rep quality. Use
+recorded traces to benchmark real movement, or the built-in synthetic traces
+(a figure doing clean reps in front of the camera) for a quick comparison
+between builds.
+
+Usage:
+  python benchmark_counters.py
+  python benchmark_counters.py --trace squats=recordings/squats.npz --repeat 10 --json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import time
+
+import numpy as np
+
+from counters import EXERCISES, load_counter_class
+from counters.landmark_trace import NUM_LANDMARKS, LandmarkTrace, load_trace, replay
+
+
+# ============================================
+# SYNTHETIC TRACES
+# ============================================
+
+def _rotate(vector, degrees):
+    r = math.radians(degrees)
+    c, s = math.cos(r), math.sin(r)
+    return np.array([vector[0] * c - vector[1] * s, vector[0] * s + vector[1] * c])
+
+
+def _squat_pose(angle):
+    """Front view: both knees bend to `angle`, the torso leans with them."""
+    pose = _base_pose()
+    for side, x, sign in ((0, 0.45, 1), (1, 0.55, -1)):
+        shoulder, hip, knee, ankle = 11 + side, 23 + side, 25 + side, 27 + side
+        pose[hip, :2] = (x, 0.5)
+        pose[knee, :2] = (x, 0.65)
+        pose[ankle, :2] = pose[knee, :2] + _rotate((0, -1), sign * angle) * 0.15
+        pose[shoulder, :2] = pose[hip, :2] + _rotate((0, 1), sign * angle) * 0.2
+    return pose
+
+
+def _pushup_pose(angle):
+    """Both elbows bend to `angle` with shoulders and hips level."""
+    pose = _base_pose()
+    for side, x, sign in ((0, 0.4, 1), (1, 0.6, -1)):
+        shoulder, elbow, wrist, hip = 11 + side, 13 + side, 15 + side, 23 + side
+        pose[shoulder, :2] = (x, 0.5)
+        pose[hip, :2] = (x, 0.52)
+        pose[elbow, :2] = (x, 0.6)
+        pose[wrist, :2] = pose[elbow, :2] + _rotate((0, -1), sign * angle) * 0.1
+    return pose
+
+
+def _lunge_pose(angle):
+    """Side view: the front (left) and back knee bend to `angle`."""
+    pose = _base_pose()
+    for side in (0, 1):
+        hip, knee, ankle = 23 + side, 25 + side, 27 + side
+        front = side == 0
+        pose[hip, :2] = (0.5, 0.5)
+        pose[knee, :2] = (0.52 if front else 0.48, 0.65)
+        thigh = pose[hip, :2] - pose[knee, :2]
+        pose[ankle, :2] = pose[knee, :2] + _rotate(thigh / np.linalg.norm(thigh), (1 if front else -1) * angle) * 0.15
+    return pose
+
+
+def _base_pose():
+    pose = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    pose[:, 0], pose[:, 1], pose[:, 3] = 0.5, 0.3, 0.99
+    return pose
+
+
+SYNTHETIC_POSES = {"squats": (_squat_pose, 80), "pushups": (_pushup_pose, 80), "lunges": (_lunge_pose, 90)}
+
+
+def synthetic_trace(exercise, reps=20, fps=30.0, seed=0):
+    """A clean rep sequence with a little landmark jitter: hold, then down/up cycles."""
+    pose_fn, bottom = SYNTHETIC_POSES[exercise]
+    angles = [175.0] * 40
+    for _ in range(reps):
+        angles += list(np.linspace(175, bottom, 8)) + [bottom] * 10 + list(np.linspace(bottom, 175, 8)) + [175.0] * 40
+    rng = np.random.default_rng(seed)
+    landmarks = np.stack([pose_fn(angle) for angle in angles])
+    landmarks[:, :, :2] += rng.normal(0, 0.001, landmarks[:, :, :2].shape).astype(np.float32)
+    return LandmarkTrace(landmarks, np.arange(len(angles)) / fps, (640, 480), exercise)
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+def bench_exercise(exercise, trace, repeat=5):
+    """Best-of-repeat replay throughput for one exercise."""
+    counter_class = load_counter_class(exercise)
+    timings = []
+    counter = None
+    for _ in range(repeat):
+        # The counters print on state changes; that is console I/O, not counting logic
+        with contextlib.redirect_stdout(io.StringIO()):
+            counter = counter_class(pose_graph=False)
+            start = time.perf_counter()
+            replay(counter, trace)
+            timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "exercise": exercise,
+        "frames": len(trace),
+        "reps_counted": counter.counter,
+        "best_s": round(best, 5),
+        "median_s": round(float(np.median(timings)), 5),
+        "frames_per_second": round(len(trace) / best, 1),
+        "us_per_frame": round(best / len(trace) * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rep-counting logic on landmark traces")
+    parser.add_argument("--trace", action="append", default=[], metavar="EXERCISE=PATH",
+                        help="Recorded trace for an exercise (repeatable); others use synthetic traces")
+    parser.add_argument("--exercises", default=",".join(EXERCISES))
+    parser.add_argument("--reps", type=int, default=20, help="Reps per synthetic trace")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    recorded = dict(item.split("=", 1) for item in args.trace)
+    results = []
+    for exercise in args.exercises.split(","):
+        trace = load_trace(recorded[exercise]) if exercise in recorded else synthetic_trace(exercise, args.reps)
+        result = bench_exercise(exercise, trace, args.repeat)
+        result["trace"] = recorded.get(exercise, "synthetic")
+        results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'exercise':<10}{'frames':>8}{'reps':>6}{'frames/s':>12}{'us/frame':>10}  trace")
+    for result in results:
+        print(f"{result['exercise']:<10}{result['frames']:>8}{result['reps_counted']:>6}"
+              f"{result['frames_per_second']:>12}{result['us_per_frame']:>10}  {result['trace']}")
+
+
+if __name__ == "__main__":
+    main()
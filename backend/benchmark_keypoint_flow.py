@@ -0,0 +1,230 @@
+"""
+Count agreement of optical-flow keypoint propagation (POSE_KEYFRAME_INTERVAL)
+with pose inference on every frame.
+
+Each landmark trace is rendered as a video: every visible landmark is a small
+patch of random texture on a plain background (occluded landmarks, visibility
+below 0.5, are left out, as a real occlusion hides the joint). A stand-in pose
+graph returns the trace's landmarks for whichever frame it is given, the frame
+index being stamped into the first pixels, so inference is exact and only the
+frames that flow propagates differ. Each trace is counted once with inference
+on every frame and once per keyframe interval, and the counts are compared.
+
+Traces are recorded ones (counters/landmark_trace.py) or randomized synthetic
+ones: frame rate, depth, speed, holds, angle noise, outlier frames, no-pose
+frames and occluded joints vary per seed.
+
+Usage:
+  python benchmark_keypoint_flow.py
+  python benchmark_keypoint_flow.py --traces 40 --intervals 2,3,4 --json
+  python benchmark_keypoint_flow.py --trace squats=recordings/squats.npz
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+
+import cv2
+import numpy as np
+
+from benchmark_counters import SYNTHETIC_POSES
+from counters import EXERCISES, load_counter_class
+from counters.landmark_trace import NUM_LANDMARKS, LandmarkTrace, load_trace
+from counters.pose_pipeline import PosePipeline
+
+PATCH_SIZE = 15
+BACKGROUND = 110
+
+
+# ============================================
+# SYNTHETIC TRACES
+# ============================================
+
+def randomized_trace(exercise, seed):
+    """A rep sequence with per-seed frame rate, depth, tempo, noise and dropouts."""
+    pose_fn, _ = SYNTHETIC_POSES[exercise]
+    rng = np.random.default_rng(seed)
+    fps = (30, 30, 20, 12)[seed % 4]
+    bottom = float(rng.uniform(32, 70))
+    seconds = lambda low, high: max(1, int(rng.uniform(low, high) * fps))
+    move = max(2, int((175 - bottom) / rng.uniform(250, 550) * fps))  # 250-550 deg/s
+
+    angles = [175.0] * seconds(1.5, 2.5)  # Long enough to get ready
+    for _ in range(int(rng.integers(3, 8))):
+        angles += list(np.linspace(175, bottom, move)) + [bottom] * seconds(0.1, 0.7)
+        angles += list(np.linspace(bottom, 175, seconds(0.2, 0.7))) + [175.0] * seconds(0.4, 1.6)
+    angles = np.array(angles + [175.0] * fps)
+    angles += rng.normal(0, (0, 0.5, 2, 4)[(seed // 4) % 4], len(angles))
+    outliers = rng.random(len(angles)) < (0, 0, 0.01, 0.04)[(seed // 16) % 4]
+    angles[outliers] = rng.uniform(40, 120, outliers.sum())
+    angles = np.clip(angles, 20, 179)
+
+    landmarks = np.stack([pose_fn(angle) for angle in angles])
+    landmarks[:, :, :2] += rng.normal(0, 0.0015, landmarks[:, :, :2].shape).astype(np.float32)
+    # Each dropout resets the counter's ready state, so most traces have few or none
+    dropout_rate = float(rng.choice((0.0, 0.0, 0.002, 0.01)))
+    dropout = rng.random(len(angles))
+    landmarks[dropout < dropout_rate] = np.nan  # No pose found
+    occluded_joint = 13 if exercise == "pushups" else 25  # Left elbow / left knee
+    landmarks[(dropout >= dropout_rate) & (dropout < 2 * dropout_rate), occluded_joint, 3] = 0.1
+    return LandmarkTrace(landmarks, np.arange(len(angles)) / fps, (640, 480), exercise)
+
+
+# ============================================
+# RENDERING AND STAND-IN GRAPH
+# ============================================
+
+class _Landmark:
+    def __init__(self, x, y, z, visibility):
+        self.x, self.y, self.z, self.visibility = x, y, z, visibility
+
+
+class _LandmarkList:
+    """Plain-object landmarks, like MediaPipe's, so propagation can move them."""
+
+    def __init__(self, array):
+        self.landmark = [_Landmark(*row) for row in array.tolist()]
+
+
+class _Results:
+    def __init__(self, pose_landmarks):
+        self.pose_landmarks = pose_landmarks
+
+
+def render_frame(index, landmarks, width, height, patches):
+    """A BGR frame with each visible landmark's texture patch at its sub-pixel position."""
+    image = np.full((height, width), BACKGROUND, dtype=np.uint8)
+    if not np.isnan(landmarks[0, 0]):
+        half = PATCH_SIZE // 2
+        size = PATCH_SIZE + 2
+        mask = np.full((PATCH_SIZE, PATCH_SIZE), 255, dtype=np.uint8)
+        for point, patch in zip(landmarks, patches):
+            if point[3] < 0.5:
+                continue
+            x, y = point[0] * width - half, point[1] * height - half
+            x0, y0 = int(np.floor(x)) - 1, int(np.floor(y)) - 1
+            shift = np.float32([[1, 0, x - x0], [0, 1, y - y0]])
+            warped = cv2.warpAffine(patch, shift, (size, size), flags=cv2.INTER_LINEAR)
+            covered = cv2.warpAffine(mask, shift, (size, size), flags=cv2.INTER_LINEAR) > 127
+            sx0, sy0 = max(0, -x0), max(0, -y0)
+            sx1, sy1 = min(size, width - x0), min(size, height - y0)
+            if sx1 <= sx0 or sy1 <= sy0:
+                continue
+            region = image[y0 + sy0:y0 + sy1, x0 + sx0:x0 + sx1]
+            keep = covered[sy0:sy1, sx0:sx1]
+            region[keep] = warped[sy0:sy1, sx0:sx1][keep]
+    # Frame index for the stand-in graph
+    image[0, 0], image[0, 1] = index % 256, index // 256
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+
+class TraceGraph:
+    """Stand-in pose graph: returns the trace's landmarks for the frame stamped in the image."""
+
+    def __init__(self, landmarks):
+        self.landmarks = landmarks
+        self.calls = 0
+
+    def process(self, rgb):
+        self.calls += 1
+        index = int(rgb[0, 0, 0]) + 256 * int(rgb[0, 1, 0])
+        landmarks = self.landmarks[index]
+        return _Results(None if np.isnan(landmarks[0, 0]) else _LandmarkList(landmarks))
+
+    def close(self):
+        pass
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+def count_video(exercise, trace, frames, interval):
+    """Counts rendered frames with pose on keyframes only. Returns (count, good, bad, inferences)."""
+    graph = TraceGraph(trace.landmarks)
+    with contextlib.redirect_stdout(io.StringIO()):
+        counter = load_counter_class(exercise)(pose_graph=False)
+        counter.pose_pipeline = PosePipeline(lambda model_complexity: graph, roi_enabled=False,
+                                             keyframe_interval=interval)
+        clock = [0.0]
+        counter.clock = lambda: clock[0]
+        for timestamp, frame in zip(trace.timestamps, frames):
+            clock[0] = float(timestamp)
+            counter.process_frame(frame, draw=False)
+        counter.close()
+    return counter.counter, counter.good_reps, counter.bad_reps, graph.calls
+
+
+def compare_trace(exercise, trace, intervals, seed=0):
+    """Full-inference and per-interval counts for one trace."""
+    width, height = trace.frame_size
+    rng = np.random.default_rng(seed)
+    patches = [rng.integers(0, 256, (PATCH_SIZE, PATCH_SIZE), dtype=np.uint8) for _ in range(NUM_LANDMARKS)]
+    frames = [render_frame(index, landmarks, width, height, patches)
+              for index, landmarks in enumerate(trace.landmarks)]
+    reference = count_video(exercise, trace, frames, 1)
+    return reference, {interval: count_video(exercise, trace, frames, interval) for interval in intervals}
+
+
+def summarize(comparisons, intervals):
+    frames = sum(frame_count for frame_count, _, _ in comparisons)
+    summary = {
+        "traces": len(comparisons),
+        "frames": frames,
+        "reps_full_inference": sum(reference[0] for _, reference, _ in comparisons),
+        "intervals": [],
+    }
+    for interval in intervals:
+        differences = [abs(results[interval][0] - reference[0]) for _, reference, results in comparisons]
+        summary["intervals"].append({
+            "keyframe_interval": interval,
+            "inference_share": round(sum(results[interval][3] for _, _, results in comparisons) / frames, 3),
+            "traces_identical": sum(results[interval][:3] == reference[:3] for _, reference, results in comparisons),
+            "traces_count_differs": sum(difference > 0 for difference in differences),
+            "max_rep_difference": max(differences, default=0),
+            "total_rep_difference": sum(differences),
+        })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare keyframe + optical flow counts with full inference")
+    parser.add_argument("--trace", action="append", default=[], metavar="EXERCISE=PATH",
+                        help="Recorded trace to compare (repeatable); without any, randomized synthetic traces")
+    parser.add_argument("--exercises", default=",".join(EXERCISES))
+    parser.add_argument("--traces", type=int, default=40, help="Synthetic traces per exercise")
+    parser.add_argument("--intervals", default="2,3,4")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    intervals = [int(interval) for interval in args.intervals.split(",")]
+    if args.trace:
+        sources = [(exercise, load_trace(path)) for exercise, path in (item.split("=", 1) for item in args.trace)]
+    else:
+        sources = [(exercise, randomized_trace(exercise, seed))
+                   for exercise in args.exercises.split(",") for seed in range(args.traces)]
+
+    start = time.perf_counter()
+    comparisons = []
+    for index, (exercise, trace) in enumerate(sources):
+        reference, results = compare_trace(exercise, trace, intervals, seed=index)
+        comparisons.append((len(trace), reference, results))
+    summary = summarize(comparisons, intervals)
+    summary["seconds"] = round(time.perf_counter() - start, 1)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"{summary['traces']} traces, {summary['frames']} frames, "
+          f"{summary['reps_full_inference']} reps with inference on every frame")
+    print(f"{'interval':>8}{'inference':>11}{'identical':>11}{'max diff':>10}{'total diff':>12}")
+    for result in summary["intervals"]:
+        print(f"{result['keyframe_interval']:>8}{result['inference_share']:>11.0%}"
+              f"{result['traces_identical']:>7}/{summary['traces']:<3}"
+              f"{result['max_rep_difference']:>10}{result['total_rep_difference']:>12}")
+
+
+if __name__ == "__main__":
+    main()
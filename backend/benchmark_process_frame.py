@@ -0,0 +1,400 @@
+"""
+Load-generation benchmark for /process-frame.
+
+Replays a recorded JPEG sequence from N concurrent simulated clients, each with
+its own session, at a target FPS against a local server, and reports latency
+percentiles, achieved FPS per session, error and drop rates, and CPU per frame.
+Like the web client, each simulated client has at most one frame in flight: a
+frame is sent at its scheduled time, or as soon as the previous reply arrives if
+the server is behind.
+
+Frames come from a directory of JPEGs (sorted by name), a video file, or, with
+neither, a synthetic moving figure. Everything runs locally; --spawn starts its
+own uvicorn server so its CPU time (including pose worker processes) can be measured.
+
+Usage:
+  python benchmark_process_frame.py --spawn --clients 4 --fps 15 --duration 30
+  python benchmark_process_frame.py --url http://localhost:8000 --frames recordings/squats/ \\
+      --server-pid 1234 --output results/build-123.json
+
+The JSON report (stdout, or --output) is meant for comparing builds.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import cv2
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ============================================
+# FRAME SOURCES
+# ============================================
+
+def load_frames(source, max_frames=300, max_dim=None):
+    """Loads JPEG bytes from a directory of images or a video file."""
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.jpg")) + glob.glob(os.path.join(source, "*.jpeg")))
+        if not paths:
+            raise ValueError(f"No .jpg files in {source}")
+        frames = []
+        for path in paths[:max_frames]:
+            with open(path, "rb") as f:
+                frames.append(f.read())
+        return frames
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open {source}")
+    frames = []
+    try:
+        while len(frames) < max_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(encode_jpeg(frame, max_dim))
+    finally:
+        capture.release()
+    if not frames:
+        raise ValueError(f"No frames decoded from {source}")
+    return frames
+
+
+def synthetic_frames(count=60, width=640, height=480):
+    """A figure bobbing up and down, for runs without a recording."""
+    frames = []
+    for i in range(count):
+        frame = np.full((height, width, 3), 90, dtype=np.uint8)
+        depth = int(height * 0.12 * (1 - np.cos(2 * np.pi * i / count)) / 2)
+        cx, top = width // 2, height // 6 + depth
+        cv2.circle(frame, (cx, top), height // 14, (200, 180, 160), -1)
+        cv2.line(frame, (cx, top + height // 14), (cx, height // 2 + depth), (200, 180, 160), height // 20)
+        for dx in (-1, 1):
+            cv2.line(frame, (cx, top + height // 8), (cx + dx * width // 8, height // 2 + depth), (200, 180, 160), height // 40)
+            cv2.line(frame, (cx, height // 2 + depth), (cx + dx * width // 12, height * 9 // 10), (200, 180, 160), height // 30)
+        frames.append(encode_jpeg(frame))
+    return frames
+
+
+def encode_jpeg(frame, max_dim=None):
+    if max_dim:
+        h, w = frame.shape[:2]
+        scale = max_dim / max(h, w)
+        if scale < 1:
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+
+
+# ============================================
+# CPU ACCOUNTING
+# ============================================
+
+def process_cpu_seconds(pid):
+    """User + system CPU seconds of a process and its children (Linux /proc), or None."""
+    try:
+        ticks = os.sysconf("SC_CLK_TCK")
+        pids = [pid] + [child for child in _all_pids() if _parent_pid(child) == pid]
+        total = 0
+        for p in pids:
+            with open(f"/proc/{p}/stat") as stat:
+                # Fields after the ")" that ends the command name; utime and stime are 14 and 15
+                fields = stat.read().rsplit(")", 1)[1].split()
+            total += int(fields[11]) + int(fields[12])
+        return total / ticks
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _all_pids():
+    return [int(name) for name in os.listdir("/proc") if name.isdigit()]
+
+
+def _parent_pid(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return int(stat.read().rsplit(")", 1)[1].split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# ============================================
+# SERVER
+# ============================================
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(port, timeout=120):
+    """Starts uvicorn main:app in the backend directory and waits for /ready."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{url}/ready", timeout=1).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Server did not become ready in time")
+
+
+def scrape_stage_totals(url):
+    """Per-stage (sum, count) from /metrics, or {} if the server has no metrics endpoint."""
+    try:
+        response = httpx.get(f"{url}/metrics", timeout=5)
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    totals = {}
+    for line in response.text.splitlines():
+        for suffix, index in (("_sum{", 0), ("_count{", 1)):
+            if line.startswith("kinova_frame_stage_seconds" + suffix):
+                stage = line.split('stage="', 1)[1].split('"', 1)[0]
+                entry = totals.setdefault(stage, [0.0, 0])
+                entry[index] += float(line.rsplit(" ", 1)[1])
+    return totals
+
+
+# ============================================
+# LOAD GENERATION
+# ============================================
+
+async def run_client(client, url, frames, args, start_at, stop_at, offset):
+    """One simulated session. Returns its list of frame records."""
+    session_id = f"bench-{uuid.uuid4().hex[:8]}"
+    interval = 1.0 / args.fps if args.fps else 0.0
+    data = {"workout_type": args.workout_type, "session_id": session_id, "response_mode": args.response_mode}
+    if args.output_encoding:
+        data["output_encoding"] = args.output_encoding
+    if args.quality:
+        data["quality"] = str(args.quality)
+    if args.max_dim:
+        data["max_dim"] = str(args.max_dim)
+
+    records = []
+    index = 0
+    next_send = start_at
+    while True:
+        now = time.perf_counter()
+        if now >= stop_at:
+            break
+        if next_send > now:
+            await asyncio.sleep(next_send - now)
+        frame = frames[(offset + index) % len(frames)]
+        sent = time.perf_counter()
+        record = {"sent": sent, "status": "ok"}
+        try:
+            response = await client.post(url, files={"file": ("frame.jpg", frame, "image/jpeg")}, data=data)
+            record["latency"] = time.perf_counter() - sent
+            if response.status_code != 200:
+                record["status"] = f"http_{response.status_code}"
+            elif response.headers.get("content-type", "").startswith("application/json"):
+                result = response.json()
+                if result.get("dropped"):
+                    record["status"] = "dropped"
+                elif "error" in result:
+                    record["status"] = "error"
+        except httpx.HTTPError as e:
+            record["latency"] = time.perf_counter() - sent
+            record["status"] = f"exception_{type(e).__name__}"
+        records.append(record)
+        index += 1
+        # Paced at the target FPS; never more than one frame in flight per session
+        next_send = max(next_send + interval, time.perf_counter()) if interval else time.perf_counter()
+    return session_id, records
+
+
+async def run_load(url, frames, args):
+    limits = httpx.Limits(max_connections=args.clients + 2)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        endpoint = f"{url}/process-frame"
+        start_at = time.perf_counter()
+        stop_at = start_at + args.duration
+        sessions = await asyncio.gather(*[
+            # Clients start spread over one frame interval, at different points in the recording
+            run_client(client, endpoint, frames, args, start_at + (i / args.clients / args.fps if args.fps else 0), stop_at, i * 7)
+            for i in range(args.clients)
+        ])
+        return sessions, time.perf_counter() - start_at
+
+
+def percentiles_ms(latencies):
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2),
+            "mean": round(float(values.mean()), 2), "max": round(float(values.max()), 2)}
+
+
+def build_report(args, url, frames, sessions, elapsed, server_cpu, client_cpu, stages_before, stages_after):
+    all_records = [record for _, records in sessions for record in records]
+    ok = [record for record in all_records if record["status"] == "ok"]
+    dropped = sum(1 for record in all_records if record["status"] == "dropped")
+    errors = len(all_records) - len(ok) - dropped
+    by_status = {}
+    for record in all_records:
+        by_status[record["status"]] = by_status.get(record["status"], 0) + 1
+
+    per_session = []
+    for session_id, records in sessions:
+        processed = sum(1 for record in records if record["status"] == "ok")
+        per_session.append({
+            "session_id": session_id,
+            "frames_sent": len(records),
+            "frames_ok": processed,
+            "achieved_fps": round(processed / elapsed, 2),
+            "latency_ms": percentiles_ms([record["latency"] for record in records if record["status"] == "ok"]),
+        })
+    fps_values = [session["achieved_fps"] for session in per_session]
+
+    stages_ms = {}
+    for stage, (total, count) in stages_after.items():
+        before_total, before_count = stages_before.get(stage, (0.0, 0))
+        if count > before_count:
+            stages_ms[stage] = round((total - before_total) / (count - before_count) * 1000, 3)
+
+    return {
+        "benchmark": "process_frame",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()},
+        "config": {
+            "url": url, "clients": args.clients, "target_fps": args.fps, "duration_s": args.duration,
+            "warmup_s": args.warmup, "workout_type": args.workout_type, "response_mode": args.response_mode,
+            "output_encoding": args.output_encoding, "quality": args.quality, "max_dim": args.max_dim,
+            "frames_source": args.frames or "synthetic", "frames_in_sequence": len(frames),
+            "mean_frame_bytes": int(np.mean([len(frame) for frame in frames])),
+        },
+        "elapsed_s": round(elapsed, 3),
+        "frames_sent": len(all_records),
+        "frames_ok": len(ok),
+        "frames_dropped": dropped,
+        "errors": errors,
+        "error_rate": round(errors / len(all_records), 4) if all_records else None,
+        "status_counts": by_status,
+        "throughput_fps": round(len(ok) / elapsed, 2),
+        "latency_ms": percentiles_ms([record["latency"] for record in ok]),
+        "session_fps": {
+            "min": min(fps_values, default=None),
+            "mean": round(float(np.mean(fps_values)), 2) if fps_values else None,
+            "max": max(fps_values, default=None),
+        },
+        "sessions": per_session,
+        # Server CPU includes pose worker processes; None if the server pid is unknown
+        "server_cpu_ms_per_frame": round(server_cpu / len(ok) * 1000, 2) if server_cpu is not None and ok else None,
+        "client_cpu_ms_per_frame": round(client_cpu / len(all_records) * 1000, 2) if all_records else None,
+        # Mean server-side seconds per stage over the run, from /metrics
+        "server_stage_ms": stages_ms,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_summary(report):
+    latency = report["latency_ms"]
+    print(f"{report['frames_ok']}/{report['frames_sent']} frames ok in {report['elapsed_s']} s "
+          f"({report['throughput_fps']} fps total, {report['frames_dropped']} dropped, "
+          f"error rate {report['error_rate']})", file=sys.stderr)
+    print(f"latency ms: p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}", file=sys.stderr)
+    session_fps = report["session_fps"]
+    print(f"per-session fps: min {session_fps['min']}  mean {session_fps['mean']}  max {session_fps['max']} "
+          f"(target {report['config']['target_fps']})", file=sys.stderr)
+    print(f"cpu ms/frame: server {report['server_cpu_ms_per_frame']}  client {report['client_cpu_ms_per_frame']}", file=sys.stderr)
+    if report["server_stage_ms"]:
+        print("server stages ms: " + "  ".join(f"{stage} {ms}" for stage, ms in sorted(report["server_stage_ms"].items())),
+              file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-generation benchmark for /process-frame")
+    parser.add_argument("--url", default="http://localhost:8000", help="Server base URL (ignored with --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="Start a local uvicorn server for the run")
+    parser.add_argument("--server-pid", type=int, help="PID of an already running server, for CPU per frame")
+    parser.add_argument("--frames", help="Directory of .jpg frames or a video file (default: synthetic)")
+    parser.add_argument("--max-frames", type=int, default=300, help="Frames to load from --frames")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent simulated sessions")
+    parser.add_argument("--fps", type=float, default=15.0, help="Target FPS per session (0 = as fast as possible)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured run length in seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured warm-up seconds")
+    parser.add_argument("--workout-type", default="squats", choices=["squats", "pushups", "lunges"])
+    parser.add_argument("--response-mode", default="frame", choices=["frame", "landmarks"])
+    parser.add_argument("--output-encoding", choices=["json", "jpeg", "webp", "multipart"])
+    parser.add_argument("--quality", type=int)
+    parser.add_argument("--max-dim", type=int)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames, args.max_frames) if args.frames else synthetic_frames()
+
+    server = None
+    server_pid = args.server_pid
+    url = args.url.rstrip("/")
+    if args.spawn:
+        server, url = spawn_server(free_port())
+        server_pid = server.pid
+        print(f"Started server on {url} (pid {server_pid})", file=sys.stderr)
+
+    try:
+        # Warm-up runs first so CPU and /metrics deltas only cover the measured window
+        if args.warmup > 0:
+            asyncio.run(run_load(url, frames, argparse.Namespace(**{**vars(args), "duration": args.warmup})))
+        stages_before = scrape_stage_totals(url)
+        server_cpu_start = process_cpu_seconds(server_pid) if server_pid else None
+        client_cpu_start = sum(os.times()[:2])
+
+        sessions, elapsed = asyncio.run(run_load(url, frames, args))
+
+        client_cpu = sum(os.times()[:2]) - client_cpu_start
+        server_cpu = None
+        if server_cpu_start is not None:
+            server_cpu_end = process_cpu_seconds(server_pid)
+            server_cpu = server_cpu_end - server_cpu_start if server_cpu_end is not None else None
+        stages_after = scrape_stage_totals(url)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    report = build_report(args, url, frames, sessions, elapsed, server_cpu, client_cpu, stages_before, stages_after)
+    print_summary(report)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Exercise counters. Counter modules import MediaPipe and OpenCV, so they are
+imported on first use rather than with this package.
+"""
+
+import importlib
+import time
+
+EXERCISES = ("squats", "pushups", "lunges")
+
+# Workout type that detects the exercise and counts all of them on one pose pass
+AUTO_WORKOUT = "auto"
+
+# Workout type -> (module, counter class)
+COUNTER_MODULES = {
+    "squats": ("counters.squat_counter", "FinalSquatCounter"),
+    "pushups": ("counters.pushup_counter", "FinalBalancedPushUpCounter"),
+    "lunges": ("counters.lunge_counter", "FinalLungeCounter"),
+    AUTO_WORKOUT: ("counters.auto_counter", "AutoExerciseCounter"),
+}
+
+# Import time of each counter module, in ms (filled on first import)
+import_times_ms = {}
+
+
+def load_counter_class(workout_type):
+    """Returns the counter class for an exercise, importing its module on first use."""
+    if workout_type not in COUNTER_MODULES:
+        raise ValueError(f"Unknown workout type: {workout_type}")
+    module_name, class_name = COUNTER_MODULES[workout_type]
+    if workout_type not in import_times_ms:
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        import_times_ms[workout_type] = round((time.perf_counter() - start) * 1000, 1)
+        print(f"Imported {module_name} in {import_times_ms[workout_type]:.0f} ms")
+    else:
+        module = importlib.import_module(module_name)
+    return getattr(module, class_name)
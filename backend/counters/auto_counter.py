@@ -0,0 +1,277 @@
+"""
+Counting without naming the exercise (workout_type "auto").
+
+AutoExerciseCounter runs one pose inference per frame and feeds the landmarks
+to every exercise counter (built without pose graphs of their own) and to the
+ExerciseClassifier. The counter of the detected exercise draws the overlay and
+is credited with its reps; the others keep their filters and ready state warm
+on the same landmarks, so a switch picks up straight away. Reps another counter
+completes on frames that already look like its exercise are held back and
+credited if that exercise takes over before the active one counts again, so the
+first reps of a new exercise are not lost to the detection delay. A session therefore
+holds one pose graph instead of one per exercise, and the client no longer
+tracks which exercise is being done.
+
+count/good_reps/bad_reps/speeds are totals over the whole workout;
+exercise_counts() splits the reps by exercise.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from counters import EXERCISES, load_counter_class
+from counters.engine import acquire_pose_graph
+from counters.exercise_classifier import ExerciseClassifier
+from counters.keypoint_flow import keyframe_interval
+from counters.kinematics import landmark_array
+from counters.landmark_trace import as_pose_landmarks
+from counters.pose_graph_pool import shared_graph_pool
+from counters.pose_pipeline import ComplexityController, PosePipeline, max_input_dim, roi_crop_enabled
+
+
+class AutoExerciseCounter:
+    """Rep counter that detects the exercise, on one shared pose pass for all exercise counters."""
+
+    def __init__(self, pose_graph=True, exercises=EXERCISES):
+        self.exercises = tuple(exercises)
+        self.counters = {exercise: load_counter_class(exercise)(pose_graph=False) for exercise in self.exercises}
+        self.classifier = ExerciseClassifier(self.exercises)
+        self._clock = time.time
+        self.detection_mode = self.counters[self.exercises[0]].detection_mode
+        self.reset_state()
+
+        # The shared graph runs at the most permissive detection confidence of the exercises
+        self.min_detection_confidence = min(counter.spec.detection_confidence for counter in self.counters.values())
+        self.min_tracking_confidence = self.min_detection_confidence
+        self.pose_pipeline = None
+        if pose_graph and self.detection_mode == "mediapipe":
+            self.pose_pipeline = PosePipeline(
+                self.create_pose_graph,
+                model_complexity=1,
+                roi_enabled=roi_crop_enabled(),
+                controller=ComplexityController.from_env(),
+                release_graph=shared_graph_pool.release,
+                max_input_dim=max_input_dim(),
+                keyframe_interval=keyframe_interval()
+            )
+
+    def reset_state(self):
+        """
+        Resets every exercise's count and the detected exercise. The pose graph is
+        kept; the pipeline's ROI crop and flow keyframe are dropped.
+        """
+        for counter in self.counters.values():
+            counter.reset_state()
+        self.classifier.reset()
+        self.exercise = None
+        self.active = None
+        self.saved_reps = {}  # Exercise -> (count, good, bad, speeds) while it is not the active one
+        self.pending_reps = {}  # Exercise -> [count, good, bad, speeds] held back from an inactive counter
+        self.credited = (0, 0, 0, 0)  # Active counter's count, good, bad, speeds already in the totals
+
+        # Totals over all exercises
+        self.counter = 0
+        self.good_reps = 0
+        self.bad_reps = 0
+        self.avg_speed = 0
+        self.speeds = []
+
+        self.last_frame_time = None
+        self.nominal_frame_interval = 1 / 30  # Assumed for the first frame only
+        self.max_frame_interval = 0.5
+        self.last_pose_landmarks = None
+        self.draw_seconds = 0.0
+        if self.detection_mode == "motion":
+            # Motion detection cannot tell exercises apart; count as the first one
+            self.activate(self.exercises[0])
+        if getattr(self, "pose_pipeline", None) is not None:
+            self.pose_pipeline.reset()
+
+    def create_pose_graph(self, model_complexity=1):
+        return acquire_pose_graph(model_complexity, self.min_detection_confidence, self.min_tracking_confidence)
+
+    def close(self):
+        """Returns the pose graph to the shared pool."""
+        if self.pose_pipeline is not None:
+            self.pose_pipeline.close()
+            self.pose_pipeline = None
+        for counter in self.counters.values():
+            counter.close()
+
+    @property
+    def pose(self):
+        return self.pose_pipeline.pose
+
+    @property
+    def clock(self):
+        return self._clock
+
+    @clock.setter
+    def clock(self, clock):
+        # Every exercise counter times its frames on the same clock
+        self._clock = clock
+        for counter in self.counters.values():
+            counter.clock = clock
+
+    # --- State of the active exercise ---
+    @property
+    def stage(self):
+        return self.active.stage if self.active is not None else None
+
+    @property
+    def system_ready(self):
+        return self.active.system_ready if self.active is not None else False
+
+    @property
+    def last_angles(self):
+        return self.active.last_angles if self.active is not None else {}
+
+    @property
+    def last_feedback(self):
+        return self.active.last_feedback if self.active is not None else None
+
+    @property
+    def current_leg(self):
+        if self.active is None or not hasattr(self.active, "current_leg"):
+            raise AttributeError("current_leg")
+        return self.active.current_leg
+
+    def exercise_counts(self):
+        """Reps counted for each exercise."""
+        return {
+            exercise: counter.counter if counter is self.active else self.saved_reps.get(exercise, (0,))[0]
+            for exercise, counter in self.counters.items()
+        }
+
+    def activate(self, exercise):
+        """Makes exercise the counted one, restoring the reps it had when it was last active."""
+        if self.active is not None:
+            active = self.active
+            self.saved_reps[self.exercise] = (active.counter, active.good_reps, active.bad_reps, list(active.speeds))
+        counter = self.counters[exercise]
+        count, good, bad, speeds = self.saved_reps.pop(exercise, (0, 0, 0, []))
+        self.credited = (count, good, bad, len(speeds))
+        # Held-back reps go in above the credited mark, so credit_reps adds them to the totals
+        pending = self.pending_reps.get(exercise, (0, 0, 0, []))
+        counter.counter, counter.good_reps, counter.bad_reps = count + pending[0], good + pending[1], bad + pending[2]
+        counter.speeds = speeds + pending[3]
+        counter.avg_speed = np.mean(counter.speeds[-10:]) if counter.speeds else 0
+        self.pending_reps.clear()
+        self.exercise, self.active = exercise, counter
+        self.classifier.confirm(exercise)
+        print(f"🔎 Exercise detected: {counter.spec.display_name}")
+
+    def mid_rep(self):
+        """Whether the active counter is in a rep that can still count."""
+        active = self.active
+        if active is None or active.stage != "DOWN" or active.rep_start_time is None:
+            return False
+        return active.last_frame_time - active.rep_start_time < active.spec.rep_time[1]
+
+    def credit_reps(self):
+        """Adds the active counter's new reps to the workout totals."""
+        active = self.active
+        count, good, bad, timed = self.credited
+        if active.counter == count:
+            return
+        self.counter += active.counter - count
+        self.good_reps += active.good_reps - good
+        self.bad_reps += active.bad_reps - bad
+        self.speeds.extend(active.speeds[timed:])
+        if self.speeds:
+            self.avg_speed = np.mean(self.speeds[-10:])
+        self.credited = (active.counter, active.good_reps, active.bad_reps, len(active.speeds))
+
+    def frame_interval(self):
+        now = self._clock()
+        previous, self.last_frame_time = self.last_frame_time, now
+        if previous is None:
+            return self.nominal_frame_interval
+        return min(max(now - previous, 0.0), self.max_frame_interval)
+
+    # --- Frame processing ---
+    def process_frame(self, frame, draw=True):
+        """Runs pose once on the frame and counts it for every exercise."""
+        self.draw_seconds = 0.0
+        if self.detection_mode != "mediapipe":
+            frame = self.active.process_frame(frame, draw)
+            self.credit_reps()
+            return frame
+        h, w = frame.shape[:2]
+        results = self.pose_pipeline.process(frame)
+        pose_landmarks = results.pose_landmarks
+        landmarks = landmark_array(pose_landmarks) if pose_landmarks else None
+        return self.count_pose(pose_landmarks, landmarks, w, h, frame, draw)
+
+    def process_landmarks(self, landmarks, width, height):
+        """Counts one frame of recorded landmarks ((33, 4) normalized array, or None for no pose)."""
+        pose_landmarks = as_pose_landmarks(landmarks)
+        # A no-pose row is NaN; the classifier must see it as no pose, not as a frame to label
+        self.count_pose(pose_landmarks, landmarks if pose_landmarks is not None else None, width, height)
+
+    def count_pose(self, pose_landmarks, landmarks, w, h, frame=None, draw=False):
+        self.last_pose_landmarks = pose_landmarks
+        detected = self.classifier.update(landmarks, w, h, self.frame_interval())
+        # Never switch mid-rep: the rep in progress finishes on its own counter
+        if detected != self.exercise and not self.mid_rep():
+            self.activate(detected)
+
+        for exercise, counter in self.counters.items():
+            if counter is not self.active:
+                self.count_inactive(exercise, counter, pose_landmarks, w, h)
+        if self.active is None:
+            if draw:
+                self.draw_detecting(frame, pose_landmarks)
+            return frame
+
+        self.active.draw_seconds = 0.0
+        self.active.process_pose(pose_landmarks, w, h, frame, draw)
+        if self.active.counter != self.credited[0]:
+            # Still doing the active exercise: reps held back elsewhere were not a switch
+            self.pending_reps.clear()
+        self.credit_reps()
+        if draw:
+            draw_start = time.perf_counter()
+            self.draw_exercise(frame)
+            self.draw_seconds = self.active.draw_seconds + time.perf_counter() - draw_start
+        return frame
+
+    def count_inactive(self, exercise, counter, pose_landmarks, w, h):
+        """Counts a frame on an inactive counter, holding back reps completed on frames labelled its exercise."""
+        count, good, bad, timed = counter.counter, counter.good_reps, counter.bad_reps, len(counter.speeds)
+        counter.process_pose(pose_landmarks, w, h)
+        if counter.counter != count and self.classifier.label == exercise:
+            pending = self.pending_reps.setdefault(exercise, [0, 0, 0, []])
+            pending[0] += counter.counter - count
+            pending[1] += counter.good_reps - good
+            pending[2] += counter.bad_reps - bad
+            pending[3].extend(counter.speeds[timed:])
+
+    # --- Overlay ---
+    def draw_detecting(self, frame, pose_landmarks):
+        """Skeleton and a prompt while no exercise has been detected yet."""
+        draw_start = time.perf_counter()
+        h, w = frame.shape[:2]
+        helper = self.counters[self.exercises[0]]
+        helper.update_scale_factors(w, h)
+        font_props = helper.get_scaled_font_properties()
+        if pose_landmarks:
+            helper.mp_drawing.draw_landmarks(frame, pose_landmarks, helper.mp_pose.POSE_CONNECTIONS)
+            message, color = 'DETECTING EXERCISE...', (0, 165, 255)
+        else:
+            message, color = 'NO POSE DETECTED', (0, 0, 255)
+        cv2.putText(frame, message, (int(w * 0.02), int(h * 0.08)),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_main'], color, font_props['thickness_main'])
+        names = ', '.join(counter.spec.display_name for counter in self.counters.values())
+        cv2.putText(frame, f'Start any of: {names}', (int(w * 0.02), int(h * 0.14)),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (255, 255, 255), font_props['thickness_normal'])
+        self.draw_seconds = time.perf_counter() - draw_start
+
+    def draw_exercise(self, frame):
+        """Detected-exercise label under the active counter's title."""
+        h, w = frame.shape[:2]
+        font_props = self.active.get_scaled_font_properties()
+        cv2.putText(frame, f'AUTO: {self.active.spec.display_name.upper()}', (int(w * 0.65), int(h * 0.05) * 3),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_small'], (0, 255, 255), font_props['thickness_small'])
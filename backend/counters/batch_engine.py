@@ -0,0 +1,630 @@
+"""
+Struct-of-arrays rep counting for many landmark sessions at once.
+
+BatchCounter runs the SpecCounter state machine (counters/engine.py) for every
+session of one exercise, but keeps each piece of state as a column - one
+NumPy array entry per session - instead of one Python object per session.
+step() advances any set of sessions by one frame with a fixed number of
+array operations, so the interpreter overhead of a frame is paid once per
+tick rather than once per session. Only client-side landmarks are counted:
+there is no pose inference, drawing or console output per rep.
+
+Counts, stages, ready state, angles and feedback follow SpecCounter frame for
+frame. Per-rep means and avg_speed are computed from running sums, so they can
+differ from SpecCounter's np.mean in the last bits. The smoothing window holds
+window_capacity frames per signal (SpecCounter's holds 120), which covers the
+0.32 s window up to 100 FPS.
+"""
+
+import math
+import time
+
+import numpy as np
+
+from counters.engine import MIN_BODY_UNIT
+from counters.filters import one_euro_settings
+from counters.kinematics import batch_landmarks_reliable, joint_angles
+
+# Stage codes; STAGES[code] is the SpecCounter stage
+NO_STAGE, UP, DOWN = 0, 1, 2
+STAGES = (None, "UP", "DOWN")
+# Leading-leg codes; LEGS[code] is SpecCounter.current_leg
+NO_LEG, LEFT, RIGHT = 0, 1, 2
+LEGS = ("N/A", "LEFT", "RIGHT")
+
+NOMINAL_FRAME_INTERVAL = 1 / 30  # Assumed for a session's first frame only
+MAX_FRAME_INTERVAL = 0.5  # Longer gaps (paused client) count as this long
+SPEED_WINDOW = 10  # avg_speed is the mean time of the last 10 reps
+
+
+# ============================================
+# COLUMN RULES
+# ============================================
+
+_COLUMN_COMPARISONS = {
+    "<": np.less,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "between": lambda value, limit: (limit[0] < value) & (value < limit[1]),
+    "outside": lambda value, limit: ~((limit[0] < value) & (value < limit[1])),
+}
+
+
+def compile_column_rule(rule):
+    """
+    compile_rule for columns: the predicate takes a dict of per-session arrays
+    and returns a bool array. Rule names were validated when the spec compiled.
+    """
+    name, op = rule[0], rule[1]
+    if op == "ok":
+        return lambda q: q[name]
+    if op == "fails":
+        return lambda q: ~q[name]
+    if op not in _COLUMN_COMPARISONS:
+        raise ValueError(f"Unknown rule operator: {op}")
+    compare, limit = _COLUMN_COMPARISONS[op], rule[2]
+    return lambda q: compare(q[name], limit)
+
+
+def all_rules(rules, q, size):
+    """Sessions (of size) passing every rule."""
+    passed = np.ones(size, dtype=bool)
+    for rule in rules:
+        passed &= rule(q)
+    return passed
+
+
+def _signal_column(source, joint_index):
+    """Column form of CompiledSpec._signal_source: fn(angles, coords, leg, unit) -> (n,) array."""
+    if isinstance(source, str):
+        i = joint_index[source]
+        return lambda angles, coords, leg, unit: angles[:, i]
+    kind = source[0]
+    if kind == "mean":
+        i, j = joint_index[source[1]], joint_index[source[2]]
+        return lambda angles, coords, leg, unit: (angles[:, i] + angles[:, j]) / 2
+    if kind in ("lead", "trail"):
+        left, right = joint_index[source[1]], joint_index[source[2]]
+        if kind == "trail":
+            left, right = right, left
+        return lambda angles, coords, leg, unit: np.where(
+            leg == LEFT, angles[:, left], np.where(leg == RIGHT, angles[:, right], 0.0))
+    (left_hip, right_hip), (left_ankle, right_ankle) = source[1], source[2]
+
+    def balance(angles, coords, leg, unit):
+        # x coordinates sit at even slots of the flattened pixel coordinates
+        is_left = leg == LEFT
+        hip_x = np.where(is_left, coords[:, 2 * left_hip], coords[:, 2 * right_hip])
+        front_x = np.where(is_left, coords[:, 2 * left_ankle], coords[:, 2 * right_ankle])
+        back_x = np.where(is_left, coords[:, 2 * right_ankle], coords[:, 2 * left_ankle])
+        offset = np.where(np.abs(front_x - back_x) < unit, np.abs(hip_x - front_x),
+                          np.abs(hip_x - (front_x + back_x) / 2)) / unit
+        return np.where(leg == NO_LEG, 999.0, offset)  # High offset when the leading leg is unknown
+    return balance
+
+
+# ============================================
+# BATCH COUNTER
+# ============================================
+
+class BatchCounter:
+    """
+    Counting state of many sessions of one exercise, as columns. Sessions are
+    rows, allocated on first use and recycled when removed; the columns grow
+    by doubling as sessions are added.
+    """
+
+    def __init__(self, spec, capacity=64, window_capacity=32):
+        self.spec = spec
+        self.compiled = compiled = spec.compile()
+        self.window_capacity = window_capacity
+        self.euro = one_euro_settings()
+
+        joint_index = {name: i for i, name in enumerate(compiled.joint_names)}
+        self.signal_names = compiled.signal_names
+        self.signal_columns = [_signal_column(spec.signals[name], joint_index) for name in self.signal_names]
+        # Tracked signals (depth groups, up reference) keep a running min per rep
+        self.tracked = list(compiled.tracked_slots)
+        self.depth_columns = {group: [self.tracked.index(slot) for slot in slots]
+                              for group, slots in compiled.depth_slots.items()}
+        self.reference = spec.up_reference
+        self.reference_column = self.tracked.index(compiled.reference_slot) if spec.up_reference else None
+        # Reported angles: a frame quantity by name, or a raw joint angle by index
+        self.reported = [(name, name if slot is not None else None, joint) for name, slot, joint in compiled.report]
+
+        self.ready_rules = [compile_column_rule(rule) for rule in spec.ready]
+        self.rep_rules = [compile_column_rule(rule) for rule in spec.rep_rules]
+        self.quality_rules = [compile_column_rule(rule) for rule in spec.quality]
+        self.feedback_rules = [(STAGES.index(stage) if stage else None, compile_column_rule(rule) if rule else None)
+                               for stage, rule, _, _ in spec.feedback]
+        self.feedback_messages = [message for _, _, message, _ in spec.feedback]
+
+        self.rows = {}  # session_id -> row
+        self.session_ids = []  # row -> session_id, None when free
+        self.free_rows = []
+        self.columns = self._column_specs()
+        self.capacity = 0
+        self._grow(capacity)
+
+    def _column_specs(self):
+        """Column name -> (trailing shape, dtype, value of a fresh session)."""
+        signals, tracked, means = len(self.signal_names), len(self.tracked), len(self.spec.rep_means)
+        columns = {
+            "last_seen": ((), float, 0.0),  # Wall clock, for idle expiry
+            "last_frame_time": ((), float, np.nan),
+            "counter": ((), np.int64, 0),
+            "good_reps": ((), np.int64, 0),
+            "bad_reps": ((), np.int64, 0),
+            "stage": ((), np.int8, NO_STAGE),
+            "rep_start_time": ((), float, np.nan),
+            "last_rep_time": ((), float, 0.0),
+            "current_leg": ((), np.int8, NO_LEG),
+            "last_leading_leg": ((), np.int8, -1),
+            "last_leg_switch_time": ((), float, 0.0),
+            "system_ready": ((), bool, False),
+            "stable_time": ((), float, 0.0),
+            "consecutive_down_time": ((), float, 0.0),
+            "consecutive_up_time": ((), float, 0.0),
+            "time_in_up_state": ((), float, 0.0),
+            "up_reference": ((), float, 180.0),
+            "velocity_previous": ((), float, np.nan),
+            "velocity_current": ((), float, np.nan),
+            "extrema_min": ((tracked,), float, np.inf),
+            "extrema_max": ((tracked,), float, -np.inf),
+            "mean_sum": ((means,), float, 0.0),
+            "mean_count": ((means,), np.int64, 0),
+            "speeds": ((SPEED_WINDOW,), float, 0.0),
+            "avg_speed": ((), float, 0.0),
+            "measured": ((), bool, False),  # Angles were measured on the last frame
+            "report": ((len(self.reported),), float, np.nan),
+            "feedback": ((), np.int16, -1),
+        }
+        if self.euro is not None:
+            columns.update({
+                "euro_value": ((signals,), float, np.nan),
+                "euro_speed": ((signals,), float, 0.0),
+                "euro_time": ((signals,), float, np.nan),
+            })
+        else:
+            # RunningMean per signal: a ring of (time, value) slots with a running sum
+            columns.update({
+                "window_times": ((signals, self.window_capacity), float, 0.0),
+                "window_values": ((signals, self.window_capacity), float, 0.0),
+                "window_start": ((signals,), np.int64, 0),
+                "window_count": ((signals,), np.int64, 0),
+                "window_sum": ((signals,), float, 0.0),
+            })
+        return columns
+
+    def _grow(self, capacity):
+        for name, (shape, dtype, fresh) in self.columns.items():
+            column = np.full((capacity, *shape), fresh, dtype=dtype)
+            if self.capacity:
+                column[:self.capacity] = getattr(self, name)
+            setattr(self, name, column)
+        self.free_rows.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.session_ids.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    # --- Sessions ---
+    def row(self, session_id):
+        """The session's row, allocating a fresh one on first use."""
+        row = self.rows.get(session_id)
+        if row is None:
+            if not self.free_rows:
+                self._grow(self.capacity * 2)
+            row = self.free_rows.pop()
+            self.rows[session_id] = row
+            self.session_ids[row] = session_id
+            self.reset_rows([row])
+        return row
+
+    def reset_rows(self, rows):
+        """Returns rows to the state of a fresh session."""
+        for name, (_, _, fresh) in self.columns.items():
+            getattr(self, name)[rows] = fresh
+
+    def reset_session(self, session_id):
+        """Clears a session's rep state. Returns False if the session has no row."""
+        row = self.rows.get(session_id)
+        if row is None:
+            return False
+        last_seen = self.last_seen[row]
+        self.reset_rows([row])
+        self.last_seen[row] = last_seen
+        return True
+
+    def remove_session(self, session_id):
+        row = self.rows.pop(session_id, None)
+        if row is None:
+            return False
+        self.session_ids[row] = None
+        self.free_rows.append(row)
+        return True
+
+    def sessions_idle_since(self, cutoff):
+        """Session ids last seen before cutoff (wall clock), least recently seen first."""
+        rows = np.fromiter(self.rows.values(), dtype=np.int64, count=len(self.rows))
+        idle = rows[self.last_seen[rows] < cutoff]
+        return [self.session_ids[row] for row in idle[np.argsort(self.last_seen[idle])]]
+
+    def least_recent_sessions(self, count):
+        rows = np.fromiter(self.rows.values(), dtype=np.int64, count=len(self.rows))
+        return [self.session_ids[row] for row in rows[np.argsort(self.last_seen[rows])[:count]]]
+
+    def __len__(self):
+        return len(self.rows)
+
+    # --- Counting ---
+    def step(self, rows, landmarks, found, widths, heights, times):
+        """
+        Advances each session in rows (distinct) by one frame. landmarks is an
+        (n, 33, 4) array of normalized x, y, z, visibility (rows where found is
+        False had no pose), widths/heights the frame sizes and times the capture
+        times in seconds.
+        """
+        spec = self.spec
+        rows = np.asarray(rows, dtype=np.int64)
+        times = np.asarray(times, dtype=float)
+        self.last_seen[rows] = time.time()
+        self.measured[rows] = False
+        self.report[rows] = np.nan
+        self.feedback[rows] = -1
+
+        previous = self.last_frame_time[rows]
+        dt = np.where(np.isnan(previous), NOMINAL_FRAME_INTERVAL,
+                      np.clip(times - previous, 0.0, MAX_FRAME_INTERVAL))
+        self.last_frame_time[rows] = times
+
+        found = np.asarray(found, dtype=bool)
+        self._lose_pose(rows[~found])
+
+        # All required landmarks must be visible and within the frame. Client payloads
+        # are float32; like landmark_array, values are compared and scaled as float64.
+        landmarks = np.asarray(landmarks)
+        if not found.all():
+            landmarks = landmarks[found]
+        reliable = batch_landmarks_reliable(landmarks, self.compiled.landmarks, spec.min_visibility)
+        keep = np.flatnonzero(found)[reliable]
+        unreliable = rows[found][~reliable]
+        self._lose_pose(unreliable[self.system_ready[unreliable]])
+        if not len(keep):
+            return
+        r, dt, now = rows[keep], dt[keep], times[keep]
+        size = np.stack([np.asarray(widths, dtype=float)[keep], np.asarray(heights, dtype=float)[keep]], axis=1)
+        if not reliable.all():
+            landmarks = landmarks[reliable]
+        points = landmarks[:, :, :2].astype(np.float64) * size[:, None, :]
+        q, raw, angles = self._measure(r, points, now, dt)
+
+        # Unrealistic gate angles mean a false detection
+        low, high = spec.angle_range
+        gates = np.stack([q[name] for name in spec.gates], axis=1)
+        realistic = ((gates >= low) & (gates <= high)).all(axis=1)
+        if not spec.angle_range_when_ready and not realistic.all():
+            unrealistic = r[~realistic]
+            self._lose_pose(unrealistic[self.system_ready[unrealistic]])
+            r, dt, now, gates = r[realistic], dt[realistic], now[realistic], gates[realistic]
+            q = {name: value[realistic] for name, value in q.items()}
+            raw = raw[realistic]
+            realistic = realistic[realistic]
+
+        if spec.leading_leg is not None:
+            self._track_leading_leg(r, q["leg"], now)
+        waiting = ~self.system_ready[r]
+        if waiting.any():
+            self._update_ready(r, waiting, q, dt)
+        # Checked once ready: sessions that are not ready keep their ready update
+        rejected = ~realistic & self.system_ready[r]
+        if rejected.any():
+            self._lose_pose(r[rejected])
+            kept = ~rejected
+            r, dt, now, gates = r[kept], dt[kept], now[kept], gates[kept]
+            q = {name: value[kept] for name, value in q.items()}
+            raw = raw[kept]
+        ready = self.system_ready[r]
+        if ready.any():
+            self._update_stage(r[ready], {name: value[ready] for name, value in q.items()},
+                               raw[ready], gates[ready], now[ready], dt[ready])
+        self._form_feedback(r, q)
+
+    def _lose_pose(self, rows):
+        self.system_ready[rows] = False
+        self.stable_time[rows] = 0.0
+        self.stage[rows] = NO_STAGE
+
+    def _measure(self, r, points, now, dt):
+        """Angles, smoothed signals, derived values, checks and velocity for rows r."""
+        spec, compiled = self.spec, self.compiled
+        angles = joint_angles(points, compiled.joints)
+        coords = points.reshape(len(r), -1)
+        q = {}
+        leg = None
+        if spec.leading_leg is not None:
+            left_x, right_x = coords[:, 2 * spec.leading_leg[0]], coords[:, 2 * spec.leading_leg[1]]
+            leg = np.where(left_x > right_x, LEFT, np.where(right_x > left_x, RIGHT, NO_LEG)).astype(np.int8)
+            self.current_leg[r] = leg
+            q["leg"] = leg
+        unit = self._body_unit(coords)
+        raw = np.stack([column(angles, coords, leg, unit) for column in self.signal_columns], axis=1)
+
+        smoothed = self._smooth(r, raw, now)
+        for s, name in enumerate(self.signal_names):
+            q[name] = smoothed[:, s]
+        names = compiled.names
+        for slot, (a, b) in compiled.derived_slots:
+            q[names[slot]] = (q[names[a]] + q[names[b]]) / 2
+        for name, rows in zip(spec.checks, compiled.check_rows):
+            passed = np.ones(len(r), dtype=bool)
+            for a0, a1, b0, b1, limit in rows:
+                passed &= np.abs((coords[:, a0] + coords[:, a1]) / 2 - (coords[:, b0] + coords[:, b1]) / 2) < limit * unit
+            q[name] = passed
+
+        if self.tracked:
+            tracked = smoothed[:, self.tracked]
+            self.extrema_min[r] = np.minimum(self.extrema_min[r], tracked)
+            self.extrema_max[r] = np.maximum(self.extrema_max[r], tracked)
+        self.measured[r] = True
+        if self.reported:
+            self.report[r] = np.stack([q[name] if name is not None else angles[:, joint]
+                                       for _, name, joint in self.reported], axis=1)
+
+        previous = self.velocity_previous[r] = self.velocity_current[r]
+        current = self.velocity_current[r] = q[spec.velocity]
+        q["velocity"] = np.where(np.isnan(previous) | (dt <= 0), 0.0,
+                                 np.abs(current - previous) / np.where(dt > 0, dt, 1.0))
+        return q, raw, angles
+
+    def _body_unit(self, coords):
+        """CompiledSpec.body_unit per row, with the same operations in the same order."""
+        scale_slots = self.compiled.scale_slots
+        if not scale_slots:
+            return np.ones(len(coords))
+        total = np.zeros(len(coords))
+        for a, b in scale_slots:
+            dx, dy = coords[:, a] - coords[:, b], coords[:, a + 1] - coords[:, b + 1]
+            total += np.sqrt(dx * dx + dy * dy)
+        return np.maximum(total / len(scale_slots) / 100, MIN_BODY_UNIT)
+
+    def _smooth(self, r, raw, now):
+        """Pushes each row's raw signals into its smoothing filters. Returns the (n, signals) filtered values."""
+        if self.euro is not None:
+            return self._smooth_one_euro(r, raw, now)
+        capacity = self.window_capacity
+        index = (r[:, None], np.arange(raw.shape[1])[None, :])
+        start, count, total = self.window_start[r], self.window_count[r], self.window_sum[r]
+        times, values = self.window_times, self.window_values
+
+        full = count == capacity
+        if full.any():
+            total[full] -= values[(*index, start)][full]
+            start[full] = (start[full] + 1) % capacity
+            count[full] -= 1
+        end = (start + count) % capacity
+        times[(*index, end)] = now[:, None]
+        values[(*index, end)] = raw
+        count += 1
+        total += raw
+        # Evict everything older than the window, oldest first
+        cutoff = now[:, None] - self.spec.smoothing_window
+        old = times[(*index, start)] < cutoff
+        while old.any():
+            total[old] -= values[(*index, start)][old]
+            start[old] = (start[old] + 1) % capacity
+            count[old] -= 1
+            old &= times[(*index, start)] < cutoff
+        self.window_start[r], self.window_count[r], self.window_sum[r] = start, count, total
+        return total / count
+
+    def _smooth_one_euro(self, r, raw, now):
+        min_cutoff, beta, d_cutoff = self.euro["min_cutoff"], self.euro["beta"], 1.0
+        value, speed, last = self.euro_value[r], self.euro_speed[r], self.euro_time[r]
+        now = np.broadcast_to(now[:, None], raw.shape)
+        first = np.isnan(value)
+        dt = now - last
+        moving = ~first & (dt > 0)
+        step = np.where(moving, dt, 1.0)
+
+        def alpha(cutoff):
+            ratio = 2 * math.pi * cutoff * step
+            return ratio / (ratio + 1)
+
+        a_d = alpha(d_cutoff)
+        new_speed = a_d * (raw - value) / step + (1 - a_d) * speed
+        a = alpha(min_cutoff + beta * np.abs(new_speed))
+        new_value = a * raw + (1 - a) * value
+        self.euro_speed[r] = np.where(moving, new_speed, speed)
+        self.euro_value[r] = value = np.where(first, raw, np.where(moving, new_value, value))
+        self.euro_time[r] = np.where(first | moving, now, last)
+        return value
+
+    def _reset_filters(self, rows, signals):
+        """Restarts the smoothing of signals (columns) for rows."""
+        index = (rows[:, None], np.asarray(signals)[None, :])
+        if self.euro is not None:
+            self.euro_value[index], self.euro_speed[index], self.euro_time[index] = np.nan, 0.0, np.nan
+        else:
+            self.window_start[index], self.window_count[index], self.window_sum[index] = 0, 0, 0.0
+
+    def _track_leading_leg(self, r, leg, now):
+        """A leg switch mid-rep abandons the rep (at most once per leg_switch_cooldown)."""
+        last = self.last_leading_leg[r]
+        switched = ((last >= 0) & (leg != last) &
+                    (now - self.last_leg_switch_time[r] > self.spec.leg_switch_cooldown))
+        abandoned = r[switched & (self.stage[r] == DOWN)]
+        self.stage[abandoned] = UP
+        self.rep_start_time[abandoned] = np.nan
+        self.last_leg_switch_time[r[switched]] = now[switched]
+        self.last_leading_leg[r] = leg
+
+    def _update_ready(self, r, waiting, q, dt):
+        """Counts up the time held in the ready pose for sessions that are not ready yet."""
+        spec = self.spec
+        rows, dt = r[waiting], dt[waiting]
+        q = {name: value[waiting] for name, value in q.items()}
+        held = all_rules(self.ready_rules, q, len(rows))
+        stable = self.stable_time[rows]
+        stable = np.where(held, np.minimum(stable + dt, spec.ready_hold),
+                          np.maximum(0.0, stable - spec.ready_decay * dt))
+        self.stable_time[rows] = stable
+        became = held & (stable >= spec.ready_hold)
+        ready = rows[became]
+        self.system_ready[ready] = True
+        self.stage[ready] = UP
+        self.time_in_up_state[ready] = spec.min_up_time  # Start with the UP timer satisfied
+        if self.reference is not None:
+            self.up_reference[ready] = q[self.reference][became]
+        if spec.leading_leg is not None:
+            self.last_leading_leg[ready] = self.current_leg[ready]
+
+    def _update_stage(self, r, q, raw, gates, now, dt):
+        """Hysteresis UP/DOWN state machine for ready sessions; a DOWN -> UP transition completes a rep."""
+        spec = self.spec
+        if spec.posture is not None:
+            # Posture lost: abandon any rep and wait in UP
+            lost = ~q[spec.posture]
+            rows = r[lost]
+            self.stage[rows] = UP
+            self.consecutive_down_time[rows] = 0.0
+            self.consecutive_up_time[rows] = 0.0
+            self.rep_start_time[rows] = np.nan
+            if lost.any():
+                held = ~lost
+                r, raw, gates, now, dt = r[held], raw[held], gates[held], now[held], dt[held]
+                q = {name: value[held] for name, value in q.items()}
+
+        stage = self.stage[r]
+        # Time in UP guards against starting a rep straight after the last one
+        time_in_up = np.where(stage == UP, self.time_in_up_state[r] + dt, 0.0)
+
+        bands = spec.bands
+        velocity = q["velocity"]
+        leaving_up = stage != DOWN
+        is_up = np.where(leaving_up, (gates > bands["up_low"]).all(axis=1), (gates > bands["up_high"]).all(axis=1))
+        is_down = np.where(leaving_up,
+                           (gates < bands["down_high"]).all(axis=1) & (velocity > spec.min_down_velocity) &
+                           (time_in_up >= spec.min_up_time),
+                           (gates < bands["down_low"]).all(axis=1))
+
+        # A stage must hold for confirm_time before it is confirmed; in the transition
+        # zone (neither) both timers drain and the stage does not change
+        up_time, down_time = self.consecutive_up_time[r], self.consecutive_down_time[r]
+        up_time = np.where(is_up, up_time + dt, np.where(is_down, 0.0, np.maximum(0.0, up_time - dt)))
+        down_time = np.where(is_up, 0.0, np.where(is_down, down_time + dt, np.maximum(0.0, down_time - dt)))
+        self.consecutive_up_time[r], self.consecutive_down_time[r] = up_time, down_time
+        potential = np.where(is_up, UP, np.where(is_down, DOWN, stage))
+
+        since_rep = now - self.last_rep_time[r]
+        confirm_up = (potential == UP) & (up_time >= spec.confirm_time)
+        from_down = confirm_up & (stage == DOWN)
+        rep_start = self.rep_start_time[r]
+        finished = from_down & ~np.isnan(rep_start) & (rep_start != 0) & (since_rep > spec.min_rep_interval)
+        if finished.any():
+            self._finish_rep(r[finished], {name: value[finished] for name, value in q.items()}, now[finished])
+        self.rep_start_time[r[from_down]] = np.nan
+        time_in_up[from_down] = 0.0
+        if self.reference is not None:
+            entered = confirm_up & (stage == NO_STAGE)
+            self.up_reference[r[entered]] = q[self.reference][entered]
+        self.stage[r[confirm_up]] = UP
+
+        confirm_down = ~confirm_up & (potential == DOWN) & (down_time >= spec.confirm_time)
+        started = (confirm_down & (stage == UP) & (since_rep > spec.min_rep_interval) &
+                   (time_in_up >= spec.min_up_time) & (velocity < spec.max_down_velocity))
+        self.time_in_up_state[r] = time_in_up
+        if started.any():
+            self._start_rep(r[started], q[self.reference][started] if self.reference else None, now[started])
+
+        # Per-rep means sample the raw signal while DOWN
+        if spec.rep_means:
+            down = self.stage[r] == DOWN
+            mean_signals = [self.signal_names.index(name) for name in spec.rep_means]
+            self.mean_sum[r[down]] += raw[down][:, mean_signals]
+            self.mean_count[r[down]] += 1
+
+    def _start_rep(self, rows, reference, now):
+        self.rep_start_time[rows] = now
+        # Depth is measured from here; smoothing restarts so the descent is not averaged with the stand
+        if self.tracked:
+            self._reset_filters(rows, self.tracked)
+        self.extrema_min[rows] = np.inf
+        self.extrema_max[rows] = -np.inf
+        self.mean_sum[rows] = 0.0
+        self.mean_count[rows] = 0
+        self.velocity_previous[rows] = self.velocity_current[rows] = np.nan
+        if reference is not None:
+            self.up_reference[rows] = reference
+        self.stage[rows] = DOWN
+
+    def _finish_rep(self, rows, q, now):
+        """Checks the completed reps of rows against the rep and quality rules."""
+        spec = self.spec
+        rep = dict(q)
+        rep["rep_time"] = now - self.rep_start_time[rows]
+        extrema_min = self.extrema_min[rows]
+        for group, columns in self.depth_columns.items():
+            rep[group] = extrema_min[:, columns].min(axis=1)
+        if self.reference_column is not None:
+            rep["angle_change"] = self.up_reference[rows] - extrema_min[:, self.reference_column]
+        mean_sum, mean_count = self.mean_sum[rows], self.mean_count[rows]
+        for i, name in enumerate(spec.rep_means):
+            rep[name] = np.where(mean_count[:, i] > 0, mean_sum[:, i] / np.maximum(mean_count[:, i], 1), q[name])
+
+        min_time, max_time = spec.rep_time
+        size = len(rows)
+        counted = (min_time < rep["rep_time"]) & (rep["rep_time"] < max_time) & all_rules(self.rep_rules, rep, size)
+        good = counted & all_rules(self.quality_rules, rep, size)
+        reps = rows[counted]
+        self.speeds[reps, self.counter[reps] % SPEED_WINDOW] = rep["rep_time"][counted]
+        self.counter[reps] += 1
+        recent = np.minimum(self.counter[reps], SPEED_WINDOW)
+        self.avg_speed[reps] = self.speeds[reps].sum(axis=1) / recent
+        self.good_reps[rows[good]] += 1
+        self.bad_reps[rows[counted & ~good]] += 1
+        if self.reference is not None:
+            self.up_reference[reps] = q[self.reference][counted]
+        cooled = counted | spec.cooldown_after_rejected
+        self.last_rep_time[rows[cooled]] = now[cooled]
+        self.mean_sum[rows] = 0.0
+        self.mean_count[rows] = 0
+
+    def _form_feedback(self, r, q):
+        """First matching form tip for ready sessions, as an index into spec.feedback."""
+        feedback = np.full(len(r), -1, dtype=np.int16)
+        open_rows = self.system_ready[r].copy()
+        stage = self.stage[r]
+        for i, (rule_stage, rule) in enumerate(self.feedback_rules):
+            match = open_rows.copy()
+            if rule_stage is not None:
+                match &= stage == rule_stage
+            if rule is not None:
+                match &= rule(q)
+            feedback[match] = i
+            open_rows &= ~match
+        self.feedback[r] = feedback
+
+    # --- Results ---
+    def results(self, rows):
+        """Per-session results, in the same form as frame_pipeline.run_landmarks_counting."""
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = zip(self.counter[rows].tolist(), self.stage[rows].tolist(), self.avg_speed[rows].tolist(),
+                      self.good_reps[rows].tolist(), self.bad_reps[rows].tolist(), self.system_ready[rows].tolist(),
+                      self.feedback[rows].tolist(), self.measured[rows].tolist(), self.report[rows].round(1).tolist(),
+                      self.current_leg[rows].tolist())
+        names = [name for name, _, _ in self.reported]
+        results = []
+        for count, stage, avg_speed, good, bad, ready, feedback, measured, report, leg in columns:
+            result = {
+                "count": count,
+                "stage": STAGES[stage],
+                "avg_speed": avg_speed,
+                "good_reps": good,
+                "bad_reps": bad,
+                "ready": ready,
+                "feedback": self.feedback_messages[feedback] if feedback >= 0 else None,
+                "angles": dict(zip(names, report)) if measured else {},
+            }
+            if self.spec.leading_leg is not None:
+                result["leading_leg"] = LEGS[leg]
+            results.append(result)
+        return results
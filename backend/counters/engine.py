@@ -0,0 +1,1109 @@
+"""
+Rep-counting engine driven by declarative exercise specs.
+
+An ExerciseSpec describes an exercise as data: the landmarks that must be
+visible, the joint angles to measure, the smoothed signals built from them,
+the hysteresis bands for the UP/DOWN stages, the ready pose, the rules a rep
+must pass to count (and to count as good form) and the form tips. spec.compile()
+turns it into index arrays and small closures once per exercise, so a frame
+is a few NumPy operations plus a fixed run of comparisons. SpecCounter is the
+one state machine every exercise runs on; the counter modules only hold specs.
+
+Rules are tuples over named quantities:
+  (name, "<", value)  (name, ">", value)  (name, ">=", value)
+  (name, "between", (low, high))  (name, "outside", (low, high))
+  (name, "ok")  (name, "fails")            for posture checks
+Per-frame rules see the signals, derived values, checks and "velocity". Rep
+rules also see "rep_time", the depth groups (lowest value of their signals
+during the rep), "angle_change" (drop of the up_reference signal from its UP
+value to its lowest) and the per-rep means.
+"""
+
+import math
+import time
+
+import cv2
+import numpy as np
+
+from counters.filters import RepExtrema, angle_smoother
+from counters.kinematics import landmark_array, landmarks_reliable, pixel_points
+from counters.keypoint_flow import keyframe_interval
+from counters.landmark_trace import as_pose_landmarks
+from counters.pose_graph_pool import shared_graph_pool
+from counters.pose_pipeline import ComplexityController, PosePipeline, max_input_dim, roi_crop_enabled
+
+try:
+    import mediapipe as mp
+    MEDIAPIPE_AVAILABLE = True
+    print("✅ MediaPipe loaded successfully!")
+except ImportError:
+    MEDIAPIPE_AVAILABLE = False
+    print("⚠️  MediaPipe not available, using motion detection mode")
+
+FEEDBACK_COLORS = {"good": (0, 255, 0), "tip": (0, 165, 255), "alert": (0, 0, 255)}
+
+# Floor for the body-scale unit (pixels), for degenerate poses with overlapping landmarks
+MIN_BODY_UNIT = 1e-3
+
+
+def acquire_pose_graph(model_complexity, detection_confidence, tracking_confidence):
+    """Checks out a warmed Pose graph with these settings from the shared pool, building one if none is idle."""
+    key = (model_complexity, detection_confidence, tracking_confidence)
+    return shared_graph_pool.acquire(key, lambda: mp.solutions.pose.Pose(
+        static_image_mode=False,
+        model_complexity=model_complexity,
+        smooth_landmarks=True,
+        min_detection_confidence=detection_confidence,
+        min_tracking_confidence=tracking_confidence
+    ))
+
+
+# ============================================
+# EXERCISE SPEC
+# ============================================
+
+class ExerciseSpec:
+    """
+    Declarative description of one exercise. Names used in rules refer to the
+    joints, signals, derived values and checks defined here.
+
+    joints:   name -> (a, b, c) landmark indices; the angle is measured at b
+    signals:  name -> source, smoothed every frame. A source is a joint name,
+              ("mean", joint, joint), ("lead", left_joint, right_joint) /
+              ("trail", ...) for the leading / trailing leg, or
+              ("balance", (left_hip, right_hip), (left_ankle, right_ankle)):
+              the leading hip's x offset from the centre between the ankles,
+              in body-scale units
+    derived:  name -> ("mean", signal, signal), computed after smoothing
+    checks:   name -> rows of (axis, a, b, limit): |a - b| < limit body-scale
+              units along "x" or "y"; a and b are a landmark or a pair (its midpoint)
+    body_scale: landmark pairs whose mean pixel distance is 100 body-scale
+              units, so checks and balance read the same at any resolution
+    gates:    signals compared with the hysteresis bands; all must agree
+    depth:    group -> signals; the group's rep depth is their lowest value
+    """
+
+    def __init__(self, name, display_name, title, count_label, view, landmarks, joints, signals, gates, bands,
+                 velocity, min_down_velocity, max_down_velocity, ready, depth, rep_rules, quality,
+                 derived=None, checks=None, body_scale=(), leading_leg=None, min_visibility=0.5, angle_range=(30, 180),
+                 angle_range_when_ready=False,
+                 ready_hold=0.58, ready_decay=1.0, confirm_time=0.12, min_rep_interval=1.0, min_up_time=0.0,
+                 rep_time=(0.5, 8.0), cooldown_after_rejected=True, posture=None, up_reference=None,
+                 rep_means=(), feedback=(), report=(), display=(), labels=(), rep_detail="Time: {rep_time:.2f}s",
+                 ready_prompt="GET IN STANDING POSITION", no_pose_hint="Face camera directly",
+                 detection_confidence=0.65, smoothing_window=0.32, leg_switch_cooldown=1.5,
+                 motion_threshold=7000, motion_cooldown=2.5):
+        self.name = name
+        self.display_name = display_name  # "Squats"
+        self.title = title  # Overlay header, "SQUAT COUNTER"
+        self.count_label = count_label  # "SQUATS"
+        self.view = view  # Console banner, "FINAL FRONT VIEW SQUATS"
+        self.landmarks = tuple(landmarks)
+        self.min_visibility = min_visibility
+        self.joints = dict(joints)
+        self.signals = dict(signals)
+        self.derived = dict(derived or {})
+        self.checks = dict(checks or {})
+        self.body_scale = tuple(body_scale)  # (a, b) landmark pairs; their mean distance is 100 units
+        self.leading_leg = leading_leg  # (left_ankle, right_ankle): the ankle further along x leads
+        self.gates = tuple(gates)
+        self.bands = dict(bands)  # up_high, up_low, down_high, down_low
+        self.angle_range = angle_range  # Gate values outside this reset the system
+        # Check angle_range only once ready, after the ready update (else on every frame, first)
+        self.angle_range_when_ready = angle_range_when_ready
+        self.velocity = velocity
+        self.min_down_velocity = min_down_velocity  # deg/s needed to start a rep
+        self.max_down_velocity = max_down_velocity  # deg/s above which a rep start is noise
+        self.ready = tuple(ready)
+        self.ready_hold = ready_hold
+        self.ready_decay = ready_decay  # Hold time lost per second out of the ready pose
+        self.confirm_time = confirm_time
+        self.min_rep_interval = min_rep_interval
+        self.min_up_time = min_up_time  # Time in UP before a new rep may start
+        self.rep_time = rep_time
+        self.cooldown_after_rejected = cooldown_after_rejected
+        self.posture = posture  # Check that must hold while counting (else back to UP)
+        self.up_reference = up_reference  # Signal whose UP value angle_change is measured from
+        self.depth = {group: tuple(names) for group, names in depth.items()}
+        self.rep_rules = tuple(rep_rules)
+        self.rep_means = tuple(rep_means)  # Signals averaged (raw) over the DOWN stage
+        self.quality = tuple(quality)
+        self.feedback = tuple(feedback)  # (stage or None, rule or None, message, level)
+        self.report = tuple(report)  # Names reported in last_angles
+        self.display = tuple(display)  # (label, name) lines in the overlay
+        self.labels = tuple(labels)  # (prefix, joint or leg signal) drawn at the joint
+        self.rep_detail = rep_detail
+        self.ready_prompt = ready_prompt
+        self.no_pose_hint = no_pose_hint
+        self.detection_confidence = detection_confidence
+        self.smoothing_window = smoothing_window
+        self.leg_switch_cooldown = leg_switch_cooldown
+        self.motion_threshold = motion_threshold
+        self.motion_cooldown = motion_cooldown
+        self._compiled = None
+
+    def compile(self):
+        """The CompiledSpec for this spec, built on first use."""
+        if self._compiled is None:
+            self._compiled = CompiledSpec(self)
+        return self._compiled
+
+
+# ============================================
+# COMPILED EVALUATOR
+# ============================================
+
+_COMPARISONS = {
+    "<": lambda value, limit: value < limit,
+    ">": lambda value, limit: value > limit,
+    ">=": lambda value, limit: value >= limit,
+    "between": lambda value, limit: limit[0] < value < limit[1],
+    "outside": lambda value, limit: not (limit[0] < value < limit[1]),
+}
+
+
+def compile_rule(rule, key):
+    """
+    A predicate for one rule tuple. key(name) gives the index of a quantity in
+    the sequence the predicate is called with (a list slot or a dict key).
+    """
+    name, op = rule[0], rule[1]
+    k = key(name)
+    if op == "ok":
+        return lambda q: q[k]
+    if op == "fails":
+        return lambda q: not q[k]
+    if op not in _COMPARISONS:
+        raise ValueError(f"Unknown rule operator: {op}")
+    limit = rule[2]
+    if op == "<":
+        return lambda q: q[k] < limit
+    if op == ">":
+        return lambda q: q[k] > limit
+    compare = _COMPARISONS[op]
+    return lambda q: compare(q[k], limit)
+
+
+class CompiledSpec:
+    """
+    Index arrays and closures for one spec. Per-frame quantities live in a flat
+    list: the smoothed signals, then derived values, checks and velocity.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.landmarks = np.array(spec.landmarks)
+        self.joint_names = list(spec.joints)
+        joint_index = {name: i for i, name in enumerate(self.joint_names)}
+        self.joints = np.array([spec.joints[name] for name in self.joint_names])
+        # (a, b, c) as x slots of the flattened pixel coordinates (y is the next slot)
+        self.joint_slots = [(2 * a, 2 * b, 2 * c) for a, b, c in self.joints.tolist()]
+
+        self.signal_names = list(spec.signals)
+        self.names = self.signal_names + list(spec.derived) + list(spec.checks) + ["velocity"]
+        self.slots = {name: i for i, name in enumerate(self.names)}
+        self.signal_sources = [self._signal_source(spec.signals[name], joint_index) for name in self.signal_names]
+        self.derived_slots = [(self.slots[name], self._mean_slots(source)) for name, source in spec.derived.items()]
+        self.velocity_slot = self.slots["velocity"]
+        self.source_slot = self.slot(spec.velocity)
+        self.gate_slots = [self.slot(name) for name in spec.gates]
+        self.check_slot = len(self.signal_names) + len(spec.derived)
+        # (a, b) x slots of the body-scale segments
+        self.scale_slots = [(2 * a, 2 * b) for a, b in spec.body_scale]
+        uses_scale = spec.checks or any(not isinstance(source, str) and source[0] == "balance"
+                                        for source in spec.signals.values())
+        if uses_scale and not self.scale_slots:
+            raise ValueError(f"{spec.name}: checks and balance signals need body_scale")
+        self._compile_checks(spec.checks)
+
+        self.depth_slots = {group: [self.signal_slot(name) for name in names] for group, names in spec.depth.items()}
+        self.reference_slot = self.signal_slot(spec.up_reference) if spec.up_reference else None
+        self.tracked_slots = sorted({slot for slots in self.depth_slots.values() for slot in slots} |
+                                    ({self.reference_slot} if spec.up_reference else set()))
+        self.mean_slots = [self.signal_slot(name) for name in spec.rep_means]
+        self.posture_slot = self.slot(spec.posture) if spec.posture else None
+
+        frame_key = self.slot
+        rep_key = self._rep_key
+        self.ready_rules = [compile_rule(rule, frame_key) for rule in spec.ready]
+        self.rep_rules = [compile_rule(rule, rep_key) for rule in spec.rep_rules]
+        self.quality_rules = [compile_rule(rule, rep_key) for rule in spec.quality]
+        self.feedback_rules = [(stage, compile_rule(rule, frame_key) if rule else None, message, level)
+                               for stage, rule, message, level in spec.feedback]
+        self.report = [(name, self.slots.get(name), joint_index.get(name)) for name in spec.report]
+        for name, slot, joint in self.report:
+            if slot is None and joint is None:
+                raise ValueError(f"{spec.name}: unknown quantity {name!r}")
+        self.display = [(label, self.slot(name)) for label, name in spec.display]
+        self.labels = [(prefix, self._label_source(name, joint_index)) for prefix, name in spec.labels]
+
+    def slot(self, name):
+        if name not in self.slots:
+            raise ValueError(f"{self.spec.name}: unknown quantity {name!r}")
+        return self.slots[name]
+
+    def signal_slot(self, name):
+        # Depth, reference and mean signals must be smoothed signals (they own a filter)
+        if name not in self.spec.signals:
+            raise ValueError(f"{self.spec.name}: {name!r} is not a signal")
+        return self.slots[name]
+
+    def _rep_key(self, name):
+        # Rep rules read a dict of the frame quantities plus the rep's own values
+        rep_names = {"rep_time", "angle_change", *self.spec.depth, *self.spec.rep_means}
+        if name not in rep_names:
+            self.slot(name)
+        return name
+
+    def _mean_slots(self, source):
+        kind, a, b = source
+        if kind != "mean":
+            raise ValueError(f"{self.spec.name}: derived values are ('mean', a, b), got {source!r}")
+        return self.slot(a), self.slot(b)
+
+    def _signal_source(self, source, joint_index):
+        spec = self.spec
+        if isinstance(source, str):
+            i = joint_index[source]
+            return lambda angles, coords, leg, unit: angles[i]
+        kind = source[0]
+        if kind == "mean":
+            i, j = joint_index[source[1]], joint_index[source[2]]
+            return lambda angles, coords, leg, unit: (angles[i] + angles[j]) / 2
+        if kind in ("lead", "trail"):
+            if spec.leading_leg is None:
+                raise ValueError(f"{spec.name}: {kind!r} signals need leading_leg")
+            left, right = joint_index[source[1]], joint_index[source[2]]
+            if kind == "trail":
+                left, right = right, left
+            return lambda angles, coords, leg, unit: (
+                angles[left] if leg == "LEFT" else angles[right] if leg == "RIGHT" else 0)
+        if kind == "balance":
+            (left_hip, right_hip), (left_ankle, right_ankle) = source[1], source[2]
+
+            # x coordinates sit at even slots of the flattened pixel coordinates
+            left_hip, right_hip, left_ankle, right_ankle = 2 * left_hip, 2 * right_hip, 2 * left_ankle, 2 * right_ankle
+
+            def balance(angles, coords, leg, unit):
+                if leg == "LEFT":
+                    hip_x, front_x, back_x = coords[left_hip], coords[left_ankle], coords[right_ankle]
+                elif leg == "RIGHT":
+                    hip_x, front_x, back_x = coords[right_hip], coords[right_ankle], coords[left_ankle]
+                else:
+                    return 999  # High offset when the leading leg is unknown
+                if abs(front_x - back_x) < unit:
+                    return abs(hip_x - front_x) / unit  # Ankles overlap: offset from one ankle
+                return abs(hip_x - (front_x + back_x) / 2) / unit
+            return balance
+        raise ValueError(f"{spec.name}: unknown signal source {source!r}")
+
+    def _label_source(self, name, joint_index):
+        # Joint whose raw angle is drawn for a label: a joint, or a leg-dependent signal
+        if name in joint_index:
+            i = joint_index[name]
+            return lambda leg: i
+        source = self.spec.signals[name]
+        left, right = joint_index[source[1]], joint_index[source[2]]
+        if source[0] == "trail":
+            left, right = right, left
+        return lambda leg: left if leg == "LEFT" else right if leg == "RIGHT" else None
+
+    def _compile_checks(self, checks):
+        # Each row becomes |mean(a) - mean(b)| < limit * unit over slots of the flattened
+        # (x0, y0, x1, y1, ...) pixel coordinates; a single landmark is a pair of the
+        # same slot. A couple of rows is cheaper in plain Python than as NumPy ops.
+        self.check_rows = []
+        for rows in checks.values():
+            compiled_rows = []
+            for axis, a, b, limit in rows:
+                offset = {"x": 0, "y": 1}[axis]
+                a = (a, a) if isinstance(a, int) else a
+                b = (b, b) if isinstance(b, int) else b
+                compiled_rows.append((2 * a[0] + offset, 2 * a[1] + offset, 2 * b[0] + offset, 2 * b[1] + offset, limit))
+            self.check_rows.append(tuple(compiled_rows))
+
+    def measure(self, landmarks, width, height):
+        """
+        Per-frame measurements from a (33, 4) landmark array. Returns (points,
+        joint angles, raw signal values, check results, leading leg or None).
+        """
+        points = pixel_points(landmarks, width, height)
+        coords = points.ravel().tolist()
+        # Same formula as kinematics.joint_angles, which costs more in NumPy call
+        # overhead than the few joints of one frame take in plain Python
+        angles = []
+        for a, b, c in self.joint_slots:
+            bx, by = coords[b], coords[b + 1]
+            angle = abs((math.atan2(coords[c + 1] - by, coords[c] - bx)
+                         - math.atan2(coords[a + 1] - by, coords[a] - bx)) * 180.0 / math.pi)
+            angles.append(360 - angle if angle > 180.0 else angle)
+        unit = self.body_unit(coords)
+        checks = [all(abs((coords[a0] + coords[a1]) / 2 - (coords[b0] + coords[b1]) / 2) < limit * unit
+                      for a0, a1, b0, b1, limit in rows)
+                  for rows in self.check_rows]
+        leg = None
+        if self.spec.leading_leg is not None:
+            left, right = self.spec.leading_leg
+            left_x, right_x = coords[2 * left], coords[2 * right]
+            leg = "LEFT" if left_x > right_x else "RIGHT" if right_x > left_x else "N/A"
+        raw = [source(angles, coords, leg, unit) for source in self.signal_sources]
+        return points, angles, raw, checks, leg
+
+    def body_unit(self, coords):
+        """Pixels per body-scale unit: the mean length of the body_scale segments / 100."""
+        if not self.scale_slots:
+            return 1.0
+        total = 0.0
+        for a, b in self.scale_slots:
+            dx, dy = coords[a] - coords[b], coords[a + 1] - coords[b + 1]
+            total += math.sqrt(dx * dx + dy * dy)
+        return max(total / len(self.scale_slots) / 100, MIN_BODY_UNIT)
+
+
+# ============================================
+# COUNTER
+# ============================================
+
+class SpecCounter:
+    """
+    Rep counter for the exercise in `spec` (set by subclasses). Takes camera
+    frames (process_frame) or recorded landmarks (process_landmarks).
+    """
+
+    spec = None
+
+    def __init__(self, pose_graph=True):
+        self.compiled = self.spec.compile()
+        # Time source for rep timing; offline video processing swaps in the video clock
+        self.clock = time.time
+        self.reset_state()
+
+        # Without a pose graph the counter only takes landmarks (process_landmarks),
+        # e.g. for replaying recorded traces
+        if MEDIAPIPE_AVAILABLE:
+            self.setup_mediapipe(pose_graph)
+        else:
+            self.setup_motion_detection()
+
+    def reset_state(self):
+        """
+        Resets the rep count, stage and smoothing filters for a new set. The pose
+        graph is kept; the pipeline's ROI crop and flow keyframe are dropped.
+        """
+        spec, compiled = self.spec, self.compiled
+        # Core state
+        self.counter = 0
+        self.stage = None
+        self.rep_start_time = None
+        self.last_rep_time = 0
+        if spec.leading_leg is not None:
+            self.current_leg = "N/A"  # Detected every frame
+            self.last_leading_leg = None
+            self.last_leg_switch_time = 0
+
+        # Ready state and stage confirmation, in seconds of capture time
+        self.system_ready = False
+        self.stable_time_required = spec.ready_hold
+        self.stable_time = 0.0
+        self.consecutive_down_time = 0.0
+        self.consecutive_up_time = 0.0
+        self.time_in_up_state = 0.0
+        self.up_reference = 180  # Gate angle when the user was last UP (for angle_change)
+
+        # Smoothing filters per signal, and the running min/max of the depth signals
+        self.filters = [angle_smoother(spec.smoothing_window) for _ in compiled.signal_names]
+        self.extrema = {slot: RepExtrema() for slot in compiled.tracked_slots}
+        self.rep_samples = [[] for _ in compiled.mean_slots]
+        self.quantities = [0.0] * len(compiled.names)
+        self.velocity_angles = [None, None]  # Velocity signal on the previous and current frame
+
+        # Frame timing: intervals come from the counter clock (capture timestamps when
+        # the client sends them), so behaviour does not depend on the frame rate
+        self.last_frame_time = None
+        self.nominal_frame_interval = 1 / 30  # Assumed for the first frame only
+        self.max_frame_interval = 0.5  # Longer gaps (paused client) count as this long
+
+        # MediaPipe detection confidence
+        self.min_detection_confidence = spec.detection_confidence
+        self.min_tracking_confidence = spec.detection_confidence
+
+        # Performance metrics
+        self.good_reps = 0
+        self.bad_reps = 0
+        self.avg_speed = 0
+        self.speeds = []
+
+        # UI
+        self.full_screen = False
+        self.window_width = 1200
+        self.window_height = 800
+        self.current_scale = 1.0
+        self.font_scale = 1.0
+        self.text_thickness = 2
+
+        # Latest pose results, for clients that draw the overlay themselves
+        self.last_pose_landmarks = None
+        self.last_angles = {}
+        self.last_feedback = None
+
+        if getattr(self, "detection_mode", None) == "motion":
+            self.background = None
+            self.consecutive_motion_frames = 0
+
+        # The new set starts from the full frame (the pipeline is built after the first reset)
+        if getattr(self, "pose_pipeline", None) is not None:
+            self.pose_pipeline.reset()
+
+    def setup_mediapipe(self, pose_graph=True):
+        """Initializes MediaPipe Pose detection."""
+        self.pose_pipeline = None
+        # Pose graphs and the overlay use the legacy mediapipe.solutions API, which newer
+        # MediaPipe builds no longer ship; counters that only take landmarks do without it
+        solutions = getattr(mp, "solutions", None)
+        if solutions is None and pose_graph:
+            print("⚠️  MediaPipe build without mediapipe.solutions, using motion detection mode")
+            self.setup_motion_detection()
+            return
+        self.mp_pose = solutions.pose if solutions else None
+        self.mp_drawing = solutions.drawing_utils if solutions else None
+        if pose_graph:
+            # Pose runs on a crop around the athlete tracked from the previous frame, at
+            # most MAX_INPUT_DIM pixels on its longest side, and only every
+            # POSE_KEYFRAME_INTERVAL frames (optical flow in between); with
+            # POSE_LATENCY_BUDGET_MS set, model complexity adapts to the measured latency
+            self.pose_pipeline = PosePipeline(
+                self.create_pose_graph,
+                model_complexity=1,
+                roi_enabled=roi_crop_enabled(),
+                controller=ComplexityController.from_env(),
+                release_graph=shared_graph_pool.release,
+                max_input_dim=max_input_dim(),
+                keyframe_interval=keyframe_interval()
+            )
+        self.detection_mode = "mediapipe"
+        print(f"Using MediaPipe Pose Detection - {self.spec.view}")
+
+    def create_pose_graph(self, model_complexity=1):
+        """Checks out a warmed Pose graph with this counter's confidence thresholds, building one if none is idle."""
+        return acquire_pose_graph(model_complexity, self.min_detection_confidence, self.min_tracking_confidence)
+
+    def close(self):
+        """Returns the pose graph to the shared pool."""
+        if getattr(self, "pose_pipeline", None) is not None:
+            self.pose_pipeline.close()
+            self.pose_pipeline = None
+
+    @property
+    def pose(self):
+        """The current Pose graph (replaced when the model complexity changes)."""
+        return self.pose_pipeline.pose
+
+    def setup_motion_detection(self):
+        """Initializes Motion Detection fallback."""
+        self.background = None
+        self.motion_threshold = self.spec.motion_threshold
+        self.last_motion_time = 0
+        self.motion_cooldown = self.spec.motion_cooldown
+        self.consecutive_motion_frames = 0
+        self.motion_frames_required = 3
+        self.detection_mode = "motion"
+        print(f"Using Motion Detection - {self.spec.view}")
+
+    def frame_interval(self):
+        """Reads the clock for this frame. Returns (now, seconds since the previous frame)."""
+        now = self.clock()
+        previous, self.last_frame_time = self.last_frame_time, now
+        if previous is None:
+            return now, self.nominal_frame_interval
+        return now, min(max(now - previous, 0.0), self.max_frame_interval)
+
+    def lose_pose(self, message=None):
+        """Drops out of the ready state (pose lost or unreliable)."""
+        if message:
+            print(message)
+        self.system_ready = False
+        self.stable_time = 0.0
+        self.stage = None
+
+    # --- Frame processing ---
+    def process_mediapipe_frame(self, frame, draw=True):
+        """Processes a single frame using MediaPipe.
+        With draw=False the frame is left untouched (no landmarks or text overlay)."""
+        h, w = frame.shape[:2]
+        results = self.pose_pipeline.process(frame)
+        return self.process_pose(results.pose_landmarks, w, h, frame, draw)
+
+    def process_landmarks(self, landmarks, width, height):
+        """Runs the counting logic on one frame of recorded landmarks, without pose inference.
+        landmarks is a (33, 4) array of normalized x, y, z, visibility, or None for no pose."""
+        self.process_pose(as_pose_landmarks(landmarks), width, height)
+
+    def process_pose(self, pose_landmarks, w, h, frame=None, draw=False):
+        """Rep counting on one frame's pose landmarks (None when no pose was found).
+        The overlay is drawn onto frame only when draw is set."""
+        spec, compiled = self.spec, self.compiled
+        self.last_pose_landmarks = pose_landmarks
+        self.last_angles = {}
+        self.last_feedback = None
+        current_time, dt = self.frame_interval()
+        if draw:
+            self.update_scale_factors(w, h)
+
+        try:
+            if not pose_landmarks:
+                self.lose_pose()
+                if draw:
+                    self.draw_no_pose(frame)
+                return frame
+
+            landmarks = landmark_array(pose_landmarks)
+
+            # All required landmarks must be visible and within the frame, or the
+            # system resets instead of counting on guessed positions
+            if not landmarks_reliable(landmarks, compiled.landmarks, spec.min_visibility):
+                if self.system_ready:
+                    self.lose_pose("⚠️ Landmarks unreliable - resetting system")
+                if draw:
+                    self.draw_unreliable(frame, pose_landmarks)
+                return frame
+
+            points, angles, raw, checks, leg = compiled.measure(landmarks, w, h)
+            if leg is not None:
+                self.current_leg = leg
+
+            # Smoothed signals, derived values, checks and velocity in one flat list
+            q = self.quantities
+            now = self.last_frame_time
+            for i, (smoother, value) in enumerate(zip(self.filters, raw)):
+                q[i] = smoother.update(value, now)
+            for slot, (a, b) in compiled.derived_slots:
+                q[slot] = (q[a] + q[b]) / 2
+            q[compiled.check_slot:compiled.check_slot + len(checks)] = checks
+            for slot, extrema in self.extrema.items():
+                extrema.update(q[slot])
+            self.last_angles = {name: q[slot] if slot is not None else angles[joint]
+                                for name, slot, joint in compiled.report}
+            velocity_angles = self.velocity_angles
+            velocity_angles[0], velocity_angles[1] = velocity_angles[1], q[compiled.source_slot]
+            if velocity_angles[0] is None or dt <= 0:
+                q[compiled.velocity_slot] = 0.0
+            else:
+                q[compiled.velocity_slot] = abs(velocity_angles[1] - velocity_angles[0]) / dt
+
+            # Unrealistic gate angles mean a false detection
+            low, high = spec.angle_range
+            realistic = all(low <= q[slot] <= high for slot in compiled.gate_slots)
+            if not realistic and not spec.angle_range_when_ready:
+                if self.system_ready:
+                    self.lose_pose("⚠️ Unrealistic angles detected - resetting system")
+                if draw:
+                    self.draw_unreliable(frame, pose_landmarks)
+                return frame
+
+            if leg is not None:
+                self.track_leading_leg(leg, current_time)
+            if not self.system_ready:
+                self.update_ready(q, dt)
+            if not realistic and self.system_ready:
+                self.lose_pose("⚠️ Unrealistic angles detected - resetting system")
+                if draw:
+                    self.draw_unreliable(frame, pose_landmarks)
+                return frame
+            if self.system_ready:
+                self.update_stage(q, raw, current_time, dt)
+
+            self.last_feedback = self.form_feedback(q)
+
+            if draw:
+                draw_start = time.perf_counter()
+                self.draw_pose(frame, pose_landmarks, points, angles, leg)
+                self.display_info(frame, q)
+                self.draw_seconds = time.perf_counter() - draw_start
+
+        except Exception as e:
+            print(f"Error processing frame: {e}")
+            if draw:
+                self.display_info(frame, None)
+
+        return frame
+
+    def track_leading_leg(self, leg, current_time):
+        """A leg switch mid-rep abandons the rep (at most once per leg_switch_cooldown)."""
+        if self.last_leading_leg is not None and leg != self.last_leading_leg:
+            if current_time - self.last_leg_switch_time > self.spec.leg_switch_cooldown:
+                if self.stage == "DOWN":
+                    self.stage = "UP"
+                    self.rep_start_time = None
+                self.last_leg_switch_time = current_time
+        self.last_leading_leg = leg
+
+    def update_ready(self, q, dt):
+        """Counts up the time held in the ready pose; counting starts once it is held long enough."""
+        compiled = self.compiled
+        if all(rule(q) for rule in compiled.ready_rules):
+            self.stable_time = min(self.stable_time + dt, self.stable_time_required)
+            if self.stable_time >= self.stable_time_required:
+                self.system_ready = True
+                self.stage = "UP"
+                self.time_in_up_state = self.spec.min_up_time  # Start with the UP timer satisfied
+                if compiled.reference_slot is not None:
+                    self.up_reference = q[compiled.reference_slot]
+                if self.spec.leading_leg is not None:
+                    self.last_leading_leg = self.current_leg
+                print(f"✅ System Ready - Start {self.spec.display_name}!")
+        else:
+            self.stable_time = max(0.0, self.stable_time - self.spec.ready_decay * dt)
+
+    def update_stage(self, q, raw, current_time, dt):
+        """Hysteresis UP/DOWN state machine; a DOWN -> UP transition completes a rep."""
+        spec, compiled = self.spec, self.compiled
+        if compiled.posture_slot is not None and not q[compiled.posture_slot]:
+            # Posture lost: abandon any rep and wait in UP
+            self.stage = "UP"
+            self.consecutive_down_time = 0.0
+            self.consecutive_up_time = 0.0
+            self.rep_start_time = None
+            return
+
+        # Time in UP guards against starting a rep straight after the last one
+        if self.stage == "UP":
+            self.time_in_up_state += dt
+        else:
+            self.time_in_up_state = 0
+
+        bands = spec.bands
+        gates = [q[slot] for slot in compiled.gate_slots]
+        velocity = q[compiled.velocity_slot]
+        if self.stage == "UP" or self.stage is None:
+            # Leaving UP takes a clear drop below the high DOWN band, at speed
+            is_up = all(angle > bands["up_low"] for angle in gates)
+            is_down = (all(angle < bands["down_high"] for angle in gates) and
+                       velocity > spec.min_down_velocity and
+                       self.time_in_up_state >= spec.min_up_time)
+        else:  # DOWN
+            is_up = all(angle > bands["up_high"] for angle in gates)
+            is_down = all(angle < bands["down_low"] for angle in gates)
+
+        # A stage must hold for confirm_time before it is confirmed
+        if is_up:
+            self.consecutive_up_time += dt
+            self.consecutive_down_time = 0.0
+            potential = "UP"
+        elif is_down:
+            self.consecutive_down_time += dt
+            self.consecutive_up_time = 0.0
+            potential = "DOWN"
+        else:
+            # Transition zone - don't change stage immediately
+            self.consecutive_up_time = max(0.0, self.consecutive_up_time - dt)
+            self.consecutive_down_time = max(0.0, self.consecutive_down_time - dt)
+            potential = self.stage
+
+        if potential == "UP" and self.consecutive_up_time >= spec.confirm_time:
+            if self.stage == "DOWN":
+                if self.rep_start_time and (current_time - self.last_rep_time) > spec.min_rep_interval:
+                    self.finish_rep(q, current_time)
+                self.rep_start_time = None
+                self.time_in_up_state = 0
+            elif self.stage != "UP" and compiled.reference_slot is not None:
+                self.up_reference = q[compiled.reference_slot]
+            self.stage = "UP"
+
+        elif potential == "DOWN" and self.consecutive_down_time >= spec.confirm_time:
+            if (self.stage == "UP" and
+                (current_time - self.last_rep_time) > spec.min_rep_interval and
+                self.time_in_up_state >= spec.min_up_time and
+                velocity < spec.max_down_velocity):
+                self.start_rep(q, current_time)
+
+        # Per-rep means sample the raw signal while DOWN
+        if self.stage == "DOWN":
+            for samples, slot in zip(self.rep_samples, compiled.mean_slots):
+                samples.append(raw[slot])
+
+    def start_rep(self, q, current_time):
+        compiled = self.compiled
+        self.rep_start_time = current_time
+        # Depth is measured from here; smoothing restarts so the descent is not averaged with the stand
+        for slot, extrema in self.extrema.items():
+            self.filters[slot].reset()
+            extrema.reset()
+        for samples in self.rep_samples:
+            samples.clear()
+        self.velocity_angles[0] = self.velocity_angles[1] = None
+        if compiled.reference_slot is not None:
+            self.up_reference = q[compiled.reference_slot]
+        leg = f" - {self.current_leg} leg forward" if self.spec.leading_leg is not None else ""
+        print(f"🏋️ Rep #{self.counter + 1}{leg} - Going down...")
+        self.stage = "DOWN"
+
+    def rep_values(self, q, current_time):
+        """Quantities the rep and quality rules are checked against."""
+        spec, compiled = self.spec, self.compiled
+        rep = dict(zip(compiled.names, q))
+        rep["rep_time"] = current_time - self.rep_start_time
+        for group, slots in compiled.depth_slots.items():
+            rep[group] = min(self.extrema[slot].min for slot in slots)
+        if compiled.reference_slot is not None:
+            rep["angle_change"] = self.up_reference - self.extrema[compiled.reference_slot].min
+        for name, samples, slot in zip(spec.rep_means, self.rep_samples, compiled.mean_slots):
+            rep[name] = np.mean(samples) if samples else q[slot]
+        if spec.leading_leg is not None:
+            rep["leg"] = self.current_leg
+        return rep
+
+    def finish_rep(self, q, current_time):
+        spec, compiled = self.spec, self.compiled
+        rep = self.rep_values(q, current_time)
+        detail = spec.rep_detail.format(**rep)
+        min_time, max_time = spec.rep_time
+        counted = min_time < rep["rep_time"] < max_time and all(rule(rep) for rule in compiled.rep_rules)
+        if counted:
+            self.counter += 1
+            self.speeds.append(rep["rep_time"])
+            self.avg_speed = np.mean(self.speeds[-10:])
+            if all(rule(rep) for rule in compiled.quality_rules):
+                self.good_reps += 1
+                print(f"✅ Rep #{self.counter} (Good) - {detail}")
+            else:
+                self.bad_reps += 1
+                print(f"⚠️ Rep #{self.counter} (Bad) - {detail}")
+            if compiled.reference_slot is not None:
+                self.up_reference = q[compiled.reference_slot]
+        else:
+            print(f"⚠️ Rep #{self.counter + 1} ignored - {detail}")
+        if counted or spec.cooldown_after_rejected:
+            self.last_rep_time = current_time
+        for samples in self.rep_samples:
+            samples.clear()
+
+    def form_feedback(self, q):
+        """Form tip for the current frame (once the system is ready), or None."""
+        level = self.feedback_level(q)
+        return level[0] if level else None
+
+    def feedback_level(self, q):
+        if not self.system_ready:
+            return None
+        for stage, rule, message, level in self.compiled.feedback_rules:
+            if (stage is None or stage == self.stage) and (rule is None or rule(q)):
+                return message, level
+        return None
+
+    # --- Responsive UI Functions ---
+    def update_scale_factors(self, frame_width, frame_height):
+        """Adjusts UI scaling based on window size."""
+        base_width = 1280
+        base_height = 720
+        width_scale = frame_width / base_width
+        height_scale = frame_height / base_height
+        self.current_scale = min(width_scale, height_scale, 1.5) # Cap max scale
+        self.font_scale = max(0.5, min(2.0, self.current_scale))
+        self.text_thickness = max(1, int(2 * self.current_scale))
+
+    def get_scaled_font_properties(self):
+        """Returns scaled font sizes and thicknesses."""
+        return {
+            'scale_main': self.font_scale * 1.2,
+            'scale_large': self.font_scale * 0.9,
+            'scale_medium': self.font_scale * 0.7,
+            'scale_small': self.font_scale * 0.5,
+            'thickness_main': max(2, self.text_thickness + 1),
+            'thickness_normal': self.text_thickness,
+            'thickness_small': max(1, self.text_thickness - 1)
+        }
+
+    def draw_no_pose(self, frame):
+        h, w = frame.shape[:2]
+        font_props = self.get_scaled_font_properties()
+        cv2.putText(frame, 'NO POSE DETECTED', (int(w * 0.1), int(h * 0.1)),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_main'], (0, 0, 255), font_props['thickness_main'])
+        cv2.putText(frame, self.spec.no_pose_hint, (int(w * 0.1), int(h * 0.15)),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (255, 255, 255), font_props['thickness_normal'])
+
+    def draw_unreliable(self, frame, pose_landmarks):
+        # Landmarks in red while the pose is not counted
+        if self.mp_drawing:
+            self.mp_drawing.draw_landmarks(
+                frame, pose_landmarks, self.mp_pose.POSE_CONNECTIONS,
+                self.mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=2),
+                self.mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
+            )
+
+    def draw_pose(self, frame, pose_landmarks, points, angles, leg):
+        """Skeleton plus the labelled joint angles."""
+        landmark_radius = max(2, int(3 * self.current_scale))
+        landmark_thickness = max(1, int(2 * self.current_scale))
+        connection_thickness = max(1, int(2 * self.current_scale))
+        if self.mp_drawing:
+            self.mp_drawing.draw_landmarks(
+                frame, pose_landmarks, self.mp_pose.POSE_CONNECTIONS,
+                self.mp_drawing.DrawingSpec(color=(121, 22, 76), thickness=landmark_thickness, circle_radius=landmark_radius),
+                self.mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=connection_thickness, circle_radius=landmark_radius)
+            )
+
+        angle_text_size = max(0.3, 0.5 * self.current_scale)
+        angle_thickness = max(1, self.text_thickness - 1)
+        for prefix, joint_for in self.compiled.labels:
+            joint = joint_for(leg)
+            if joint is None:
+                continue
+            vertex = points[self.compiled.joints[joint][1]]
+            cv2.putText(frame, f'{prefix}{int(angles[joint])}', tuple(vertex.astype(int)),
+                        cv2.FONT_HERSHEY_SIMPLEX, angle_text_size, (255, 255, 0), angle_thickness)
+
+    def display_info(self, frame, q):
+        """Displays the UI elements on the frame (q is None when the frame failed)."""
+        h, w = frame.shape[:2]
+        font_props = self.get_scaled_font_properties()
+        line_height = int(h * 0.05) # Relative line height
+
+        # --- Top Left Info Panel ---
+        info_x = int(w * 0.02)
+        current_y = int(h * 0.08)
+
+        # Counter
+        cv2.putText(frame, f'{self.spec.count_label}: {self.counter}', (info_x, current_y),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_main'], (0, 255, 0), font_props['thickness_main'])
+        current_y += int(line_height * 1.5) # Larger gap after main counter
+
+        # Stage (and leading leg)
+        cv2.putText(frame, f'STAGE: {self.stage}', (info_x, current_y),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_large'], (255, 255, 255), font_props['thickness_normal'])
+        current_y += line_height
+        if self.spec.leading_leg is not None:
+            cv2.putText(frame, f'LEADING: {self.current_leg}', (info_x, current_y),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (255, 255, 255), font_props['thickness_normal'])
+            current_y += line_height
+
+        # Angles and other measurements
+        for label, slot in self.compiled.display if q is not None else ():
+            if q[slot] > 0:
+                cv2.putText(frame, f'{label}: {int(q[slot])}', (info_x, current_y),
+                            cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (255, 255, 255), font_props['thickness_normal'])
+                current_y += line_height
+
+        # Average Speed
+        if self.avg_speed > 0:
+            cv2.putText(frame, f'AVG SPEED: {self.avg_speed:.2f}s', (info_x, current_y),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (255, 255, 0), font_props['thickness_normal'])
+            current_y += line_height
+
+        # --- System Ready Status ---
+        if not self.system_ready:
+            cv2.putText(frame, self.spec.ready_prompt, (info_x, current_y),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (0, 0, 255), font_props['thickness_normal'])
+            stability_percent = (self.stable_time / self.stable_time_required) * 100
+            cv2.putText(frame, f'Stabilizing: {int(stability_percent)}%', (info_x, current_y + int(line_height * 0.8)),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_small'], (0, 165, 255), font_props['thickness_small'])
+        else:
+            cv2.putText(frame, 'READY', (info_x, current_y),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (0, 255, 0), font_props['thickness_normal'])
+
+        # --- Top Right Info Panel ---
+        status_x = int(w * 0.65)
+        status_y = int(h * 0.05)
+        cv2.putText(frame, self.spec.title, (status_x, status_y),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (0, 255, 255), font_props['thickness_normal'])
+
+        # Form Feedback
+        feedback = self.feedback_level(q) if q is not None else None
+        if feedback:
+            message, level = feedback
+            cv2.putText(frame, message, (status_x, status_y + line_height),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_small'], FEEDBACK_COLORS[level], font_props['thickness_small'])
+
+    def process_motion_frame(self, frame, draw=True):
+        """Processes a single frame using simple Motion Detection."""
+        h, w = frame.shape[:2]
+        self.update_scale_factors(w, h)
+        font_props = self.get_scaled_font_properties()
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        blur = cv2.GaussianBlur(gray, (21, 21), 0)
+
+        if self.background is None:
+            self.background = blur
+            print("Initializing background for motion detection...")
+            return frame
+
+        frame_delta = cv2.absdiff(self.background, blur)
+        thresh = cv2.threshold(frame_delta, 25, 255, cv2.THRESH_BINARY)[1]
+        thresh = cv2.dilate(thresh, None, iterations=2)
+        motion_pixels = cv2.countNonZero(thresh)
+
+        self.background = cv2.addWeighted(self.background, 0.95, blur, 0.05, 0)
+        current_time = self.clock()
+
+        if motion_pixels > self.motion_threshold:
+            self.consecutive_motion_frames += 1
+        else:
+            self.consecutive_motion_frames = 0
+
+        if (self.consecutive_motion_frames >= self.motion_frames_required and
+            current_time - self.last_motion_time > self.motion_cooldown):
+            self.counter += 1
+            self.last_motion_time = current_time
+            print(f"{self.spec.display_name} #{self.counter} (Motion Detected)")
+            self.consecutive_motion_frames = 0
+
+        if not draw:
+            return frame
+
+        # Display minimal UI for motion mode
+        info_x = int(w * 0.02)
+        info_y_start = int(h * 0.08)
+        line_height = int(h * 0.06)
+        cv2.putText(frame, f'{self.spec.count_label}: {self.counter}', (info_x, info_y_start),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_main'], (0, 255, 0), font_props['thickness_main'])
+        cv2.putText(frame, f'Motion: {motion_pixels}', (info_x, info_y_start + line_height),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_large'], (255, 255, 255), font_props['thickness_normal'])
+        cv2.putText(frame, 'MOTION DETECTION MODE', (info_x, info_y_start + 2*line_height),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (0, 165, 255), font_props['thickness_normal'])
+
+        return frame
+
+    def process_frame(self, frame, draw=True):
+        """Routes frame processing based on detection mode."""
+        # Time spent drawing the overlay, for per-stage latency metrics
+        self.draw_seconds = 0.0
+        if self.detection_mode == "mediapipe":
+            return self.process_mediapipe_frame(frame, draw)
+        return self.process_motion_frame(frame, draw)
+
+    # --- Desktop webcam loop ---
+    def toggle_fullscreen(self, window_name):
+        """Toggles the display window between fullscreen and normal."""
+        self.full_screen = not self.full_screen
+        if self.full_screen:
+            cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+            print("🖥️ Fullscreen mode enabled")
+        else:
+            cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(window_name, self.window_width, self.window_height) # Resize back
+            print("🖥️ Windowed mode enabled")
+
+    def handle_window_resize(self, window_name):
+        """Updates internal window dimensions if the window is resized."""
+        try:
+            rect = cv2.getWindowImageRect(window_name)
+            current_width = rect[2]
+            current_height = rect[3]
+            if current_width > 0 and current_height > 0:
+                if abs(current_width - self.window_width) > 1 or abs(current_height - self.window_height) > 1:
+                    self.window_width = current_width
+                    self.window_height = current_height
+                    return True
+        except cv2.error:
+            # Can happen if window is closed during check
+            pass
+        return False
+
+    def run(self):
+        """Starts the camera capture and processing loop."""
+        spec = self.spec
+        cap = cv2.VideoCapture(0)
+        if not cap.isOpened():
+            print("❌ Error: Could not open camera.")
+            return
+
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+
+        window_name = f'{spec.title.title()} - Resize Window | F: Fullscreen'
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(window_name, self.window_width, self.window_height)
+
+        print("\n" + "=" * 70)
+        print(f"🎯 {spec.title}")
+        print("=" * 70)
+        print(f"POSITION: {spec.no_pose_hint}. Show full body and hold still to begin.")
+        print("\n✅ SETTINGS:")
+        print(f"   - Ready Hold: {spec.ready_hold:.2f}s")
+        print(f"   - UP Angle > {spec.bands['up_high']}° | DOWN Angle < {spec.bands['down_low']}°")
+        print(f"   - Stage Confirm: {spec.confirm_time:.2f}s")
+        print(f"   - Smoothing Window: {spec.smoothing_window:.2f}s")
+        print("\n🎮 CONTROLS:")
+        print("   - 'q': Quit")
+        print("   - 'r': Reset Counter")
+        print("   - 'f': Toggle Fullscreen")
+        print("   - 's': Save Stats (Print Summary)")
+        print("   - Drag window edges to resize")
+        print("=" * 70 + "\n")
+
+        start_time = time.time()
+        frame_count = 0
+        last_resize_check = time.time()
+        key = None
+
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    print("❌ Error: Could not read frame.")
+                    break
+
+                frame_count += 1
+                frame = cv2.flip(frame, 1) # Mirror view
+
+                # Check for window resize periodically
+                if time.time() - last_resize_check > 0.5:
+                    self.handle_window_resize(window_name)
+                    last_resize_check = time.time()
+
+                processed_frame = self.process_frame(frame)
+
+                # --- Draw FPS and Instructions (Always Visible) ---
+                h, w = processed_frame.shape[:2]
+                font_props = self.get_scaled_font_properties()
+                fps = frame_count / (time.time() - start_time)
+                cv2.putText(processed_frame, f'FPS: {fps:.1f}',
+                            (w - int(w * 0.15), int(h * 0.05)),
+                            cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_medium'], (255, 255, 255), font_props['thickness_normal'])
+                cv2.putText(processed_frame, 'Q:Quit R:Reset F:Full S:Save',
+                            (int(w * 0.02), h - int(h * 0.03)),
+                            cv2.FONT_HERSHEY_SIMPLEX, font_props['scale_small'], (255, 255, 255), font_props['thickness_small'])
+
+                cv2.imshow(window_name, processed_frame)
+
+                # --- Handle Keyboard Input ---
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    print("Quitting...")
+                    break
+                elif key == ord('r'):
+                    print("🔄 Counter reset! Get back into position.")
+                    self.reset_state()
+                    start_time = time.time()
+                    frame_count = 0
+                elif key == ord('f'):
+                    self.toggle_fullscreen(window_name)
+                elif key == ord('s'):
+                    print("\n💾 Saving Workout Stats (Printing to Console)...")
+                    self.print_summary(time.time() - start_time, frame_count)
+
+        except Exception as e:
+            print(f"❌ An error occurred during execution: {e}")
+        finally:
+            cap.release()
+            cv2.destroyAllWindows()
+            print("\nCamera released and windows closed.")
+            if key == ord('q'):
+                self.print_summary(time.time() - start_time, frame_count)
+
+    def print_summary(self, total_time, total_frames):
+        """Prints the workout summary to the console."""
+        print("\n" + "=" * 70)
+        print(f"🎉 {self.spec.count_label} WORKOUT SUMMARY")
+        print("=" * 70)
+        print(f"⏱️  Total time: {total_time:.1f}s")
+        print(f"🏆 Total {self.spec.display_name.lower()}: {self.counter}")
+        if self.counter > 0:
+            print(f"✅ Good form reps: {self.good_reps}")
+            print(f"⚠️  Improvable reps: {self.bad_reps}")
+            accuracy = (self.good_reps / self.counter) * 100
+            print(f"🎯 Good form rate: {accuracy:.1f}%")
+            if self.avg_speed > 0:
+                print(f"⚡ Average speed: {self.avg_speed:.2f}s per rep")
+        print(f"📈 Total frames processed: {total_frames}")
+        print("=" * 70 + "\n")
@@ -0,0 +1,90 @@
+"""
+Exercise detection from pose landmarks, for counting without the client naming
+the exercise (workout_type "auto", counters/auto_counter.py).
+
+Each frame is labelled from body geometry, following the camera views the
+counters are built for:
+  - torso closer to horizontal than vertical (a plank)   -> pushups
+  - upright, shoulders narrow next to the torso (side-on) -> lunges
+  - upright, facing the camera                            -> squats
+Labels are accumulated as decaying evidence in seconds of capture time, so one
+odd frame (a stumble, a mis-detected pose) does not switch the exercise.
+"""
+
+import math
+
+from counters import EXERCISES
+from counters.kinematics import LEFT_HIP, LEFT_SHOULDER, RIGHT_HIP, RIGHT_SHOULDER
+
+TORSO_LANDMARKS = (LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP)
+
+
+class ExerciseClassifier:
+    """Rule-based exercise detection with temporal hysteresis."""
+
+    def __init__(self, exercises=EXERCISES, min_visibility=0.5, plank_uprightness=0.5, side_view_width=0.45,
+                 memory=2.0, detect_time=0.6, switch_margin=2.0):
+        self.exercises = tuple(exercises)
+        self.min_visibility = min_visibility
+        self.plank_uprightness = plank_uprightness  # Vertical share of the torso below this is a plank
+        self.side_view_width = side_view_width  # Shoulder width / torso length below this is side-on
+        self.memory = memory  # Seconds for evidence to decay to 1/e
+        self.detect_time = detect_time  # Seconds of evidence before the first exercise is picked
+        self.switch_margin = switch_margin  # A new exercise needs this many times the current one's evidence
+        self.reset()
+
+    def reset(self):
+        self.exercise = None
+        self.label = None  # Label of the latest frame
+        self.evidence = {exercise: 0.0 for exercise in self.exercises}
+
+    def frame_label(self, landmarks, width, height):
+        """The exercise one frame of landmarks ((33, 4) normalized array) looks like, or None if unclear."""
+        for index in TORSO_LANDMARKS:
+            # NaN (no pose in a recorded trace) fails every comparison, so check it explicitly
+            if not all(math.isfinite(value) for value in landmarks[index]) or landmarks[index][3] < self.min_visibility:
+                return None
+        ls_x, ls_y = landmarks[LEFT_SHOULDER][0] * width, landmarks[LEFT_SHOULDER][1] * height
+        rs_x, rs_y = landmarks[RIGHT_SHOULDER][0] * width, landmarks[RIGHT_SHOULDER][1] * height
+        lh_x, lh_y = landmarks[LEFT_HIP][0] * width, landmarks[LEFT_HIP][1] * height
+        rh_x, rh_y = landmarks[RIGHT_HIP][0] * width, landmarks[RIGHT_HIP][1] * height
+        torso_x = (ls_x + rs_x - lh_x - rh_x) / 2
+        torso_y = (ls_y + rs_y - lh_y - rh_y) / 2
+        torso_length = math.hypot(torso_x, torso_y)
+        shoulder_width = abs(ls_x - rs_x)
+        scale = max(torso_length, shoulder_width)
+        if scale < 1:
+            return None
+
+        # Side-on the torso itself is horizontal; head-on the shoulders and hips line up across it
+        if abs(torso_y) / scale < self.plank_uprightness:
+            label = "pushups"
+        elif shoulder_width / torso_length < self.side_view_width:
+            label = "lunges"
+        else:
+            label = "squats"
+        return label if label in self.evidence else None
+
+    def update(self, landmarks, width, height, dt):
+        """
+        Adds one frame (landmarks None for no pose) lasting dt seconds. Returns
+        the detected exercise: None until one has held detect_time seconds of
+        evidence, then the current one until another clearly outweighs it.
+        """
+        decay = math.exp(-dt / self.memory)
+        evidence = self.evidence
+        for exercise in evidence:
+            evidence[exercise] *= decay
+        label = self.label = self.frame_label(landmarks, width, height) if landmarks is not None else None
+        if label is not None:
+            evidence[label] += dt
+
+        best = max(evidence, key=evidence.get)
+        if best != self.exercise and evidence[best] >= self.detect_time:
+            if self.exercise is None or evidence[best] > self.switch_margin * evidence[self.exercise]:
+                return best
+        return self.exercise
+
+    def confirm(self, exercise):
+        """Records the exercise the caller switched to (it may hold off, e.g. mid-rep)."""
+        self.exercise = exercise
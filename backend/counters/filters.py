@@ -0,0 +1,147 @@
+"""
+Smoothing filters for the counters' joint-angle signals.
+
+Every filter is O(1) per frame on storage allocated up front, so smoothing a
+frame never builds a list or array:
+  RunningMean   - mean over the last N seconds of frames: a ring buffer of
+                  (time, value) slots with a running sum
+  OneEuroFilter - adaptive low-pass (Casiez et al., 2012): smooth when the
+                  joint is still, responsive when it moves fast
+  RepExtrema    - running min/max since the last reset, e.g. the deepest
+                  angle reached during the current rep
+
+Windows and cutoffs are defined in seconds of capture time rather than in
+frames, so a client sending 8 FPS gets the same smoothing as one sending 30.
+ANGLE_FILTER=one_euro switches the counters from the running mean to the
+One-Euro filter (tuned with ONE_EURO_MIN_CUTOFF and ONE_EURO_BETA).
+"""
+
+import math
+import os
+from array import array
+
+
+class RunningMean:
+    """
+    Mean of the values seen in the last `seconds` of frames (by capture
+    timestamp). capacity bounds the window if timestamps stop advancing.
+    """
+
+    def __init__(self, seconds, capacity=120):
+        self.seconds = seconds
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self.reset()
+
+    def reset(self):
+        self._start = 0  # Slot of the oldest value
+        self._count = 0
+        self._sum = 0.0
+
+    def update(self, value, now):
+        """Adds a value captured at `now` and returns the mean over the window."""
+        if self._count == self.capacity:
+            self._evict()
+        end = (self._start + self._count) % self.capacity
+        self._times[end] = now
+        self._values[end] = value
+        self._count += 1
+        self._sum += value
+        cutoff = now - self.seconds
+        while self._times[self._start] < cutoff:
+            self._evict()
+        return self._sum / self._count
+
+    def _evict(self):
+        self._sum -= self._values[self._start]
+        self._start = (self._start + 1) % self.capacity
+        self._count -= 1
+
+    def __len__(self):
+        return self._count
+
+
+class OneEuroFilter:
+    """
+    One-Euro filter on a timestamped signal. min_cutoff (Hz) sets the smoothing
+    at rest; beta raises the cutoff with speed (units of the signal per second)
+    to cut lag during fast movement.
+    """
+
+    def __init__(self, min_cutoff=1.5, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._value = None
+        self._speed = 0.0
+        self._last_time = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        r = 2 * math.pi * cutoff * dt
+        return r / (r + 1)
+
+    def update(self, value, now):
+        """Adds a value captured at `now` and returns the filtered value."""
+        if self._value is None:
+            self._value, self._last_time = value, now
+            return value
+        dt = now - self._last_time
+        if dt <= 0:
+            return self._value
+        self._last_time = now
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._speed = a_d * (value - self._value) / dt + (1 - a_d) * self._speed
+        a = self._alpha(self.min_cutoff + self.beta * abs(self._speed), dt)
+        self._value = a * value + (1 - a) * self._value
+        return self._value
+
+    def __len__(self):
+        return 0 if self._value is None else 1
+
+
+class RepExtrema:
+    """Running minimum and maximum of a signal since the last reset."""
+
+    __slots__ = ("min", "max")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value):
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def __bool__(self):
+        return self.min <= self.max
+
+
+def one_euro_settings():
+    """OneEuroFilter keyword arguments if ANGLE_FILTER=one_euro, else None."""
+    if os.getenv("ANGLE_FILTER", "mean").lower() != "one_euro":
+        return None
+    return {
+        "min_cutoff": float(os.getenv("ONE_EURO_MIN_CUTOFF", "1.5")),
+        "beta": float(os.getenv("ONE_EURO_BETA", "0.01")),
+    }
+
+
+def angle_smoother(window_seconds):
+    """
+    The configured joint-angle smoother: a RunningMean over window_seconds, or
+    a OneEuroFilter with ANGLE_FILTER=one_euro.
+    """
+    settings = one_euro_settings()
+    if settings is not None:
+        return OneEuroFilter(**settings)
+    return RunningMean(window_seconds)
@@ -0,0 +1,128 @@
+"""
+Keypoint propagation between pose inferences.
+
+With POSE_KEYFRAME_INTERVAL=N, PosePipeline runs MediaPipe on one frame in N
+(a keyframe) and moves the keyframe's landmarks along with the image on the
+frames in between, using sparse pyramidal Lucas-Kanade optical flow on the
+33 landmark positions. Tracking 33 points costs a small fraction of an
+inference, so at high client frame rates most frames skip the pose graph.
+
+Propagation gives up, and the pipeline runs full inference on that frame,
+when any landmark that was visible on the keyframe is lost or fails the
+forward-backward check (tracked forward and back it does not return to where
+it started), or when any visible landmark moved more than max_motion of the
+body's size since the previous frame; fast limbs are where flow drifts and
+where counting needs fresh landmarks most. Occluded landmarks lose their
+texture, so they fail the check and also hand over to inference. Propagated
+landmarks keep the keyframe's z and visibility.
+"""
+
+import copy
+import os
+
+import cv2
+import numpy as np
+
+
+def keyframe_interval():
+    """Frames per pose inference, from POSE_KEYFRAME_INTERVAL (default 1: every frame)."""
+    return max(1, int(os.getenv("POSE_KEYFRAME_INTERVAL", "1")))
+
+
+class KeypointFlow:
+    """Propagates pose landmarks from a keyframe across up to interval - 1 frames."""
+
+    def __init__(self, interval, min_visibility=0.5, max_error=1.5, max_motion=0.08, max_dim=None,
+                 win_size=21, max_level=3):
+        self.interval = interval
+        self.min_visibility = min_visibility
+        self.max_error = max_error  # Forward-backward error allowed, pixels of the tracking image
+        self.max_motion = max_motion  # Landmark motion per frame allowed, fraction of body size
+        self.max_dim = max_dim  # Tracking image longest side (None: frame size)
+        self.lk_params = dict(
+            winSize=(win_size, win_size),
+            maxLevel=max_level,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+        )
+        self.propagated_frames = 0
+        self.flow_lost = 0
+        self.large_motion = 0
+        self.reset()
+
+    def reset(self):
+        self.keyframe = None  # Pose landmarks of the last inference
+        self.previous_gray = None
+        self.points = None  # (33, 1, 2) float32 landmark positions in the tracking image
+        self.visible = None  # Landmarks that must keep tracking
+        self.body_size = 0.0
+        self.since_keyframe = 0
+
+    def _tracking_image(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.max_dim:
+            h, w = gray.shape
+            scale = self.max_dim / max(h, w)
+            if scale < 1.0:
+                gray = cv2.resize(gray, (max(1, round(w * scale)), max(1, round(h * scale))),
+                                  interpolation=cv2.INTER_AREA)
+        return gray
+
+    def start(self, frame, pose_landmarks):
+        """Takes the landmarks inferred on frame (None for no pose) as the new keyframe."""
+        if not pose_landmarks:
+            self.reset()
+            return
+        gray = self._tracking_image(frame)
+        h, w = gray.shape
+        landmarks = np.array([(lm.x, lm.y, lm.visibility) for lm in pose_landmarks.landmark], dtype=np.float32)
+        self.keyframe = pose_landmarks
+        self.previous_gray = gray
+        self.points = (landmarks[:, :2] * np.float32((w, h))).reshape(-1, 1, 2)
+        self.visible = landmarks[:, 2] >= self.min_visibility
+        if self.visible.sum() < 4:
+            self.reset()
+            return
+        visible_points = self.points[self.visible, 0]
+        self.body_size = float(np.linalg.norm(visible_points.max(axis=0) - visible_points.min(axis=0)))
+        self.since_keyframe = 0
+
+    def propagate(self, frame):
+        """Landmarks for frame moved along the optical flow, or None when inference is due."""
+        if self.keyframe is None or self.since_keyframe >= self.interval - 1:
+            return None
+        gray = self._tracking_image(frame)
+        if gray.shape != self.previous_gray.shape:
+            return None
+        points = self.points
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self.previous_gray, gray, points, None, **self.lk_params)
+        returned, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.previous_gray, moved, None, **self.lk_params)
+        error = np.linalg.norm((returned - points)[:, 0], axis=1)
+        tracked = (status[:, 0] == 1) & (back_status[:, 0] == 1) & (error < self.max_error)
+        if not tracked[self.visible].all():
+            self.flow_lost += 1
+            return None
+        motion = float(np.linalg.norm((moved - points)[self.visible, 0], axis=1).max())
+        if motion > self.max_motion * self.body_size:
+            self.large_motion += 1
+            return None
+
+        # Landmarks that were not visible on the keyframe stay put unless they tracked
+        self.points = np.where(tracked[:, None, None], moved, points)
+        self.previous_gray = gray
+        self.since_keyframe += 1
+        self.propagated_frames += 1
+
+        h, w = gray.shape
+        propagated = copy.deepcopy(self.keyframe)
+        for landmark, (x, y) in zip(propagated.landmark, self.points[:, 0].tolist()):
+            landmark.x = x / w
+            landmark.y = y / h
+        return propagated
+
+    def stats(self):
+        return {
+            "keyframe_interval": self.interval,
+            "propagated_frames": self.propagated_frames,
+            "flow_lost": self.flow_lost,
+            "large_motion": self.large_motion,
+        }
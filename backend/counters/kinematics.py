@@ -0,0 +1,64 @@
+"""
+Joint kinematics for the counters, vectorized over the pose landmarks.
+
+A frame's pose is converted once into a (33, 4) array (normalized x, y, z,
+visibility); the reliability check, pixel coordinates and every joint angle a
+counter needs are then single NumPy operations on that array instead of one
+attribute lookup and small array allocation per landmark and angle.
+"""
+
+import numpy as np
+
+from counters.landmark_trace import landmarks_to_array
+
+# MediaPipe Pose landmark indices used by the counters
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+
+def landmark_array(pose_landmarks):
+    """Pose landmarks -> (33, 4) float64 array of normalized x, y, z, visibility."""
+    return landmarks_to_array(pose_landmarks).astype(np.float64)
+
+
+def landmarks_reliable(landmarks, indices, min_visibility, margin=0.2):
+    """
+    True when every landmark in indices has at least min_visibility and lies
+    within the frame, give or take margin (normalized units).
+    """
+    selected = landmarks[indices]
+    xy = selected[:, :2]
+    return bool((selected[:, 3] >= min_visibility).all() and ((xy >= -margin) & (xy <= 1 + margin)).all())
+
+
+def batch_landmarks_reliable(landmarks, indices, min_visibility, margin=0.2):
+    """
+    landmarks_reliable for an (n, 33, 4) stack of poses. Returns an (n,) bool
+    array. Values are compared as float64 whatever the input dtype, so float32
+    client payloads give the same result as landmark_array.
+    """
+    selected = landmarks[:, indices].astype(np.float64)
+    xy = selected[..., :2]
+    return (selected[..., 3] >= min_visibility).all(axis=1) & ((xy >= -margin) & (xy <= 1 + margin)).all(axis=(1, 2))
+
+
+def pixel_points(landmarks, width, height):
+    """(33, 2) landmark positions in pixels."""
+    return landmarks[:, :2] * (width, height)
+
+
+def joint_angles(points, joints):
+    """
+    Angle in degrees (0-180) at b for each (a, b, c) row of landmark indices in
+    joints, from (33, 2) points. Returns an array with one angle per row; an
+    (n, 33, 2) stack of poses gives an (n, rows) array.
+    """
+    a, b, c = points[..., joints[:, 0], :], points[..., joints[:, 1], :], points[..., joints[:, 2], :]
+    radians = (np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+               - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    angles = np.abs(radians * 180.0 / np.pi)
+    return np.where(angles > 180.0, 360 - angles, angles)
@@ -0,0 +1,210 @@
+"""
+Landmark traces: recorded per-frame pose landmarks with timestamps.
+
+A trace is the output of pose inference for a clip, stored compactly so the
+counting logic can be replayed without MediaPipe: landmarks as a float32 array
+of shape (frames, 33, 4) holding normalized x, y, z and visibility (NaN rows for
+frames where no pose was found), timestamps in seconds, and the frame size, in
+one compressed .npz (about 0.5 KB per frame before compression).
+
+Replay drives a counter's process_landmarks with the counter clock set to the
+trace timestamps, so rep timings and the ready/stability logic behave as they
+did live. Counters built with pose_graph=False never load a pose graph.
+
+Usage:
+  python -m counters.landmark_trace record workout.mp4 --exercise squats -o squats.npz
+  python -m counters.landmark_trace replay squats.npz
+"""
+
+import argparse
+
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+
+class _Landmark:
+    __slots__ = ("x", "y", "z", "visibility")
+
+    def __init__(self, x, y, z, visibility):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+
+class PoseLandmarks:
+    """
+    Array-backed stand-in for MediaPipe's NormalizedLandmarkList. The counters
+    read .array directly; .landmark[i].x/y/z/visibility is built on first use
+    (drawing, serialization).
+    """
+
+    __slots__ = ("array", "_landmark")
+
+    def __init__(self, array):
+        self.array = array
+        self._landmark = None
+
+    @property
+    def landmark(self):
+        if self._landmark is None:
+            self._landmark = [_Landmark(*row) for row in self.array.tolist()]
+        return self._landmark
+
+
+def as_pose_landmarks(landmarks):
+    """Wraps a (33, 4) array as pose landmarks. None, or a row of NaNs, means no pose."""
+    if landmarks is None:
+        return None
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    if np.isnan(landmarks[0, 0]):
+        return None
+    return PoseLandmarks(landmarks)
+
+
+def landmarks_to_array(pose_landmarks):
+    """MediaPipe pose landmarks (or None) -> (33, 4) float32 array, NaN when there is no pose."""
+    if pose_landmarks is None:
+        return np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+    if isinstance(pose_landmarks, PoseLandmarks):
+        return pose_landmarks.array
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark], dtype=np.float32)
+
+
+class LandmarkTrace:
+    """Landmarks (N, 33, 4) float32, timestamps (N,) seconds, frame size and exercise."""
+
+    def __init__(self, landmarks, timestamps, frame_size, exercise=None):
+        self.landmarks = landmarks
+        self.timestamps = timestamps
+        self.frame_size = tuple(int(v) for v in frame_size)
+        self.exercise = exercise
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) else 0.0
+
+
+class TraceRecorder:
+    """Collects one frame of landmarks at a time, e.g. from counter.last_pose_landmarks after each frame."""
+
+    def __init__(self, frame_size, exercise=None):
+        self.frame_size = frame_size
+        self.exercise = exercise
+        self._landmarks = []
+        self._timestamps = []
+
+    def add(self, pose_landmarks, timestamp):
+        self._landmarks.append(landmarks_to_array(pose_landmarks))
+        self._timestamps.append(timestamp)
+
+    def trace(self):
+        landmarks = np.stack(self._landmarks) if self._landmarks else np.empty((0, NUM_LANDMARKS, 4), np.float32)
+        return LandmarkTrace(landmarks, np.array(self._timestamps, dtype=np.float64), self.frame_size, self.exercise)
+
+
+def save_trace(path, trace):
+    np.savez_compressed(
+        path,
+        landmarks=trace.landmarks.astype(np.float32, copy=False),
+        timestamps=trace.timestamps.astype(np.float64, copy=False),
+        frame_size=np.array(trace.frame_size, dtype=np.int32),
+        exercise=np.array(trace.exercise or ""),
+    )
+
+
+def load_trace(path):
+    with np.load(path) as data:
+        return LandmarkTrace(
+            data["landmarks"],
+            data["timestamps"],
+            tuple(data["frame_size"].tolist()),
+            str(data["exercise"]) or None,
+        )
+
+
+def replay(counter, trace):
+    """Feeds a trace through a counter's rep logic on the trace's clock. Returns the counter."""
+    width, height = trace.frame_size
+    current_time = [0.0]
+    counter.clock = lambda: current_time[0]
+    for landmarks, timestamp in zip(trace.landmarks, trace.timestamps):
+        current_time[0] = float(timestamp)
+        counter.process_landmarks(landmarks, width, height)
+    return counter
+
+
+def record_video(path, counter, max_dim=None):
+    """Runs a video through a counter with pose inference and records its landmarks."""
+    import cv2
+
+    from frame_encoding import resize_to_max_dim
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    recorder = None
+    index = 0
+    current_time = [0.0]
+    counter.clock = lambda: current_time[0]
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frame = resize_to_max_dim(frame, max_dim)
+            if recorder is None:
+                h, w = frame.shape[:2]
+                recorder = TraceRecorder((w, h))
+            current_time[0] = index / fps
+            counter.process_frame(frame, draw=False)
+            recorder.add(counter.last_pose_landmarks, current_time[0])
+            index += 1
+    finally:
+        capture.release()
+    if recorder is None:
+        raise ValueError(f"No frames decoded from {path}")
+    return recorder.trace()
+
+
+def main():
+    from counters import EXERCISES, load_counter_class
+
+    parser = argparse.ArgumentParser(description="Record or replay landmark traces")
+    sub = parser.add_subparsers(dest="command", required=True)
+    record_parser = sub.add_parser("record", help="Run pose on a video and save its landmarks")
+    record_parser.add_argument("video")
+    record_parser.add_argument("--exercise", required=True, choices=EXERCISES)
+    record_parser.add_argument("--max-dim", type=int, default=640)
+    record_parser.add_argument("-o", "--output", required=True)
+    replay_parser = sub.add_parser("replay", help="Count reps in a trace without pose inference")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--exercise", choices=EXERCISES, help="Defaults to the exercise recorded in the trace")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        counter = load_counter_class(args.exercise)()
+        try:
+            trace = record_video(args.video, counter, args.max_dim)
+        finally:
+            counter.close()
+        trace.exercise = args.exercise
+        save_trace(args.output, trace)
+        print(f"Recorded {len(trace)} frames ({trace.duration:.1f} s, {counter.counter} reps live) to {args.output}")
+    else:
+        trace = load_trace(args.trace)
+        exercise = args.exercise or trace.exercise
+        if not exercise:
+            parser.error("trace has no exercise recorded; pass --exercise")
+        counter = replay(load_counter_class(exercise)(pose_graph=False), trace)
+        print(f"{exercise}: {counter.counter} reps ({counter.good_reps} good, {counter.bad_reps} bad) "
+              f"in {len(trace)} frames")
+
+
+if __name__ == "__main__":
+    main()
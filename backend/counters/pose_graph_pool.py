@@ -0,0 +1,119 @@
+"""
+Process-wide pool of warmed MediaPipe Pose graphs.
+
+Building a Pose graph loads and initializes the model, which costs far more than
+the counting state it serves. Counters therefore check graphs out of this pool
+and hand them back when they are closed (session evicted, video job finished,
+model complexity switched), so a new session or a new set reuses a graph that
+has already run inference instead of loading another one.
+
+Graphs are keyed by their configuration (model complexity and confidence
+thresholds), since counters for different exercises use different thresholds.
+
+A graph in video mode carries state between frames: the region it tracks the
+body in and its landmark smoothing. A reused graph first runs one blank frame;
+finding no pose drops both, so the next session starts with a fresh detection
+instead of smoothing towards the previous user. This happens on acquire rather
+than on release, because counters are released while sessions are evicted and
+acquired while a new counter is built, which is already the slow path.
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+BLANK_FRAME = np.zeros((256, 256, 3), dtype=np.uint8)
+
+
+class PoseGraphPool:
+    """Idle Pose graphs per configuration, up to max_idle of each."""
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.closed = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_idle=int(os.getenv("POSE_GRAPH_POOL_SIZE", "4")))
+
+    def acquire(self, key, build):
+        """
+        Returns an idle graph for key with its tracking state cleared, or build() a
+        new one. The graph is tagged with its key.
+        """
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                graph = idle.pop() if idle else None
+                if graph is None:
+                    self.created += 1
+                    break
+            if not graph._pool_dirty:
+                break
+            try:
+                graph.process(BLANK_FRAME)
+                break
+            except Exception as e:
+                print(f"Error resetting pose graph: {e}")
+                with self._lock:
+                    self.closed += 1
+                graph.close()
+        if graph is None:
+            graph = build()
+            graph._pool_key = key
+        else:
+            with self._lock:
+                self.reused += 1
+        graph._pool_dirty = False
+        return graph
+
+    def release(self, graph, dirty=True):
+        """
+        Returns a graph to the pool, or closes it if the pool for its key is full.
+        A dirty graph (one that has seen a session's frames) is cleared on its next
+        acquire.
+        """
+        key = getattr(graph, "_pool_key", None)
+        with self._lock:
+            if key is not None and len(self._idle[key]) < self.max_idle:
+                graph._pool_dirty = dirty
+                self._idle[key].append(graph)
+                return
+            self.closed += 1
+        graph.close()
+
+    def prewarm(self, key, build, count=1):
+        """Builds graphs for key, runs their first inference and parks them idle."""
+        start = time.time()
+        graphs = [self.acquire(key, build) for _ in range(count)]
+        for graph in graphs:
+            graph.process(BLANK_FRAME)
+            self.release(graph, dirty=False)
+        return time.time() - start
+
+    def stats(self):
+        with self._lock:
+            return {
+                "idle": {str(key): len(graphs) for key, graphs in self._idle.items()},
+                "created": self.created,
+                "reused": self.reused,
+                "closed": self.closed,
+            }
+
+    def close(self):
+        with self._lock:
+            graphs = [graph for idle in self._idle.values() for graph in idle]
+            self._idle.clear()
+        for graph in graphs:
+            graph.close()
+
+
+# Shared by all counters in this process
+shared_graph_pool = PoseGraphPool.from_env()
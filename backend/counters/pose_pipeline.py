@@ -0,0 +1,293 @@
+"""
+Pose inference with a person-tracking region of interest.
+
+Instead of handing the full camera frame to MediaPipe every time, the previous
+frame's landmarks give a padded bounding box around the athlete and pose runs on
+that crop only. Landmarks are mapped back to full-frame normalized coordinates,
+so the counters see exactly what a full-frame inference would report. When the
+crop finds no pose (tracking lost), the same frame is re-run on the full image.
+
+The crop is kept stable while the athlete stays well inside it: MediaPipe's
+landmark smoothing works in the coordinates of its input image, and moving the
+crop every frame would show up as landmark jitter.
+
+With MAX_INPUT_DIM set, the image handed to MediaPipe (the crop or the full
+frame) is first downscaled so its longest side fits. Landmarks are normalized to
+the input image, so they come back in the same coordinates either way, and the
+counters measure distances in body proportions, so counting does not depend on
+the input resolution.
+
+With POSE_KEYFRAME_INTERVAL above 1, pose runs on keyframes only and the
+frames in between get the keyframe's landmarks carried along by optical flow
+(counters/keypoint_flow.py), falling back to inference when tracking fails.
+
+With a latency budget configured, a per-session ComplexityController watches
+pose latency and switches the graph between model_complexity 0, 1 and 2. Only
+the graph is rebuilt; the counter that owns the pipeline keeps its rep state
+and smoothing buffers.
+"""
+
+import os
+import time
+import types
+
+import cv2
+import numpy as np
+
+from counters.keypoint_flow import KeypointFlow
+
+
+def roi_crop_enabled():
+    return os.getenv("POSE_ROI_CROP", "1").lower() not in ("0", "false", "no")
+
+
+def max_input_dim():
+    """Longest side (pixels) of the image given to pose inference, from MAX_INPUT_DIM (default: no limit)."""
+    value = os.getenv("MAX_INPUT_DIM")
+    return int(value) if value else None
+
+
+class ComplexityController:
+    """
+    Picks a MediaPipe model_complexity that keeps pose latency within a budget.
+    Steps down when the latency EMA stays over budget and back up when it stays
+    well under (the next level costs roughly twice as much).
+    """
+
+    def __init__(self, budget_ms, min_complexity=0, max_complexity=2, alpha=0.2,
+                 downgrade_frames=10, upgrade_frames=60, headroom=0.45, settle_frames=5):
+        self.budget_ms = budget_ms
+        self.min_complexity = min_complexity
+        self.max_complexity = max_complexity
+        self.alpha = alpha
+        self.downgrade_frames = downgrade_frames
+        self.upgrade_frames = upgrade_frames
+        self.headroom = headroom
+        # Frames ignored after a switch (the first inferences on a new graph are slow)
+        self.settle_frames = settle_frames
+        self.latency_ema_ms = None
+        self._over = 0
+        self._under = 0
+        self._settling = settle_frames
+        self.switches = 0
+
+    @classmethod
+    def from_env(cls):
+        """Returns a controller if POSE_LATENCY_BUDGET_MS is set, else None (fixed complexity)."""
+        budget_ms = os.getenv("POSE_LATENCY_BUDGET_MS")
+        if not budget_ms:
+            return None
+        return cls(
+            float(budget_ms),
+            min_complexity=int(os.getenv("POSE_MIN_COMPLEXITY", "0")),
+            max_complexity=int(os.getenv("POSE_MAX_COMPLEXITY", "2")),
+        )
+
+    def observe(self, latency_ms, complexity):
+        """Records one inference. Returns the complexity to use from the next frame on."""
+        if self._settling:
+            self._settling -= 1
+            return complexity
+        if self.latency_ema_ms is None:
+            self.latency_ema_ms = latency_ms
+        else:
+            self.latency_ema_ms += self.alpha * (latency_ms - self.latency_ema_ms)
+
+        if self.latency_ema_ms > self.budget_ms:
+            self._over += 1
+            self._under = 0
+        elif self.latency_ema_ms < self.budget_ms * self.headroom:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        target = complexity
+        if self._over >= self.downgrade_frames and complexity > self.min_complexity:
+            target = complexity - 1
+        elif self._under >= self.upgrade_frames and complexity < self.max_complexity:
+            target = complexity + 1
+        if target != complexity:
+            self.switches += 1
+            self.latency_ema_ms = None
+            self._over = self._under = 0
+            self._settling = self.settle_frames
+        return target
+
+
+class PosePipeline:
+    """Runs a MediaPipe Pose graph on a tracked crop of each BGR frame."""
+
+    def __init__(self, create_graph, model_complexity=1, roi_enabled=True, controller=None,
+                 release_graph=None, padding=0.3, min_visibility=0.5, full_frame_ratio=0.8,
+                 recrop_margin=0.08, max_input_dim=None, keyframe_interval=1):
+        # create_graph(model_complexity) provides a Pose graph; release_graph(graph) gives
+        # it back (e.g. to a graph pool) and defaults to closing it
+        self.create_graph = create_graph
+        self.release_graph = release_graph or (lambda graph: graph.close())
+        self.model_complexity = model_complexity
+        self.pose = create_graph(model_complexity)
+        self.controller = controller
+        self.roi_enabled = roi_enabled
+        # Padding around the landmark bounding box, as a fraction of its size
+        self.padding = padding
+        self.min_visibility = min_visibility
+        # Crops covering more than this share of the frame just use the full frame
+        self.full_frame_ratio = full_frame_ratio
+        # The crop is recomputed once landmarks come this close to its edge (fraction of crop size)
+        self.recrop_margin = recrop_margin
+        # Inference inputs are downscaled to this longest side (None: as captured)
+        self.max_input_dim = max_input_dim
+        # Optical-flow propagation between inferences (None: pose on every frame)
+        self.flow = KeypointFlow(keyframe_interval, max_dim=max_input_dim) if keyframe_interval > 1 else None
+        self.roi = None  # (x0, y0, x1, y1) in pixels, or None for full frame
+        self.crop_frames = 0
+        self.full_frames = 0
+        self.tracking_lost = 0
+        # Seconds spent on BGR->RGB conversion and inference for the last frame
+        self.timings = {"convert": 0.0, "pose": 0.0}
+
+    def process(self, frame):
+        """Runs pose on a BGR frame. Returns MediaPipe results in full-frame coordinates."""
+        if self.flow is not None:
+            start = time.perf_counter()
+            pose_landmarks = self.flow.propagate(frame)
+            flow_seconds = time.perf_counter() - start
+            if pose_landmarks is not None:
+                self.timings = {"convert": 0.0, "pose": 0.0, "flow": flow_seconds}
+                if self.roi_enabled:
+                    h, w = frame.shape[:2]
+                    self._update_roi(pose_landmarks, w, h)
+                return types.SimpleNamespace(pose_landmarks=pose_landmarks)
+            results = self._process_timed(frame)
+            start = time.perf_counter()
+            self.flow.start(frame, results.pose_landmarks)
+            self.timings["flow"] = flow_seconds + time.perf_counter() - start
+            return results
+        return self._process_timed(frame)
+
+    def _process_timed(self, frame):
+        if self.controller is None:
+            return self._process(frame)
+        start = time.perf_counter()
+        results = self._process(frame)
+        target = self.controller.observe((time.perf_counter() - start) * 1000, self.model_complexity)
+        if target != self.model_complexity:
+            self.set_model_complexity(target)
+        return results
+
+    def set_model_complexity(self, model_complexity):
+        """Swaps in a graph with another model_complexity. Only the graph is replaced."""
+        old_pose = self.pose
+        try:
+            self.pose = self.create_graph(model_complexity)
+        except Exception as e:
+            # e.g. the heavy model could not be downloaded; stay on the current graph
+            print(f"Could not build pose graph with model complexity {model_complexity}: {e}")
+            if self.controller is not None:
+                # Don't keep retrying the level that failed
+                if model_complexity > self.model_complexity:
+                    self.controller.max_complexity = self.model_complexity
+                else:
+                    self.controller.min_complexity = self.model_complexity
+            return
+        print(f"Pose model complexity {self.model_complexity} -> {model_complexity}")
+        self.model_complexity = model_complexity
+        # The new graph starts without a tracked person, so detect on the full frame once
+        self.roi = None
+        self.release_graph(old_pose)
+
+    def _process(self, frame):
+        h, w = frame.shape[:2]
+        self.timings = {"convert": 0.0, "pose": 0.0}
+        if self.roi_enabled and self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            results = self._infer(frame[y0:y1, x0:x1])
+            if results.pose_landmarks:
+                self.crop_frames += 1
+                self._to_full_frame(results.pose_landmarks, self.roi, w, h)
+                self._update_roi(results.pose_landmarks, w, h)
+                return results
+            # Tracking lost: drop the crop and look at the whole frame again
+            self.tracking_lost += 1
+            self.roi = None
+
+        results = self._infer(frame)
+        self.full_frames += 1
+        if self.roi_enabled and results.pose_landmarks:
+            self._update_roi(results.pose_landmarks, w, h)
+        return results
+
+    def _infer(self, bgr):
+        start = time.perf_counter()
+        if self.max_input_dim:
+            h, w = bgr.shape[:2]
+            scale = self.max_input_dim / max(h, w)
+            if scale < 1.0:
+                bgr = cv2.resize(bgr, (max(1, round(w * scale)), max(1, round(h * scale))),
+                                 interpolation=cv2.INTER_AREA)
+        rgb_frame = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        rgb_frame.flags.writeable = False
+        converted = time.perf_counter()
+        results = self.pose.process(rgb_frame)
+        # Accumulated, since a lost crop runs a second inference on the full frame
+        self.timings["convert"] += converted - start
+        self.timings["pose"] += time.perf_counter() - converted
+        return results
+
+    @staticmethod
+    def _to_full_frame(pose_landmarks, roi, w, h):
+        x0, y0, x1, y1 = roi
+        crop_w, crop_h = x1 - x0, y1 - y0
+        for landmark in pose_landmarks.landmark:
+            landmark.x = (landmark.x * crop_w + x0) / w
+            landmark.y = (landmark.y * crop_h + y0) / h
+            # z uses the same scale as x
+            landmark.z = landmark.z * crop_w / w
+
+    def _update_roi(self, pose_landmarks, w, h):
+        points = np.array([(lm.x, lm.y) for lm in pose_landmarks.landmark
+                           if lm.visibility >= self.min_visibility], dtype=np.float32)
+        if len(points) < 4:
+            self.roi = None
+            return
+        bx0, by0 = points.min(axis=0) * (w, h)
+        bx1, by1 = points.max(axis=0) * (w, h)
+
+        if self.roi is not None:
+            # Keep the current crop while the body stays clear of its edges
+            x0, y0, x1, y1 = self.roi
+            margin_x = (x1 - x0) * self.recrop_margin
+            margin_y = (y1 - y0) * self.recrop_margin
+            if bx0 > x0 + margin_x and by0 > y0 + margin_y and bx1 < x1 - margin_x and by1 < y1 - margin_y:
+                return
+
+        pad_x = (bx1 - bx0) * self.padding
+        pad_y = (by1 - by0) * self.padding
+        x0 = int(max(0, bx0 - pad_x))
+        y0 = int(max(0, by0 - pad_y))
+        x1 = int(min(w, bx1 + pad_x))
+        y1 = int(min(h, by1 + pad_y))
+        if x1 - x0 < 32 or y1 - y0 < 32 or (x1 - x0) * (y1 - y0) > self.full_frame_ratio * w * h:
+            self.roi = None
+        else:
+            self.roi = (x0, y0, x1, y1)
+
+    def reset(self):
+        self.roi = None
+        if self.flow is not None:
+            self.flow.reset()
+
+    def close(self):
+        self.release_graph(self.pose)
+
+    def stats(self):
+        return {
+            "crop_frames": self.crop_frames,
+            "full_frames": self.full_frames,
+            "tracking_lost": self.tracking_lost,
+            "roi": list(self.roi) if self.roi else None,
+            "model_complexity": self.model_complexity,
+            "latency_ema_ms": self.controller.latency_ema_ms if self.controller else None,
+            **(self.flow.stats() if self.flow is not None else {}),
+        }
@@ -0,0 +1,80 @@
+"""
+Output encodings for annotated frames.
+
+The legacy response is JSON with the JPEG hex-encoded inside it (2x the bytes plus
+JSON escaping). Clients can instead negotiate a compact transport:
+  "json"      - legacy JSON, frame as hex (default)
+  "jpeg"/"webp" - raw image bytes; counter state in the X-Workout-Result header
+  "multipart" - multipart/mixed with a JSON part followed by the image part
+Quality and maximum output dimension can be set per request.
+"""
+
+import json
+import uuid
+
+import cv2
+
+OUTPUT_ENCODINGS = ("json", "jpeg", "webp", "multipart")
+IMAGE_MEDIA_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+# Accept header media type -> output encoding, in order of preference
+ACCEPT_ENCODINGS = (
+    ("multipart/mixed", "multipart"),
+    ("image/webp", "webp"),
+    ("image/jpeg", "jpeg"),
+)
+
+
+def negotiate_output_encoding(requested, accept_header):
+    """Picks the output encoding from an explicit request or the Accept header."""
+    if requested:
+        return requested if requested in OUTPUT_ENCODINGS else None
+    accept_header = accept_header or ""
+    for media_type, encoding in ACCEPT_ENCODINGS:
+        if media_type in accept_header:
+            return encoding
+    return "json"
+
+
+def resize_to_max_dim(frame, max_dim):
+    """Downscales a frame so its longest side is at most max_dim pixels."""
+    if not max_dim:
+        return frame
+    h, w = frame.shape[:2]
+    scale = max_dim / max(h, w)
+    if scale >= 1.0:
+        return frame
+    return cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def encode_image(frame, image_format="jpeg", quality=None, max_dim=None):
+    """Encodes a BGR frame as JPEG or WebP bytes. quality is 1-100 (None = OpenCV default)."""
+    frame = resize_to_max_dim(frame, max_dim)
+    if image_format == "webp":
+        extension, quality_flag = ".webp", cv2.IMWRITE_WEBP_QUALITY
+    else:
+        extension, quality_flag = ".jpg", cv2.IMWRITE_JPEG_QUALITY
+    params = [quality_flag, int(quality)] if quality else []
+    ok, encoded = cv2.imencode(extension, frame, params)
+    if not ok:
+        raise ValueError(f"Failed to encode frame as {image_format}")
+    return encoded.tobytes()
+
+
+def build_multipart(result, image_bytes, image_media_type):
+    """Builds a multipart/mixed body with a JSON part and an image part. Returns (body, content_type)."""
+    boundary = uuid.uuid4().hex
+    parts = [
+        f"--{boundary}\r\nContent-Type: application/json\r\n\r\n".encode("ascii"),
+        json.dumps(result, separators=(",", ":")).encode("utf-8"),
+        b"\r\n",
+    ]
+    if image_bytes is not None:
+        parts += [
+            f"--{boundary}\r\nContent-Type: {image_media_type}\r\n"
+            f"Content-Length: {len(image_bytes)}\r\n\r\n".encode("ascii"),
+            image_bytes,
+            b"\r\n",
+        ]
+    parts.append(f"--{boundary}--\r\n".encode("ascii"))
+    return b"".join(parts), f"multipart/mixed; boundary={boundary}"
@@ -0,0 +1,145 @@
+"""
+Bounded executor for the CPU-bound frame pipeline.
+
+Pose inference, JPEG decode/encode and overlay drawing run on a thread pool so a
+slow frame never blocks the asyncio event loop (and with it /chatbot and /).
+Jobs for the same session run one at a time in arrival order, because the
+counters' smoothing buffers and MediaPipe's landmark smoothing need sequential
+frames. A global queue-depth limit sheds load instead of letting work pile up.
+
+Camera frames are submitted with latest_only=True: each session then holds at
+most one waiting frame, and a newer frame replaces it (the older request is
+answered with FrameDropped). Clients that send on a fixed timer therefore see
+their newest frame processed next instead of a backlog that grows under load.
+"""
+
+import asyncio
+import functools
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FrameExecutorOverloaded(Exception):
+    """Raised when the executor already has max_queue_depth jobs in flight."""
+
+
+class FrameDropped(Exception):
+    """Raised for a waiting frame that was replaced by a newer frame of the same session."""
+
+
+class _SessionQueue:
+    """Jobs of one session: at most one running, the rest waiting in order."""
+
+    def __init__(self):
+        self.jobs = deque()  # (future, job, latest_only)
+        self.running = False
+
+
+class FrameExecutor:
+    """Runs blocking frame jobs on worker threads, ordered per session."""
+
+    def __init__(self, max_workers=None, max_queue_depth=32):
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="frame-worker")
+        self._sessions = {}
+        self.pending = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls, default_workers=None):
+        """Builds an executor configured from environment variables."""
+        max_workers = os.getenv("FRAME_WORKERS")
+        return cls(
+            max_workers=int(max_workers) if max_workers else default_workers,
+            max_queue_depth=int(os.getenv("FRAME_QUEUE_DEPTH", "32")),
+        )
+
+    async def submit(self, session_id, fn, *args, latest_only=False, **kwargs):
+        """
+        Runs fn(*args, **kwargs) on a worker thread after the session's earlier jobs.
+        With latest_only=True any waiting latest_only job of the session is dropped
+        in favour of this one; jobs submitted without it (e.g. resets) are never dropped.
+        """
+        queue = self._sessions.get(session_id)
+        replaced = 0
+        if latest_only and queue is not None:
+            replaced = sum(1 for future, _, droppable in queue.jobs if droppable and not future.done())
+
+        if self.pending - replaced >= self.max_queue_depth:
+            self.rejected += 1
+            raise FrameExecutorOverloaded(
+                f"Frame queue full ({self.pending}/{self.max_queue_depth} jobs in flight)"
+            )
+
+        if queue is None:
+            queue = self._sessions[session_id] = _SessionQueue()
+        if latest_only:
+            self._drop_waiting(queue)
+
+        future = asyncio.get_running_loop().create_future()
+        queue.jobs.append((future, functools.partial(fn, *args, **kwargs), latest_only))
+        self.pending += 1
+        self._run_next(session_id, queue)
+        # If the caller goes away while the job is waiting, the cancelled future is
+        # skipped; once running, the job finishes before the session's next one starts
+        return await future
+
+    def _drop_waiting(self, queue):
+        kept = deque()
+        for future, job, droppable in queue.jobs:
+            if droppable and not future.done():
+                self.dropped += 1
+                self.pending -= 1
+                future.set_exception(FrameDropped("Superseded by a newer frame"))
+            elif not future.done():
+                kept.append((future, job, droppable))
+            else:
+                self.pending -= 1
+        queue.jobs = kept
+
+    def _run_next(self, session_id, queue):
+        if queue.running:
+            return
+        while queue.jobs:
+            future, job, _ = queue.jobs.popleft()
+            if future.done():
+                # Cancelled while waiting
+                self.pending -= 1
+                continue
+            queue.running = True
+            loop = asyncio.get_running_loop()
+            work = loop.run_in_executor(self._executor, job)
+            work.add_done_callback(functools.partial(self._job_done, session_id, queue, future))
+            return
+        # Idle sessions are forgotten so the map only holds sessions with work
+        if self._sessions.get(session_id) is queue:
+            del self._sessions[session_id]
+
+    def _job_done(self, session_id, queue, future, work):
+        self.pending -= 1
+        queue.running = False
+        if not future.done():
+            if work.cancelled():
+                future.cancel()
+            elif work.exception() is not None:
+                future.set_exception(work.exception())
+            else:
+                future.set_result(work.result())
+        self._run_next(session_id, queue)
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "max_queue_depth": self.max_queue_depth,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
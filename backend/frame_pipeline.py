@@ -0,0 +1,209 @@
+"""
+CPU-bound frame pipeline shared by the HTTP endpoints.
+
+Everything in here is synchronous (JPEG decode, pose inference, overlay drawing,
+JPEG encode) and is meant to run on a worker thread, never on the event loop.
+
+Two response modes are supported:
+  "frame"     - draw the overlay server-side and return the annotated JPEG
+  "landmarks" - skip drawing and encoding; return the 33 pose landmarks and
+                joint angles so the client can draw the overlay itself
+
+Pass a timings dict to collect per-stage seconds (decode, convert, pose, count,
+draw, encode) for the latency metrics in metrics.py.
+
+Clients that run pose estimation themselves send landmarks instead of frames
+(decode_landmarks / run_landmarks_counting): only the counting logic runs.
+
+Frames may carry a capture timestamp (seconds, any monotonic client clock); the
+counters then time reps, holds and angle speeds on it instead of on arrival
+order, so low or uneven client frame rates count the same as 30 FPS.
+"""
+
+import math
+import time
+
+import cv2
+import numpy as np
+
+from frame_encoding import encode_image
+
+
+RESPONSE_MODES = ("frame", "landmarks")
+
+NUM_LANDMARKS = 33
+# Binary landmark payload: 33 x (x, y, z, visibility) little-endian float32
+LANDMARKS_PAYLOAD_BYTES = NUM_LANDMARKS * 4 * 4
+
+
+def decode_frame(file_content):
+    """Decodes JPEG/PNG bytes into a BGR frame. Returns None if decoding fails."""
+    image_bytes = np.frombuffer(file_content, np.uint8)
+    return cv2.imdecode(image_bytes, cv2.IMREAD_COLOR)
+
+
+def counter_state(counter):
+    """
+    Current rep state of a counter, as returned to clients. Auto counters add
+    the detected exercise (None until one is detected) and the reps per exercise.
+    """
+    state = {
+        "count": counter.counter,
+        "stage": counter.stage,
+        "avg_speed": counter.avg_speed,
+        "good_reps": counter.good_reps,
+        "bad_reps": counter.bad_reps,
+    }
+    if hasattr(counter, "exercise_counts"):
+        state["exercise"] = counter.exercise
+        state["counts"] = counter.exercise_counts()
+    return state
+
+
+def landmarks_state(counter, frame):
+    """
+    Compact pose result for clients that draw their own overlay: joint angles and
+    the 33 landmarks flattened as [x, y, z, visibility, ...] (x/y normalized to
+    the frame size), or None if no pose was detected.
+    """
+    pose_landmarks = getattr(counter, "last_pose_landmarks", None)
+    landmarks = None
+    if pose_landmarks is not None:
+        landmarks = [
+            round(value, 4)
+            for landmark in pose_landmarks.landmark
+            for value in (landmark.x, landmark.y, landmark.z, landmark.visibility)
+        ]
+    h, w = frame.shape[:2]
+    result = {
+        "angles": {name: round(float(angle), 1) for name, angle in getattr(counter, "last_angles", {}).items()},
+        "landmarks": landmarks,
+        "frame_size": [w, h],
+    }
+    if hasattr(counter, "current_leg"):
+        result["leading_leg"] = counter.current_leg
+    result["feedback"] = getattr(counter, "last_feedback", None)
+    return result
+
+
+def decode_landmarks(payload):
+    """
+    Parses client-side pose results into a (33, 4) float32 array of normalized
+    x, y, z, visibility. payload is the raw binary form (528 bytes) or a JSON list,
+    flat (132 values) or nested (33 x 4). None or empty means no pose was found.
+    Raises ValueError for any other shape.
+    """
+    if payload is None or len(payload) == 0:
+        return None
+    if isinstance(payload, (bytes, bytearray)):
+        if len(payload) != LANDMARKS_PAYLOAD_BYTES:
+            raise ValueError(f"Binary landmarks must be {LANDMARKS_PAYLOAD_BYTES} bytes (33 x 4 float32), got {len(payload)}")
+        landmarks = np.frombuffer(payload, dtype="<f4").reshape(NUM_LANDMARKS, 4)
+    else:
+        try:
+            landmarks = np.asarray(payload, dtype=np.float32).reshape(NUM_LANDMARKS, 4)
+        except (TypeError, ValueError):
+            raise ValueError("landmarks must be 132 numbers or 33 rows of [x, y, z, visibility]")
+    if not np.isfinite(landmarks).all():
+        raise ValueError("landmarks must be finite numbers")
+    return landmarks
+
+
+def decode_timestamp(value):
+    """Client capture time in seconds as a float, or None if not sent. Raises ValueError unless finite."""
+    if value is None:
+        return None
+    try:
+        timestamp = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("timestamp must be a number")
+    if not math.isfinite(timestamp):
+        raise ValueError("timestamp must be a finite number")
+    return timestamp
+
+
+def use_capture_clock(counter, timestamp=None):
+    """Times the counter's next frame at a client capture timestamp, or on the wall clock without one."""
+    counter.clock = (lambda: timestamp) if timestamp is not None else time.time
+
+
+def run_landmarks_counting(counter, landmarks, width, height):
+    """Counts one frame of client-side landmarks. Returns the counter state with form feedback."""
+    counter.process_landmarks(landmarks, width, height)
+    result = {
+        **counter_state(counter),
+        "ready": bool(getattr(counter, "system_ready", False)),
+        "feedback": getattr(counter, "last_feedback", None),
+        "angles": {name: round(float(angle), 1) for name, angle in getattr(counter, "last_angles", {}).items()},
+    }
+    if hasattr(counter, "current_leg"):
+        result["leading_leg"] = counter.current_leg
+    return result
+
+
+def timed_process_frame(counter, frame, draw, timings):
+    """
+    Runs counter.process_frame, splitting its time into convert, pose, flow
+    (keypoint propagation, when enabled), draw and count (the rest) in timings.
+    """
+    start = time.perf_counter()
+    processed_frame = counter.process_frame(frame, draw=draw)
+    total = time.perf_counter() - start
+
+    pipeline = getattr(counter, "pose_pipeline", None)
+    # Motion-detection counters have no pose pipeline
+    stages = dict(pipeline.timings) if pipeline is not None else {"convert": 0.0, "pose": 0.0}
+    if draw:
+        stages["draw"] = getattr(counter, "draw_seconds", 0.0)
+    stages["count"] = max(0.0, total - sum(stages.values()))
+    timings.update(stages)
+    return processed_frame
+
+
+def run_landmarks_pipeline(counter, file_content, timings=None):
+    """Decodes and counts a frame without drawing or re-encoding it."""
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    frame = decode_frame(file_content)
+    timings["decode"] = time.perf_counter() - start
+    if frame is None:
+        return {"error": "Failed to decode image"}
+
+    timed_process_frame(counter, frame, False, timings)
+    return {**counter_state(counter), **landmarks_state(counter, frame)}
+
+
+def process_encoded_frame(counter, file_content, image_format="jpeg", quality=None, max_dim=None, timings=None):
+    """
+    Decodes a frame, runs it through the counter and encodes the annotated result.
+    Returns (image_bytes, result) where result holds the counter state, or
+    (None, {"error": ...}) if the frame could not be decoded.
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    frame = decode_frame(file_content)
+    timings["decode"] = time.perf_counter() - start
+    if frame is None:
+        return None, {"error": "Failed to decode image"}
+
+    # Process the frame (this updates the counter state internally)
+    processed_frame = timed_process_frame(counter, frame, True, timings)
+
+    # Encode processed frame (JPEG by default) at the requested quality and size
+    start = time.perf_counter()
+    image_bytes = encode_image(processed_frame, image_format, quality, max_dim)
+    timings["encode"] = time.perf_counter() - start
+    return image_bytes, counter_state(counter)
+
+
+def run_frame_pipeline(counter, file_content, response_mode="frame", image_format="jpeg", quality=None, max_dim=None,
+                       timings=None, timestamp=None):
+    """
+    Runs the frame pipeline for a response mode. Returns (image_bytes, result);
+    image_bytes is None in landmarks mode or when the frame could not be decoded.
+    timestamp is the frame's capture time in seconds, if the client sent one.
+    """
+    use_capture_clock(counter, timestamp)
+    if response_mode == "landmarks":
+        return None, run_landmarks_pipeline(counter, file_content, timings)
+    return process_encoded_frame(counter, file_content, image_format, quality, max_dim, timings)
@@ -0,0 +1,226 @@
+"""
+Batch ingest of client-side landmarks for many sessions at once.
+
+/process-landmarks-batch takes one frame each for many sessions (e.g. a gateway
+fanning in thousands of landmark-only clients) and counts them on BatchCounters
+(counters/batch_engine.py): one per exercise, holding every session's rep state
+as NumPy columns, so a batch costs a few vectorized steps instead of one counter
+object and one Python call chain per session. These sessions are separate from
+the per-session counters of /process-landmarks.
+
+A session that appears more than once in a batch has its frames applied in
+order. Idle sessions expire after SESSION_TTL_SECONDS; past BATCH_MAX_SESSIONS
+sessions of one exercise the least recently seen are dropped.
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from counters import load_counter_class
+from frame_pipeline import LANDMARKS_PAYLOAD_BYTES, NUM_LANDMARKS, decode_landmarks, decode_timestamp
+
+
+def _frame_fields(index, entry, defaults, workout_types):
+    """Validated session_id, workout_type, width, height and timestamp of one batch entry."""
+    if not isinstance(entry, dict):
+        raise ValueError(f"frames[{index}] must be an object")
+    fields = {**defaults, **entry}
+    if "session_id" not in fields:
+        raise ValueError(f"frames[{index}]: session_id is required")
+    if fields.get("workout_type") not in workout_types:
+        raise ValueError(f"frames[{index}]: invalid workout type")
+    width, height = int(fields.get("width", 640)), int(fields.get("height", 480))
+    if width < 1 or height < 1:
+        raise ValueError(f"frames[{index}]: width and height must be positive")
+    try:
+        timestamp = decode_timestamp(fields.get("timestamp"))
+    except ValueError as e:
+        raise ValueError(f"frames[{index}]: {e}")
+    return {
+        "session_id": str(fields["session_id"]),
+        "workout_type": fields["workout_type"],
+        "width": width,
+        "height": height,
+        "timestamp": timestamp,
+    }
+
+
+def _batch_defaults(body):
+    return {key: body[key] for key in ("workout_type", "width", "height") if key in body}
+
+
+def parse_json_batch(body, workout_types, max_frames):
+    """
+    Frames of a JSON batch: {"frames": [{"session_id", "landmarks", ...}, ...]},
+    with top-level workout_type/width/height as defaults. Landmarks take any form
+    decode_landmarks accepts. Raises ValueError on the first invalid frame.
+    """
+    if not isinstance(body, dict) or not isinstance(body.get("frames"), list):
+        raise ValueError("Expected a JSON object with a frames list")
+    entries = body["frames"]
+    if len(entries) > max_frames:
+        raise ValueError(f"At most {max_frames} frames per batch")
+    defaults = _batch_defaults(body)
+    frames = []
+    for index, entry in enumerate(entries):
+        frame = _frame_fields(index, entry, defaults, workout_types)
+        try:
+            frame["landmarks"] = decode_landmarks(entry.get("landmarks"))
+        except ValueError as e:
+            raise ValueError(f"frames[{index}]: {e}")
+        frames.append(frame)
+    return frames
+
+
+def parse_binary_batch(meta, payload, workout_types, max_frames):
+    """
+    Frames of a binary batch: meta is the JSON frames object (as for
+    parse_json_batch, without landmarks; "pose": false marks a frame with no
+    pose) and payload the landmarks of the frames with a pose, in order, as
+    33 x 4 little-endian float32 each (528 bytes per frame).
+    """
+    body = json.loads(meta)
+    if not isinstance(body, dict) or not isinstance(body.get("frames"), list):
+        raise ValueError("Expected a JSON object with a frames list")
+    entries = body["frames"]
+    if len(entries) > max_frames:
+        raise ValueError(f"At most {max_frames} frames per batch")
+    if len(payload) % LANDMARKS_PAYLOAD_BYTES:
+        raise ValueError(f"Landmarks must be a multiple of {LANDMARKS_PAYLOAD_BYTES} bytes (33 x 4 float32)")
+    poses = np.frombuffer(payload, dtype="<f4").reshape(-1, NUM_LANDMARKS, 4)
+    with_pose = sum(1 for entry in entries if not isinstance(entry, dict) or entry.get("pose", True))
+    if with_pose != len(poses):
+        raise ValueError(f"{with_pose} frames have a pose but {len(poses)} landmark sets were sent")
+    if not np.isfinite(poses).all():
+        raise ValueError("landmarks must be finite numbers")
+    defaults = _batch_defaults(body)
+    frames = []
+    next_pose = 0
+    for index, entry in enumerate(entries):
+        frame = _frame_fields(index, entry, defaults, workout_types)
+        frame["landmarks"] = None
+        if entry.get("pose", True):
+            frame["landmarks"] = poses[next_pose]
+            next_pose += 1
+        frames.append(frame)
+    return frames
+
+
+class LandmarkBatchIngest:
+    """BatchCounters per exercise, with session expiry, for batch landmark ingest."""
+
+    def __init__(self, exercises, max_sessions=10000, session_ttl=600, sweep_interval=5.0):
+        self.exercises = tuple(exercises)
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.sweep_interval = sweep_interval
+        self._counters = {}  # workout_type -> BatchCounter, created on first use
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+        self.batches = 0
+        self.frames = 0
+
+    @classmethod
+    def from_env(cls, exercises):
+        """Builds the ingest configured from environment variables."""
+        return cls(
+            exercises,
+            max_sessions=int(os.getenv("BATCH_MAX_SESSIONS", "10000")),
+            session_ttl=float(os.getenv("SESSION_TTL_SECONDS", "600")),
+        )
+
+    def counter(self, workout_type):
+        """The exercise's BatchCounter, importing its spec on first use."""
+        counter = self._counters.get(workout_type)
+        if counter is None:
+            from counters.batch_engine import BatchCounter
+            counter = self._counters[workout_type] = BatchCounter(load_counter_class(workout_type).spec)
+        return counter
+
+    def count(self, frames):
+        """
+        Counts a batch of parsed frames (parse_json_batch / parse_binary_batch).
+        Returns one result per frame, in order, as for /process-landmarks plus
+        the session_id.
+        """
+        results = [None] * len(frames)
+        arrived = time.time()
+        with self._lock:
+            self._sweep_expired(arrived)
+            by_exercise = {}
+            for index, frame in enumerate(frames):
+                by_exercise.setdefault(frame["workout_type"], []).append(index)
+            for workout_type, indices in by_exercise.items():
+                self._count_exercise(self.counter(workout_type), frames, indices, results, arrived)
+            self.batches += 1
+            self.frames += len(frames)
+        return results
+
+    def _count_exercise(self, counter, frames, indices, results, arrived):
+        # A session's nth frame in the batch goes in the nth step, so rows are distinct per step
+        steps = []
+        seen = {}
+        for index in indices:
+            session_id = frames[index]["session_id"]
+            occurrence = seen[session_id] = seen.get(session_id, -1) + 1
+            if occurrence == len(steps):
+                steps.append([])
+            steps[occurrence].append(index)
+        for step in steps:
+            rows = [counter.row(frames[index]["session_id"]) for index in step]
+            landmarks = np.zeros((len(step), NUM_LANDMARKS, 4), dtype=np.float32)
+            found = np.zeros(len(step), dtype=bool)
+            for k, index in enumerate(step):
+                if frames[index]["landmarks"] is not None:
+                    landmarks[k] = frames[index]["landmarks"]
+                    found[k] = True
+            timestamps = [frames[index]["timestamp"] for index in step]
+            times = [arrived if timestamp is None else timestamp for timestamp in timestamps]
+            widths = [frames[index]["width"] for index in step]
+            heights = [frames[index]["height"] for index in step]
+            counter.step(rows, landmarks, found, widths, heights, times)
+            for index, result in zip(step, counter.results(rows)):
+                results[index] = {"session_id": frames[index]["session_id"], **result}
+        if self.max_sessions and len(counter) > self.max_sessions:
+            for session_id in counter.least_recent_sessions(len(counter) - self.max_sessions):
+                counter.remove_session(session_id)
+                self.evicted_lru += 1
+
+    def _sweep_expired(self, now):
+        """Drops sessions idle for longer than the TTL (checked every sweep_interval seconds)."""
+        if not self.session_ttl or now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        for counter in self._counters.values():
+            for session_id in counter.sessions_idle_since(now - self.session_ttl):
+                counter.remove_session(session_id)
+                self.evicted_ttl += 1
+
+    def reset_session(self, session_id, workout_type):
+        """Clears a session's rep state for an exercise, if it has one."""
+        with self._lock:
+            counter = self._counters.get(workout_type)
+            return counter is not None and counter.reset_session(session_id)
+
+    def live_sessions(self):
+        with self._lock:
+            return sum(len(counter) for counter in self._counters.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "live_sessions": {workout_type: len(counter) for workout_type, counter in self._counters.items()},
+                "capacity": {workout_type: counter.capacity for workout_type, counter in self._counters.items()},
+                "max_sessions": self.max_sessions,
+                "session_ttl_seconds": self.session_ttl,
+                "evicted_ttl": self.evicted_ttl,
+                "evicted_lru": self.evicted_lru,
+                "batches": self.batches,
+                "frames": self.frames,
+            }
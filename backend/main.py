@@ -1,31 +1,89 @@
-from fastapi import FastAPI, UploadFile, Form, HTTPException
+from fastapi import FastAPI, UploadFile, Form, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
-import subprocess
-import cv2
-import numpy as np
+import asyncio
 import json
 import os
+import struct
+import tempfile
+import time
+import uuid
 import httpx
 
 app = FastAPI()
 
 # ============================================
-# EXERCISE COUNTER INSTANCES (Persistent State)
+# EXERCISE COUNTER SESSIONS (Persistent State)
 # ============================================
-# Import counter classes
-from counters.squat_counter import FinalSquatCounter
-from counters.pushup_counter import FinalBalancedPushUpCounter
-from counters.lunge_counter import FinalLungeCounter
-
-# Create persistent counter instances (one per exercise type)
-# These maintain state between frames
-exercise_counters = {
-    "squats": FinalSquatCounter(),
-    "pushups": FinalBalancedPushUpCounter(),
-    "lunges": FinalLungeCounter()
+# Counter modules (and MediaPipe) are imported by the startup warm-up, not here
+from startup import Readiness, enabled_exercises, lazy_counter_factory, served_workout_types
+from counters.pose_graph_pool import shared_graph_pool
+from session_registry import CounterSessionRegistry
+from frame_executor import FrameDropped, FrameExecutor, FrameExecutorOverloaded
+from frame_pipeline import RESPONSE_MODES, decode_landmarks, decode_timestamp, run_frame_pipeline, run_landmarks_counting, use_capture_clock
+from frame_encoding import IMAGE_MEDIA_TYPES, build_multipart, negotiate_output_encoding
+from video_jobs import VideoJobManager, VideoQueueFull
+from landmark_batch import LandmarkBatchIngest, parse_binary_batch, parse_json_batch
+from metrics import RequestTimingMiddleware, frame_metrics
+
+# Counter factory for each exercise served by this process (ENABLED_EXERCISES), plus
+# "auto", which detects the exercise and feeds one pose pass to all their counters
+EXERCISES = enabled_exercises()
+COUNTER_FACTORIES = {
+    workout_type: lazy_counter_factory(workout_type, exercises=EXERCISES) for workout_type in served_workout_types(EXERCISES)
 }
 
+# Each client session gets its own counter instances, which maintain state between
+# frames. Idle sessions expire after SESSION_TTL_SECONDS and the least recently used
+# sessions are evicted once MAX_SESSIONS or SESSION_MEMORY_CAP_MB is exceeded.
+session_registry = CounterSessionRegistry.from_env(COUNTER_FACTORIES)
+
+# Sessions on /process-landmarks send client-side pose results, so their counters
+# never load a pose graph; they are kept apart from the frame sessions above.
+landmark_session_registry = CounterSessionRegistry.from_env({
+    workout_type: lazy_counter_factory(workout_type, pose_graph=False, exercises=EXERCISES)
+    for workout_type in COUNTER_FACTORIES
+})
+
+# /process-landmarks-batch counts many landmark sessions per request with their state
+# held as NumPy columns (one batch counter per exercise, up to BATCH_MAX_SESSIONS
+# sessions each); at most BATCH_MAX_FRAMES frames per request. Batches name their
+# exercise ("auto" is not available there).
+landmark_batch = LandmarkBatchIngest.from_env(EXERCISES)
+BATCH_MAX_FRAMES = int(os.getenv("BATCH_MAX_FRAMES", "10000"))
+
+# POSE_BACKEND=processes runs pose inference in a pool of POSE_WORKERS worker
+# processes (one per core by default) with sessions pinned to a worker; the default
+# "threads" backend runs it in this process.
+POSE_BACKEND = os.getenv("POSE_BACKEND", "threads").lower()
+pose_worker_pool = None
+if POSE_BACKEND == "processes":
+    from pose_worker_pool import PoseWorkerPool
+    pose_worker_pool = PoseWorkerPool.from_env(tuple(COUNTER_FACTORIES))
+
+# Pose inference and JPEG work run on a bounded thread pool (FRAME_WORKERS threads,
+# at most FRAME_QUEUE_DEPTH frames in flight) so the event loop stays responsive.
+# Each session keeps at most one waiting frame; newer frames replace older ones.
+# With the process backend the threads only wait on workers, one per worker process.
+frame_executor = FrameExecutor.from_env(default_workers=pose_worker_pool.size if pose_worker_pool else None)
+
+# Pose graphs are warmed on a background thread after startup; /ready reports when done.
+# Auto sessions reuse the exercises' counters and pooled graphs, so only those are warmed.
+readiness = Readiness(EXERCISES)
+
+# Uploaded workout videos are counted in the background on VIDEO_WORKERS threads
+video_jobs = VideoJobManager.from_env(COUNTER_FACTORIES)
+MAX_VIDEO_UPLOAD_BYTES = int(float(os.getenv("MAX_VIDEO_UPLOAD_MB", "200")) * 1024 * 1024)
+VIDEO_UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Multipart boundaries and the small form fields on top of the video itself
+VIDEO_FORM_OVERHEAD_BYTES = 64 * 1024
+
+# Per-stage frame latency histograms, exposed for Prometheus on /metrics. The
+# middleware stamps request arrival so the multipart upload/parse can be timed.
+app.add_middleware(RequestTimingMiddleware)
+
 # ============================================
 # HUGGING FACE CONFIGURATION
 # ============================================
@@ -65,6 +123,7 @@ if os.getenv("ENVIRONMENT") == "production" and allowed_origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Workout-Result"],
     )
 else:
     # Development: allow all origins
@@ -73,6 +132,7 @@ else:
         allow_origins=["*"],
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Workout-Result"],
     )
 
 
@@ -81,6 +141,19 @@ def home():
     return {"status": "Backend running!"}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once the enabled exercises' pose graphs are warmed up, 503 before"""
+    status = readiness.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    # Runs off the event loop so / and /ready answer while graphs load
+    asyncio.get_running_loop().run_in_executor(None, readiness.warm_up, pose_worker_pool)
+
+
 @app.get("/debug/env")
 def debug_env():
     """Debug endpoint to check environment variables"""
@@ -98,60 +171,182 @@ def debug_env():
     }
 
 
-def process_frame_with_counter(workout_type: str, frame):
+def process_frame_with_counter(
+    session_id: str,
+    workout_type: str,
+    file_content: bytes,
+    response_mode: str = "frame",
+    image_format: str = "jpeg",
+    quality: int = None,
+    max_dim: int = None,
+    timings: dict = None,
+    timestamp: float = None
+):
     """
-    Process a frame using the persistent counter instance.
+    Process a frame using the session's persistent counter instance.
     This maintains state between frames (counter value, buffers, etc.)
+    Runs on a frame executor thread. Returns (image_bytes, result).
+    Per-stage seconds are added to timings, if given. timestamp is the
+    client's capture time in seconds (the counter times reps on it).
     """
-    if workout_type not in exercise_counters:
-        raise ValueError(f"Unknown workout type: {workout_type}")
-    
-    counter = exercise_counters[workout_type]
-    
-    # Process the frame (this updates the counter state internally)
-    processed_frame = counter.process_frame(frame)
-    
-    # Encode processed frame to JPEG
-    _, jpeg = cv2.imencode(".jpg", processed_frame)
-    
-    # Return result with current counter state
-    return {
-        "frame": jpeg.tobytes().hex(),
-        "count": counter.counter,
-        "stage": counter.stage,
-        "avg_speed": counter.avg_speed,
-        "good_reps": counter.good_reps,
-        "bad_reps": counter.bad_reps,
-    }
+    timings = {} if timings is None else timings
+    if pose_worker_pool is not None:
+        image_bytes, result = pose_worker_pool.process_frame(
+            session_id, workout_type, file_content, response_mode, image_format, quality, max_dim, timestamp
+        )
+        # Measured in the worker process
+        timings.update(result.pop("stage_seconds", {}))
+    else:
+        with session_registry.use_counter(session_id, workout_type) as counter:
+            image_bytes, result = run_frame_pipeline(
+                counter, file_content, response_mode, image_format, quality, max_dim, timings, timestamp
+            )
+    result["frames_dropped"] = session_registry.frames_dropped(session_id)
+    return image_bytes, result
+
+
+def count_landmarks_with_counter(session_id: str, workout_type: str, landmarks, width: int, height: int,
+                                 timestamp: float = None):
+    """
+    Runs one frame of client-side landmarks through the session's landmark counter.
+    With a client timestamp (seconds) rep timings follow the client's capture clock.
+    """
+    with landmark_session_registry.use_counter(session_id, workout_type) as counter:
+        use_capture_clock(counter, timestamp)
+        return run_landmarks_counting(counter, landmarks, width, height)
+
+
+def reset_session_counter(session_id: str, workout_type: str):
+    """Resets a session's counter, in this process or on its pose worker."""
+    if pose_worker_pool is not None:
+        pose_worker_pool.reset_counter(session_id, workout_type)
+    else:
+        session_registry.reset_counter(session_id, workout_type)
+
+
+def dropped_frame_result(session_id: str, workout_type: str):
+    """Result for a frame that was replaced by a newer one before it was processed."""
+    frame_metrics.record_dropped(workout_type)
+    return {"dropped": True, "frames_dropped": session_registry.record_dropped_frame(session_id)}
+
+
+def record_frame_metrics(workout_type: str, timings: dict, result: dict, received_at: float):
+    """Records a processed frame's stage timings; frames that failed to decode are skipped."""
+    if "error" in result:
+        return
+    timings["total"] = time.perf_counter() - received_at
+    frame_metrics.observe_frame(workout_type, timings)
+
+
+def validate_image_options(quality: int, max_dim: int):
+    """Returns an error message for out-of-range encoding options, or None."""
+    if quality is not None and not 1 <= quality <= 100:
+        return "quality must be between 1 and 100"
+    if max_dim is not None and max_dim < 32:
+        return "max_dim must be at least 32 pixels"
+    return None
+
+
+def build_frame_response(output_encoding: str, image_bytes: bytes, result: dict):
+    """Wraps a pipeline result in the negotiated output encoding."""
+    if image_bytes is None or output_encoding == "json":
+        if image_bytes is not None:
+            # Legacy format: annotated frame hex-encoded inside the JSON
+            result = {"frame": image_bytes.hex(), **result}
+        return result
+
+    if output_encoding == "multipart":
+        body, content_type = build_multipart(result, image_bytes, IMAGE_MEDIA_TYPES["jpeg"])
+        return Response(content=body, media_type=content_type)
+
+    return Response(
+        content=image_bytes,
+        media_type=IMAGE_MEDIA_TYPES[output_encoding],
+        headers={"X-Workout-Result": json.dumps(result, separators=(",", ":"))}
+    )
 
 
 @app.post("/process-frame")
 async def process_frame(
+    request: Request,
     file: UploadFile,
-    workout_type: str = Form(...)
+    workout_type: str = Form(...),
+    session_id: str = Form("default"),
+    response_mode: str = Form("frame"),
+    output_encoding: str = Form(None),
+    quality: int = Form(None),
+    max_dim: int = Form(None),
+    timestamp: float = Form(None)
 ):
+    """
+    Count reps on one camera frame. response_mode="frame" (default) returns the
+    annotated JPEG; response_mode="landmarks" skips drawing and JPEG encoding and
+    returns the pose landmarks and joint angles instead.
+
+    workout_type="auto" detects the exercise from the pose: one pose inference
+    per frame feeds every enabled exercise's counter, and results add "exercise"
+    (None until detected) and "counts" (reps per exercise); "count" is then the
+    total over all exercises.
+
+    The annotated frame is returned hex-encoded in JSON unless a compact encoding
+    is requested via output_encoding or the Accept header: "jpeg"/"webp" return
+    the raw image with the counter state in the X-Workout-Result header, and
+    "multipart" returns multipart/mixed with a JSON part and an image part.
+    quality (1-100) and max_dim (longest side, pixels) apply to the output image.
+
+    timestamp is the frame's capture time in seconds on any monotonic client
+    clock (e.g. performance.now() / 1000). With it, rep timings, holds and
+    movement speeds follow the camera rather than when frames reach the server,
+    so low or uneven frame rates count correctly. Without it the server clock is used.
+
+    Each session has a single waiting slot: if a newer frame arrives while this
+    one is still waiting, this request returns {"dropped": true, "frames_dropped": n}
+    and the newer frame is processed instead. Every result carries frames_dropped.
+    """
+    received_at = getattr(request.state, "received_at", None) or time.perf_counter()
     try:
-        if workout_type not in ["lunges", "pushups", "squats"]:
+        if workout_type not in COUNTER_FACTORIES:
             return {"error": "Invalid workout type"}
+        if response_mode not in RESPONSE_MODES:
+            return {"error": f"Invalid response mode, expected one of {list(RESPONSE_MODES)}"}
+        encoding = negotiate_output_encoding(output_encoding, request.headers.get("accept"))
+        if encoding is None:
+            return {"error": "Invalid output encoding, expected one of json, jpeg, webp, multipart"}
+        options_error = validate_image_options(quality, max_dim)
+        if options_error:
+            return {"error": options_error}
+        try:
+            timestamp = decode_timestamp(timestamp)
+        except ValueError as e:
+            return {"error": str(e)}
 
         # Read the incoming image
         file_content = await file.read()
         if not file_content:
             return {"error": "Empty file received"}
-        
-        image_bytes = np.frombuffer(file_content, np.uint8)
-        frame = cv2.imdecode(image_bytes, cv2.IMREAD_COLOR)
-        
-        if frame is None:
-            return {"error": "Failed to decode image"}
+        timings = {"read": time.perf_counter() - received_at}
 
-        # Process frame using persistent counter instance (maintains state between frames)
-        result = process_frame_with_counter(workout_type, frame)
+        # Decode, pose inference and encoding run off the event loop, in order per
+        # session; a stale frame still waiting when a newer one arrives is dropped
+        image_format = "webp" if encoding == "webp" else "jpeg"
+        image_bytes, result = await frame_executor.submit(
+            session_id, process_frame_with_counter, session_id, workout_type, file_content,
+            response_mode, image_format, quality, max_dim, timings, timestamp, latest_only=True
+        )
         
         if not result:
             return {"error": "Processing returned empty result"}
 
-        return result
+        start = time.perf_counter()
+        response = build_frame_response(encoding, image_bytes, result)
+        if image_bytes is not None:
+            timings["encode"] = timings.get("encode", 0.0) + time.perf_counter() - start
+        record_frame_metrics(workout_type, timings, result, received_at)
+        return response
+    except FrameDropped:
+        return dropped_frame_result(session_id, workout_type)
+    except FrameExecutorOverloaded as e:
+        return JSONResponse(status_code=503, content={"error": f"Server busy, frame dropped: {str(e)}"})
     except Exception as e:
         import traceback
         print(f"Error processing frame: {str(e)}")
@@ -159,24 +354,137 @@ async def process_frame(
         return {"error": f"Internal server error: {str(e)}"}
 
 
+@app.post("/process-landmarks")
+async def process_landmarks(
+    request: Request,
+    workout_type: str = None,
+    session_id: str = "default",
+    width: int = 640,
+    height: int = 480,
+    timestamp: float = None
+):
+    """
+    Count reps from pose landmarks computed on the device, with no image upload.
+
+    Send either JSON:
+      {"workout_type": "squats", "session_id": "...", "landmarks": [[x, y, z, visibility], ...],
+       "width": 640, "height": 480, "timestamp": 12.345}
+    with 33 landmarks (nested or as 132 flat numbers, x/y normalized to the frame,
+    null when no pose was found), or a binary body (Content-Type
+    application/octet-stream) of 33 x 4 little-endian float32 (528 bytes, empty
+    for no pose) with the other fields as query parameters. width/height are the
+    camera frame size (pixel-based form checks use it); timestamp is the capture
+    time in seconds and, if sent, should be sent with every frame of the session.
+
+    Returns count, stage, good/bad reps, avg_speed, ready, form feedback and angles.
+    With workout_type "auto" the exercise is detected (see /process-frame).
+    """
+    try:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            body = await request.json()
+            if not isinstance(body, dict):
+                raise ValueError("JSON body must be an object")
+            workout_type = body.get("workout_type", workout_type)
+            session_id = body.get("session_id", session_id)
+            width = int(body.get("width", width))
+            height = int(body.get("height", height))
+            timestamp = body.get("timestamp", timestamp)
+            raw_landmarks = body.get("landmarks")
+        else:
+            raw_landmarks = await request.body()
+        if workout_type not in COUNTER_FACTORIES:
+            return {"error": "Invalid workout type"}
+        if width < 1 or height < 1:
+            raise ValueError("width and height must be positive")
+        landmarks = decode_landmarks(raw_landmarks)
+        timestamp = decode_timestamp(timestamp)
+    except (ValueError, TypeError) as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    try:
+        # In order per session, off the event loop (the counting itself takes well under 1 ms)
+        return await frame_executor.submit(
+            f"landmarks:{session_id}", count_landmarks_with_counter,
+            session_id, workout_type, landmarks, width, height, timestamp
+        )
+    except FrameExecutorOverloaded as e:
+        return JSONResponse(status_code=503, content={"error": f"Server busy: {str(e)}"})
+    except Exception as e:
+        import traceback
+        print(f"Error processing landmarks: {str(e)}")
+        print(traceback.format_exc())
+        return {"error": f"Internal server error: {str(e)}"}
+
+
+@app.post("/process-landmarks-batch")
+async def process_landmarks_batch(request: Request):
+    """
+    Count reps for many landmark sessions in one request, one frame per entry.
+    Meant for gateways that relay client-side pose results for thousands of
+    sessions: the batch is counted in a few vectorized steps per exercise.
+
+    JSON body:
+      {"workout_type": "squats", "width": 640, "height": 480,
+       "frames": [{"session_id": "a", "landmarks": [...], "timestamp": 12.345}, ...]}
+    Each frame takes the same fields as /process-landmarks; top-level
+    workout_type/width/height are defaults for frames that leave them out.
+
+    Or multipart/form-data with a "frames" field holding the same JSON without
+    landmarks ("pose": false marks a frame with no pose) and a "landmarks" file:
+    the poses of the remaining frames, in order, as 33 x 4 little-endian float32
+    each (528 bytes per frame).
+
+    A session sent several times in one batch has its frames counted in order.
+    These sessions are independent of /process-landmarks sessions.
+    Returns {"results": [...]}, one per frame in order, each as returned by
+    /process-landmarks plus its session_id.
+    """
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form()
+            landmarks_file = form.get("landmarks")
+            payload = await landmarks_file.read() if landmarks_file is not None else b""
+            frames = parse_binary_batch(form.get("frames") or "", payload, EXERCISES, BATCH_MAX_FRAMES)
+        else:
+            frames = parse_json_batch(await request.json(), EXERCISES, BATCH_MAX_FRAMES)
+    except (ValueError, TypeError) as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    try:
+        # One batch at a time, off the event loop
+        results = await frame_executor.submit("landmarks-batch", landmark_batch.count, frames)
+        return {"results": results}
+    except FrameExecutorOverloaded as e:
+        return JSONResponse(status_code=503, content={"error": f"Server busy: {str(e)}"})
+    except Exception as e:
+        import traceback
+        print(f"Error processing landmark batch: {str(e)}")
+        print(traceback.format_exc())
+        return {"error": f"Internal server error: {str(e)}"}
+
+
 @app.post("/reset-counter")
-async def reset_counter(workout_type: str = Form(...)):
+async def reset_counter(workout_type: str = Form(...), session_id: str = Form("default")):
     """
-    Reset a specific counter's state (useful when starting a new workout session)
+    Reset a session's counter state (useful when starting a new workout session).
+    Only the rep state is cleared; the session keeps its warmed pose graph.
     """
     try:
-        if workout_type not in exercise_counters:
+        if workout_type not in COUNTER_FACTORIES:
             return {"error": "Invalid workout type"}
         
-        # Recreate the counter instance (resets all state)
-        if workout_type == "squats":
-            exercise_counters[workout_type] = FinalSquatCounter()
-        elif workout_type == "pushups":
-            exercise_counters[workout_type] = FinalBalancedPushUpCounter()
-        elif workout_type == "lunges":
-            exercise_counters[workout_type] = FinalLungeCounter()
+        # Recreate the session's counter instance (resets all state). Queued behind the
+        # session's in-flight frames so a reset never races a frame being processed.
+        await frame_executor.submit(session_id, reset_session_counter, session_id, workout_type)
+        # Sessions counting client-side landmarks are reset the same way
+        await frame_executor.submit(
+            f"landmarks:{session_id}", landmark_session_registry.reset_counter, session_id, workout_type
+        )
+        await frame_executor.submit("landmarks-batch", landmark_batch.reset_session, session_id, workout_type)
         
-        return {"status": "Counter reset successfully", "workout_type": workout_type}
+        return {"status": "Counter reset successfully", "workout_type": workout_type, "session_id": session_id}
+    except FrameExecutorOverloaded as e:
+        return JSONResponse(status_code=503, content={"error": f"Server busy: {str(e)}"})
     except Exception as e:
         import traceback
         print(f"Error resetting counter: {str(e)}")
@@ -184,6 +492,291 @@ async def reset_counter(workout_type: str = Form(...)):
         return {"error": f"Internal server error: {str(e)}"}
 
 
+@app.post("/process-video")
+async def process_video(request: Request):
+    """
+    Count reps in a recorded workout video, sent as multipart form fields file,
+    workout_type, stride (default 1) and max_dim (default 640). The upload is
+    streamed to a temp file and counted in the background; poll
+    /video-jobs/{job_id} for progress and the result (count, good/bad reps and
+    per-rep timings). stride=k counts every k-th frame only; frames are
+    downscaled to max_dim (longest side) before pose inference.
+
+    The size limit and the job queue are checked from the headers, before the
+    body is read: the form parser would otherwise spool the whole upload first.
+    """
+    try:
+        content_length = int(request.headers["content-length"])
+    except KeyError:
+        return JSONResponse(status_code=411, content={"error": "Content-Length required"})
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "Invalid Content-Length"})
+    if content_length > MAX_VIDEO_UPLOAD_BYTES + VIDEO_FORM_OVERHEAD_BYTES:
+        return JSONResponse(status_code=413, content={
+            "error": f"Video larger than {MAX_VIDEO_UPLOAD_BYTES // (1024 * 1024)} MB"})
+    if video_jobs.full():
+        return JSONResponse(status_code=503, content={"error": "Server busy: too many video jobs queued"})
+
+    form = await request.form()
+    file = form.get("file")
+    workout_type = form.get("workout_type")
+    try:
+        stride = int(form.get("stride", 1))
+        max_dim = int(form.get("max_dim", 640))
+    except (TypeError, ValueError):
+        stride = max_dim = None
+    if file is None or isinstance(file, str) or stride is None:
+        await form.close()
+        return JSONResponse(status_code=400, content={
+            "error": "Expected a file upload and integer stride and max_dim"})
+
+    try:
+        if workout_type not in COUNTER_FACTORIES:
+            return {"error": "Invalid workout type"}
+        if stride < 1:
+            return {"error": "stride must be at least 1"}
+        options_error = validate_image_options(None, max_dim)
+        if options_error:
+            return {"error": options_error}
+
+        suffix = os.path.splitext(file.filename or "")[1] or ".mp4"
+        upload = tempfile.NamedTemporaryFile(prefix="workout-video-", suffix=suffix, delete=False)
+        try:
+            size = 0
+            with upload:
+                while True:
+                    chunk = await file.read(VIDEO_UPLOAD_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > MAX_VIDEO_UPLOAD_BYTES:
+                        raise ValueError(f"Video larger than {MAX_VIDEO_UPLOAD_BYTES // (1024 * 1024)} MB")
+                    # Disk writes off the event loop
+                    await run_in_threadpool(upload.write, chunk)
+            if size == 0:
+                raise ValueError("Empty file received")
+        except ValueError as e:
+            os.unlink(upload.name)
+            return JSONResponse(status_code=400, content={"error": str(e)})
+    finally:
+        await form.close()
+
+    try:
+        job = video_jobs.submit(upload.name, workout_type, stride, max_dim)
+    except VideoQueueFull as e:
+        os.unlink(upload.name)
+        return JSONResponse(status_code=503, content={"error": f"Server busy: {str(e)}"})
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+
+@app.get("/video-jobs/{job_id}")
+def video_job_status(job_id: str):
+    """Progress of a video job, with the rep summary once it is done"""
+    job = video_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired video job"})
+    return job.to_dict()
+
+
+def pack_stream_result(result: dict, image_bytes: bytes = None) -> bytes:
+    """
+    Binary WebSocket result: a 4-byte big-endian header length, the UTF-8 JSON
+    header (counter state), then the raw annotated image (if any).
+    """
+    header = json.dumps(result, separators=(",", ":")).encode("utf-8")
+    return struct.pack(">I", len(header)) + header + (image_bytes or b"")
+
+
+def unpack_stream_frame(message: bytes):
+    """
+    Splits a timestamped WebSocket frame message: an 8-byte big-endian float64
+    capture time in seconds, then the JPEG. Returns (frame_bytes, timestamp).
+    """
+    if len(message) <= 8:
+        raise ValueError("Frame message too short for a timestamp")
+    (timestamp,) = struct.unpack(">d", message[:8])
+    return message[8:], decode_timestamp(timestamp)
+
+
+@app.websocket("/ws/workout")
+async def workout_stream(
+    websocket: WebSocket,
+    workout_type: str = "squats",
+    session_id: str = None,
+    format: str = "json",
+    mode: str = "frame",
+    image_format: str = "jpeg",
+    quality: int = None,
+    max_dim: int = None,
+    timestamps: bool = False
+):
+    """
+    Live workout stream over a single connection.
+
+    The client sends each camera frame as a binary JPEG message and receives one
+    result per frame: a JSON text message (same fields as /process-frame) when
+    format=json, or a compact binary message (see pack_stream_result) when
+    format=binary. With mode=landmarks no annotated frame is drawn or sent back,
+    only the counter state plus landmarks and angles. image_format (jpeg/webp),
+    quality and max_dim control the returned image. With timestamps=true each frame
+    message starts with its capture time (see unpack_stream_frame), which the
+    counter uses for rep timing. Text messages are control commands:
+      {"type": "reset"}                            - reset the session's counter
+      {"type": "config", "workout_type": "lunges"} - switch exercise
+    With workout_type=auto the exercise is detected from the pose instead.
+    The session's counter and pose graph are shared with /process-frame.
+
+    Frames are read while earlier ones are still processing. A frame that is
+    still waiting when a newer one arrives is answered with {"dropped": true}
+    right away, so results never lag further behind than one frame.
+    """
+    await websocket.accept()
+    session_id = session_id or uuid.uuid4().hex
+    binary = format == "binary"
+
+    async def send_result(result: dict, image_bytes: bytes = None, timings: dict = None):
+        start = time.perf_counter()
+        if binary:
+            message = pack_stream_result(result, image_bytes)
+        else:
+            if image_bytes is not None:
+                result = {"frame": image_bytes.hex(), **result}
+            message = json.dumps(result)
+        if timings is not None and image_bytes is not None:
+            timings["encode"] = timings.get("encode", 0.0) + time.perf_counter() - start
+        if binary:
+            await websocket.send_bytes(message)
+        else:
+            await websocket.send_text(message)
+
+    options_error = validate_image_options(quality, max_dim)
+    if workout_type not in COUNTER_FACTORIES or mode not in RESPONSE_MODES or image_format not in IMAGE_MEDIA_TYPES:
+        options_error = "Invalid workout type, mode or image format"
+    if options_error:
+        await send_result({"error": options_error})
+        await websocket.close(code=1008)
+        return
+
+    await websocket.send_text(json.dumps({
+        "type": "ready", "session_id": session_id, "workout_type": workout_type,
+        "format": format, "mode": mode
+    }))
+
+    async def handle_frame(frame_bytes: bytes, frame_workout_type: str, received_at: float, timestamp: float = None):
+        timings = {}
+        try:
+            image_bytes, result = await frame_executor.submit(
+                session_id, process_frame_with_counter, session_id, frame_workout_type, frame_bytes,
+                mode, image_format, quality, max_dim, timings, timestamp, latest_only=True
+            )
+        except FrameDropped:
+            image_bytes, result, timings = None, dropped_frame_result(session_id, frame_workout_type), None
+        except FrameExecutorOverloaded as e:
+            image_bytes, result, timings = None, {"error": f"Server busy, frame dropped: {str(e)}"}, None
+        except Exception as e:
+            print(f"Error processing stream frame: {str(e)}")
+            image_bytes, result, timings = None, {"error": f"Internal server error: {str(e)}"}, None
+        try:
+            await send_result(result, image_bytes, timings)
+        except Exception:
+            # Client went away while the frame was processing
+            pass
+        if timings is not None:
+            record_frame_metrics(frame_workout_type, timings, result, received_at)
+
+    frame_tasks = set()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                received_at = time.perf_counter()
+                frame_bytes, timestamp = message["bytes"], None
+                if timestamps:
+                    try:
+                        frame_bytes, timestamp = unpack_stream_frame(frame_bytes)
+                    except ValueError as e:
+                        await send_result({"error": str(e)})
+                        continue
+                # The executor keeps frames in order per session and drops stale waiting ones
+                task = asyncio.create_task(handle_frame(frame_bytes, workout_type, received_at, timestamp))
+                frame_tasks.add(task)
+                task.add_done_callback(frame_tasks.discard)
+                continue
+
+            try:
+                command = json.loads(message.get("text") or "{}")
+            except json.JSONDecodeError:
+                await websocket.send_text(json.dumps({"error": "Invalid control message"}))
+                continue
+
+            if command.get("type") == "reset":
+                await frame_executor.submit(session_id, reset_session_counter, session_id, workout_type)
+                await websocket.send_text(json.dumps({"type": "reset", "workout_type": workout_type}))
+            elif command.get("type") == "config" and command.get("workout_type") in COUNTER_FACTORIES:
+                workout_type = command["workout_type"]
+                await websocket.send_text(json.dumps({"type": "config", "workout_type": workout_type}))
+            else:
+                await websocket.send_text(json.dumps({"error": "Unknown control message"}))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        import traceback
+        print(f"Error in workout stream: {str(e)}")
+        print(traceback.format_exc())
+    finally:
+        for task in frame_tasks:
+            task.cancel()
+
+
+@app.get("/sessions/stats")
+def session_stats():
+    """Live-session count and memory footprint of the counter registry"""
+    stats = {
+        **session_registry.stats(),
+        "pose_backend": POSE_BACKEND,
+        "executor": frame_executor.stats(),
+        "video_jobs": video_jobs.stats(),
+        "pose_graphs": shared_graph_pool.stats(),
+        "landmark_sessions": landmark_session_registry.live_sessions(),
+        "landmark_batch": landmark_batch.stats(),
+    }
+    if pose_worker_pool is not None:
+        stats["pose_workers"] = pose_worker_pool.stats()
+    return stats
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: per-stage frame latency histograms by exercise, frame and drop counts, fps"""
+    if pose_worker_pool is not None:
+        active_sessions = pose_worker_pool.live_sessions()
+    else:
+        active_sessions = session_registry.live_sessions()
+    gauges = {
+        "kinova_active_sessions": ("Live counter sessions", active_sessions),
+        "kinova_active_landmark_sessions": ("Live sessions sending client-side landmarks",
+                                            landmark_session_registry.live_sessions()),
+        "kinova_active_batch_sessions": ("Live sessions on the batch landmark endpoint",
+                                         landmark_batch.live_sessions()),
+        "kinova_frames_in_flight": ("Frames queued or processing", frame_executor.pending),
+        "kinova_ready": ("1 once pose graphs are warmed up", int(readiness.ready)),
+    }
+    return Response(content=frame_metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+@app.on_event("shutdown")
+def shutdown_frame_executor():
+    frame_executor.shutdown()
+    video_jobs.shutdown()
+    if pose_worker_pool is not None:
+        pose_worker_pool.close()
+    shared_graph_pool.close()
+
+
 # Chatbot request/response models
 class ChatbotRequest(BaseModel):
     message: str
@@ -0,0 +1,132 @@
+"""
+Per-stage latency metrics for the frame pipeline, in Prometheus text format.
+
+Every processed frame records how long each stage took, by exercise:
+  read    - request body upload and multipart parsing, up to the file bytes
+  decode  - cv2.imdecode
+  convert - BGR->RGB cvtColor before inference
+  pose    - MediaPipe pose.process
+  count   - the counter's rep logic (everything in process_frame not listed here)
+  draw    - landmark and text overlay
+  encode  - cv2.imencode plus hex/multipart serialization of the response
+  total   - request arrival to response built
+Stages that do not run for a frame (draw and encode in landmarks mode) are not
+recorded. Histograms are plain counts behind one lock taken once per frame, so
+recording costs a few microseconds; /metrics renders them on scrape.
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict, deque
+
+# Seconds; spans a fast JPEG decode up to a slow heavy-model inference
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    """Fixed-bucket histogram. Not thread-safe on its own; FrameMetrics holds the lock."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class FrameMetrics:
+    """Stage histograms, frame and drop counters per exercise, plus a recent frames/sec rate."""
+
+    def __init__(self, fps_window=10.0):
+        self.fps_window = fps_window
+        self._histograms = defaultdict(Histogram)  # (stage, exercise) -> Histogram
+        self._frames = defaultdict(int)
+        self._dropped = defaultdict(int)
+        self._recent = defaultdict(deque)  # exercise -> frame completion times within fps_window
+        self._lock = threading.Lock()
+
+    def observe_frame(self, exercise, timings):
+        """Records one processed frame. timings maps stage name to seconds."""
+        now = time.monotonic()
+        with self._lock:
+            for stage, seconds in timings.items():
+                self._histograms[(stage, exercise)].observe(seconds)
+            self._frames[exercise] += 1
+            recent = self._recent[exercise]
+            recent.append(now)
+            self._trim(recent, now)
+
+    def record_dropped(self, exercise):
+        with self._lock:
+            self._dropped[exercise] += 1
+
+    def _trim(self, recent, now):
+        cutoff = now - self.fps_window
+        while recent and recent[0] < cutoff:
+            recent.popleft()
+
+    def frames_per_second(self):
+        now = time.monotonic()
+        with self._lock:
+            rates = {}
+            for exercise, recent in self._recent.items():
+                self._trim(recent, now)
+                rates[exercise] = len(recent) / self.fps_window
+            return rates
+
+    def render(self, gauges=None):
+        """Prometheus text exposition. gauges maps metric name to (help, value) for point-in-time values."""
+        fps = self.frames_per_second()
+        lines = [
+            "# HELP kinova_frame_stage_seconds Time spent in each frame pipeline stage",
+            "# TYPE kinova_frame_stage_seconds histogram",
+        ]
+        with self._lock:
+            for (stage, exercise), histogram in sorted(self._histograms.items()):
+                labels = f'stage="{stage}",exercise="{exercise}"'
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'kinova_frame_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'kinova_frame_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"kinova_frame_stage_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"kinova_frame_stage_seconds_count{{{labels}}} {histogram.count}")
+            frames = dict(self._frames)
+            dropped = dict(self._dropped)
+
+        lines += ["# HELP kinova_frames_total Frames processed", "# TYPE kinova_frames_total counter"]
+        lines += [f'kinova_frames_total{{exercise="{exercise}"}} {count}' for exercise, count in sorted(frames.items())]
+        lines += ["# HELP kinova_frames_dropped_total Frames replaced by a newer frame before processing",
+                  "# TYPE kinova_frames_dropped_total counter"]
+        lines += [f'kinova_frames_dropped_total{{exercise="{exercise}"}} {count}' for exercise, count in sorted(dropped.items())]
+        lines += [f"# HELP kinova_frames_per_second Frames processed per second over the last {self.fps_window:g} s",
+                  "# TYPE kinova_frames_per_second gauge"]
+        lines += [f'kinova_frames_per_second{{exercise="{exercise}"}} {rate:.2f}' for exercise, rate in sorted(fps.items())]
+        for name, (help_text, value) in (gauges or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+class RequestTimingMiddleware:
+    """
+    Stamps each HTTP request with its arrival time (request.state.received_at), so
+    endpoints can time the body upload and multipart parsing that FastAPI does
+    before the handler runs. Plain ASGI, so it adds a single call per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+# Shared by the HTTP and WebSocket endpoints in this process
+frame_metrics = FrameMetrics()
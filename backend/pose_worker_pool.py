@@ -0,0 +1,185 @@
+"""
+Session-affine pool of pose worker processes.
+
+One Python process running MediaPipe saturates a single core after a few
+sessions, so POSE_BACKEND=processes spreads sessions over N long-lived worker
+processes (workers/pose_worker.py), one per core by default. Sessions are
+pinned to a worker by consistent hashing: landmark smoothing and the counters'
+buffers need every frame of a session on the same graph.
+
+When a worker dies, or hangs past POSE_WORKER_TIMEOUT_S, its sessions are
+rehashed onto the surviving workers (only that worker's sessions move) and a
+replacement is started in the background; once it is up, its share of the hash
+ring returns to it. Sessions that move start over with fresh counters on their
+new worker.
+"""
+
+import bisect
+import hashlib
+import os
+import threading
+
+from workers.client import PoseWorkerError, PoseWorkerProcess
+
+
+def _ring_hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring over worker slots, with virtual nodes for an even spread."""
+
+    def __init__(self, virtual_nodes=64):
+        self.virtual_nodes = virtual_nodes
+        self._hashes = []
+        self._slots = []
+
+    def add(self, slot):
+        for replica in range(self.virtual_nodes):
+            point = _ring_hash(f"worker-{slot}#{replica}")
+            index = bisect.bisect(self._hashes, point)
+            self._hashes.insert(index, point)
+            self._slots.insert(index, slot)
+
+    def remove(self, slot):
+        keep = [(point, owner) for point, owner in zip(self._hashes, self._slots) if owner != slot]
+        self._hashes = [point for point, _ in keep]
+        self._slots = [owner for _, owner in keep]
+
+    def lookup(self, key):
+        """Returns the slot owning a key, or None if the ring is empty."""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _ring_hash(key)) % len(self._hashes)
+        return self._slots[index]
+
+    def __contains__(self, slot):
+        return slot in self._slots
+
+
+class PoseWorkerPool:
+    """N pose worker processes with sessions pinned by consistent hashing."""
+
+    def __init__(self, size=None, exercises=("squats", "pushups", "lunges"), virtual_nodes=64):
+        self.size = size or os.cpu_count() or 1
+        self.exercises = tuple(exercises)
+        self._ring = HashRing(virtual_nodes)
+        self._workers = {}
+        self._lock = threading.Lock()
+        self.restarts = 0
+        for slot in range(self.size):
+            self._workers[slot] = self._spawn()
+            self._ring.add(slot)
+        print(f"Started {self.size} pose worker processes")
+
+    @classmethod
+    def from_env(cls, exercises=("squats", "pushups", "lunges")):
+        """Builds a pool configured from environment variables."""
+        size = os.getenv("POSE_WORKERS")
+        return cls(size=int(size) if size else None, exercises=exercises)
+
+    def _spawn(self):
+        return PoseWorkerProcess(self.exercises)
+
+    def worker_for(self, session_id):
+        """Returns (slot, worker) pinned to a session."""
+        with self._lock:
+            slot = self._ring.lookup(session_id)
+            if slot is None:
+                raise PoseWorkerError("No pose workers available")
+            return slot, self._workers[slot]
+
+    def request(self, session_id, header, payload=b""):
+        """
+        Sends a request to the session's worker. If the worker has died, it is
+        taken off the ring and the request is retried once on the session's new worker.
+        """
+        for attempt in range(2):
+            slot, worker = self.worker_for(session_id)
+            try:
+                return worker.request(header, payload)
+            except PoseWorkerError as e:
+                print(f"Pose worker {slot} (pid {worker.pid}) failed: {e}")
+                self._handle_dead_worker(slot, worker)
+                if attempt == 1:
+                    raise
+
+    def process_frame(self, session_id, workout_type, frame_bytes, response_mode="frame",
+                      image_format="jpeg", quality=None, max_dim=None, timestamp=None):
+        """Runs a frame on the session's worker. Returns (image_bytes or None, result)."""
+        result, image_bytes = self.request(session_id, {
+            "op": "frame",
+            "session_id": session_id,
+            "workout_type": workout_type,
+            "response_mode": response_mode,
+            "image_format": image_format,
+            "quality": quality,
+            "max_dim": max_dim,
+            "timestamp": timestamp,
+        }, frame_bytes)
+        return image_bytes or None, result
+
+    def reset_counter(self, session_id, workout_type):
+        result, _ = self.request(session_id, {"op": "reset", "session_id": session_id, "workout_type": workout_type})
+        if "error" in result:
+            raise ValueError(result["error"])
+        return result
+
+    def ping_all(self):
+        """Waits until every worker answers (workers answer once their graphs are preloaded)."""
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.wait_ready()
+
+    def _handle_dead_worker(self, slot, worker):
+        with self._lock:
+            if self._workers.get(slot) is not worker or slot not in self._ring:
+                return  # Already being replaced
+            # Rebalance: the dead worker's sessions hash to the surviving workers
+            self._ring.remove(slot)
+        worker.close(timeout=1)
+        threading.Thread(target=self._replace_worker, args=(slot,), daemon=True).start()
+
+    def _replace_worker(self, slot):
+        try:
+            replacement = self._spawn()
+            replacement.wait_ready()
+        except Exception as e:
+            print(f"Failed to restart pose worker {slot}: {e}")
+            return
+        with self._lock:
+            self._workers[slot] = replacement
+            self._ring.add(slot)
+            self.restarts += 1
+        print(f"Restarted pose worker {slot} (pid {replacement.pid})")
+
+    def live_sessions(self):
+        """Sessions on the serving workers, as of each worker's latest response."""
+        with self._lock:
+            return sum(worker.live_sessions for slot, worker in self._workers.items() if slot in self._ring)
+
+    def stats(self):
+        """
+        Per-worker liveness and session counts. Counts are the ones reported with
+        each worker's latest response; the workers are not asked, so this never
+        waits behind in-flight frames.
+        """
+        with self._lock:
+            workers = dict(self._workers)
+            in_ring = {slot: slot in self._ring for slot in workers}
+        per_worker = []
+        for slot, worker in sorted(workers.items()):
+            entry = {"slot": slot, "pid": worker.pid, "alive": worker.is_alive(), "in_ring": in_ring[slot]}
+            if entry["alive"] and entry["in_ring"]:
+                entry["live_sessions"] = worker.live_sessions
+                entry["frames_processed"] = worker.frames_processed
+            per_worker.append(entry)
+        return {"size": self.size, "restarts": self.restarts, "workers": per_worker}
+
+    def close(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.close(timeout=2)
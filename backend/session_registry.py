@@ -0,0 +1,310 @@
+"""
+Per-session exercise counter registry.
+
+Every client session gets its own counter instances so concurrent users never
+share rep state or smoothing buffers. Sessions are evicted when they have been
+idle for longer than the TTL, and least-recently-used sessions are evicted first
+when the session cap or the memory cap is reached.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+
+def _read_process_rss_bytes():
+    """Returns the resident set size of this process, or None if unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def estimate_counter_state_bytes(counter):
+    """Estimates the Python-side memory held by a counter's rep state and buffers."""
+    total = sys.getsizeof(counter)
+    for value in vars(counter).values():
+        total += sys.getsizeof(value)
+        if isinstance(value, (list, deque)):
+            total += sum(sys.getsizeof(item) for item in value)
+    # Auto counters hold a counter per exercise
+    for exercise_counter in getattr(counter, "counters", {}).values():
+        total += estimate_counter_state_bytes(exercise_counter)
+    return total
+
+
+class CounterSession:
+    """State owned by a single client session (one counter per workout type)."""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.counters = {}
+        self.created_at = time.time()
+        self.last_seen = self.created_at
+        # Number of frames currently being processed; busy sessions are never evicted
+        self.in_use = 0
+        # Frames replaced by a newer frame before they were processed
+        self.frames_dropped = 0
+
+    def touch(self):
+        self.last_seen = time.time()
+
+
+class CounterSessionRegistry:
+    """Thread-safe registry of counter sessions with idle TTL and LRU eviction."""
+
+    def __init__(self, counter_factories, max_sessions=50, session_ttl=600,
+                 max_memory_mb=None, graph_memory_mb=40):
+        self.counter_factories = counter_factories
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+        # A counter's MediaPipe Pose graph has native memory invisible to sys.getsizeof,
+        # so it is accounted for with a fixed per-counter estimate. Landmark-only
+        # counters (pose_graph=False) hold no graph and are not charged for one.
+        self.graph_memory_bytes = int(graph_memory_mb * 1024 * 1024)
+
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+
+    @classmethod
+    def from_env(cls, counter_factories):
+        """Builds a registry configured from environment variables."""
+        max_memory_mb = os.getenv("SESSION_MEMORY_CAP_MB")
+        return cls(
+            counter_factories,
+            max_sessions=int(os.getenv("MAX_SESSIONS", "50")),
+            session_ttl=float(os.getenv("SESSION_TTL_SECONDS", "600")),
+            max_memory_mb=float(max_memory_mb) if max_memory_mb else None,
+            graph_memory_mb=float(os.getenv("POSE_GRAPH_MEMORY_MB", "40")),
+        )
+
+    def get_counter(self, session_id, workout_type):
+        """Returns the session's counter for a workout type, creating it if needed."""
+        if workout_type not in self.counter_factories:
+            raise ValueError(f"Unknown workout type: {workout_type}")
+
+        self.sweep_expired()
+        with self._lock:
+            counter = self._touch_session(session_id).counters.get(workout_type)
+        if counter is not None:
+            return counter
+
+        # Building a counter can load a pose graph (seconds on a graph pool miss), so it
+        # runs outside the lock: other sessions' frames and stats do not wait for it
+        counter = self.counter_factories[workout_type]()
+        with self._lock:
+            # The session may have been evicted meanwhile, or another request for it
+            # may have inserted a counter first
+            session = self._touch_session(session_id)
+            existing = session.counters.get(workout_type)
+            if existing is None:
+                session.counters[workout_type] = counter
+                evicted = self._enforce_limits(keep=session_id)
+        if existing is None:
+            self._close_sessions(evicted)
+            return counter
+        self._close_counter(counter)
+        return existing
+
+    def _touch_session(self, session_id):
+        """Returns a session, created if needed, marked as most recently used. Call with the lock held."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = CounterSession(session_id)
+            self._sessions[session_id] = session
+        else:
+            self._sessions.move_to_end(session_id)
+        session.touch()
+        return session
+
+    @contextmanager
+    def use_counter(self, session_id, workout_type):
+        """Checks out a session's counter, protecting the session from eviction while in use."""
+        while True:
+            counter = self.get_counter(session_id, workout_type)
+            with self._lock:
+                session = self._sessions.get(session_id)
+                # Unless the session was evicted between the two steps (then build again)
+                if session is not None and session.counters.get(workout_type) is counter:
+                    session.in_use += 1
+                    break
+        try:
+            yield counter
+        finally:
+            with self._lock:
+                session.in_use -= 1
+                session.touch()
+
+    def reset_counter(self, session_id, workout_type):
+        """
+        Clears a session's rep state for a workout type. The counter keeps its pose
+        graph, so starting a new set does not reload the model.
+        """
+        if workout_type not in self.counter_factories:
+            raise ValueError(f"Unknown workout type: {workout_type}")
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            counter = session.counters.get(workout_type) if session is not None else None
+            if counter is not None and hasattr(counter, "reset_state"):
+                counter.reset_state()
+                self._sessions.move_to_end(session_id)
+                session.touch()
+                return counter
+            if counter is not None:
+                session.counters.pop(workout_type)
+        if counter is not None:
+            self._close_counter(counter)
+        return self.get_counter(session_id, workout_type)
+
+    def record_dropped_frame(self, session_id):
+        """Counts a dropped frame for a session. Returns the session's total."""
+        with self._lock:
+            # A session's first frames can be dropped before its counter exists, so this
+            # may create the session, and then it counts against the caps like any other
+            session = self._touch_session(session_id)
+            session.frames_dropped += 1
+            frames_dropped = session.frames_dropped
+            evicted = self._enforce_limits(keep=session_id)
+        self._close_sessions(evicted)
+        return frames_dropped
+
+    def frames_dropped(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.frames_dropped if session is not None else 0
+
+    def live_sessions(self):
+        """Number of sessions that have not expired."""
+        self.sweep_expired()
+        with self._lock:
+            return len(self._sessions)
+
+    def remove_session(self, session_id):
+        """Drops a session and releases its counters. Returns True if it existed."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._close_session(session)
+        return True
+
+    def _close_sessions(self, sessions):
+        """
+        Closes sessions already popped from the registry. Closing hands pose graphs
+        back to the graph pool, so this runs without the lock held.
+        """
+        for session in sessions:
+            self._close_session(session)
+
+    def sweep_expired(self):
+        """Evicts sessions that have been idle for longer than the TTL."""
+        if not self.session_ttl:
+            return 0
+        cutoff = time.time() - self.session_ttl
+        expired = []
+        with self._lock:
+            # OrderedDict is kept in LRU order, so idle sessions are at the front
+            for session_id, session in self._sessions.items():
+                if session.last_seen >= cutoff:
+                    break
+                if not session.in_use:
+                    expired.append(session_id)
+            sessions = [self._sessions.pop(session_id) for session_id in expired]
+            self.evicted_ttl += len(expired)
+        self._close_sessions(sessions)
+        return len(expired)
+
+    def _enforce_limits(self, keep=None):
+        """
+        Evicts least-recently-used sessions until both caps are satisfied. Call with
+        the lock held; returns the evicted sessions, to be closed after releasing it.
+        """
+        evicted = []
+        # Estimated once; each eviction subtracts its session's share
+        memory = self.estimated_memory_bytes() if self.max_memory_bytes else 0
+        while len(self._sessions) > 1 and self._over_limits(memory):
+            session_id = next((sid for sid, session in self._sessions.items()
+                               if sid != keep and not session.in_use), None)
+            if session_id is None:
+                break
+            session = self._sessions.pop(session_id)
+            if self.max_memory_bytes:
+                memory -= self._session_memory_bytes(session)
+            evicted.append(session)
+            self.evicted_lru += 1
+            print(f"Evicted session {session_id} (LRU)")
+        return evicted
+
+    def _over_limits(self, memory):
+        if self.max_sessions and len(self._sessions) > self.max_sessions:
+            return True
+        if self.max_memory_bytes and memory > self.max_memory_bytes:
+            return True
+        return False
+
+    def _session_memory_bytes(self, session):
+        return sum(estimate_counter_state_bytes(counter) + self._graph_memory_bytes(counter)
+                   for counter in session.counters.values())
+
+    def _graph_memory_bytes(self, counter):
+        return self.graph_memory_bytes if getattr(counter, "pose", None) is not None else 0
+
+    def estimated_memory_bytes(self):
+        """Estimated memory held by all live sessions (state plus pose graphs)."""
+        with self._lock:
+            return sum(self._session_memory_bytes(session) for session in self._sessions.values())
+
+    def _close_session(self, session):
+        for counter in session.counters.values():
+            self._close_counter(counter)
+        session.counters.clear()
+
+    @staticmethod
+    def _close_counter(counter):
+        if hasattr(counter, "close"):
+            # Counters hand their pose graph back to the shared graph pool
+            try:
+                counter.close()
+            except Exception as e:
+                print(f"Error closing counter: {e}")
+            return
+        pose = getattr(counter, "pose", None)
+        if pose is not None and hasattr(pose, "close"):
+            try:
+                pose.close()
+            except Exception as e:
+                print(f"Error closing pose graph: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self):
+        """Live-session count and memory footprint, for sizing pods."""
+        self.sweep_expired()
+        with self._lock:
+            counters_by_type = {workout_type: 0 for workout_type in self.counter_factories}
+            for session in self._sessions.values():
+                for workout_type in session.counters:
+                    counters_by_type[workout_type] += 1
+            return {
+                "live_sessions": len(self._sessions),
+                "live_counters": sum(counters_by_type.values()),
+                "counters_by_type": counters_by_type,
+                "estimated_memory_bytes": self.estimated_memory_bytes(),
+                "process_rss_bytes": _read_process_rss_bytes(),
+                "max_sessions": self.max_sessions,
+                "max_memory_bytes": self.max_memory_bytes,
+                "session_ttl_seconds": self.session_ttl,
+                "evicted_ttl": self.evicted_ttl,
+                "evicted_lru": self.evicted_lru,
+            }
@@ -0,0 +1,115 @@
+"""
+Startup warm-up and readiness.
+
+Only the exercises in ENABLED_EXERCISES are loaded, and their counter modules
+(and with them MediaPipe) are imported by the warm-up instead of when main.py
+is imported, so the API answers / straight away. The warm-up builds each
+exercise's pose graph and pushes a synthetic frame through the whole pipeline
+(inference, overlay drawing, JPEG encode); the warmed graphs are parked in the
+graph pool for the first sessions. /ready reports ready only after that, so an
+autoscaled pod takes traffic once its first frame is as fast as the rest.
+"""
+
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from counters import AUTO_WORKOUT, EXERCISES, import_times_ms, load_counter_class
+from frame_encoding import encode_image
+
+PROCESS_START = time.time()
+
+
+def enabled_exercises():
+    """Exercises served by this process, from ENABLED_EXERCISES (default: all)."""
+    configured = os.getenv("ENABLED_EXERCISES")
+    if not configured:
+        return EXERCISES
+    exercises = tuple(exercise.strip() for exercise in configured.split(",") if exercise.strip())
+    unknown = [exercise for exercise in exercises if exercise not in EXERCISES]
+    if unknown:
+        raise ValueError(f"Unknown exercises in ENABLED_EXERCISES: {unknown}")
+    return exercises
+
+
+def served_workout_types(exercises):
+    """The exercises plus "auto" (exercise detection) when there is more than one to tell apart."""
+    return tuple(exercises) + ((AUTO_WORKOUT,) if len(exercises) > 1 else ())
+
+
+def lazy_counter_factory(workout_type, pose_graph=True, exercises=EXERCISES):
+    """
+    A counter factory that imports the counter module on first call. With
+    pose_graph=False the counters only take client-side landmarks. Auto counters
+    choose between the given exercises.
+    """
+    def create_counter():
+        if workout_type == AUTO_WORKOUT:
+            return load_counter_class(workout_type)(pose_graph=pose_graph, exercises=exercises)
+        return load_counter_class(workout_type)(pose_graph=pose_graph)
+    return create_counter
+
+
+def synthetic_frame(width=640, height=480):
+    """A plain test frame with a rough figure on it, for warming up the pipeline."""
+    frame = np.full((height, width, 3), 90, dtype=np.uint8)
+    cx = width // 2
+    # Head, torso and limbs; pose may or may not be found, either way every stage runs
+    cv2.circle(frame, (cx, height // 5), height // 14, (200, 180, 160), -1)
+    cv2.line(frame, (cx, height // 4), (cx, height // 2), (200, 180, 160), height // 20)
+    for dx in (-1, 1):
+        cv2.line(frame, (cx, height // 3), (cx + dx * width // 8, height // 2), (200, 180, 160), height // 40)
+        cv2.line(frame, (cx, height // 2), (cx + dx * width // 12, height * 9 // 10), (200, 180, 160), height // 30)
+    return frame
+
+
+class Readiness:
+    """Warm-up progress and timings, reported by /ready."""
+
+    def __init__(self, exercises):
+        self.exercises = tuple(exercises)
+        self.ready = False
+        self.error = None
+        self.warmup_ms = {}
+        self.ready_after_s = None
+        self._lock = threading.Lock()
+
+    def warm_up(self, pose_worker_pool=None):
+        """Imports and warms every enabled exercise. Safe to run on a background thread."""
+        try:
+            if pose_worker_pool is not None:
+                # Workers preload their own graphs; a ping is answered once they are done
+                start = time.perf_counter()
+                pose_worker_pool.ping_all()
+                self.warmup_ms["pose_workers"] = round((time.perf_counter() - start) * 1000, 1)
+            else:
+                frame = synthetic_frame()
+                for workout_type in self.exercises:
+                    start = time.perf_counter()
+                    counter = load_counter_class(workout_type)()
+                    processed = counter.process_frame(frame.copy())
+                    encode_image(processed)
+                    counter.close()
+                    self.warmup_ms[workout_type] = round((time.perf_counter() - start) * 1000, 1)
+                    print(f"Warmed up {workout_type} in {self.warmup_ms[workout_type]:.0f} ms")
+        except Exception as e:
+            self.error = str(e)
+            print(f"Warm-up failed: {e}")
+            return
+        with self._lock:
+            self.ready = True
+            self.ready_after_s = round(time.time() - PROCESS_START, 2)
+        print(f"Ready after {self.ready_after_s:.2f} s (exercises: {', '.join(self.exercises)})")
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "exercises": list(self.exercises),
+            "import_ms": dict(import_times_ms),
+            "warmup_ms": dict(self.warmup_ms),
+            "ready_after_s": self.ready_after_s,
+            "error": self.error,
+        }
@@ -0,0 +1,273 @@
+"""
+Offline rep counting for uploaded workout videos.
+
+The video is read frame by frame with cv2.VideoCapture from a temp file, so it is
+never held in memory. Frames run through a fresh counter with drawing and JPEG
+encoding skipped, on the video's own clock, so rep timings match the recording
+rather than how fast the server processes it. With stride k only every k-th frame
+is decoded and counted (the others are grabbed and skipped), which trades timing
+resolution for speed. Jobs run on a small dedicated thread pool so uploads do
+not compete with live camera frames, and report progress while they run. Each
+waiting job holds its upload on disk, so at most max_pending jobs may be queued
+or running at once.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from frame_encoding import resize_to_max_dim
+
+
+class VideoQueueFull(Exception):
+    """Raised when max_pending video jobs are already queued or running."""
+
+
+class RepLog:
+    """Records per-rep timing and quality by watching a counter between frames."""
+
+    def __init__(self, counter):
+        self.reps = []
+        self._count = counter.counter
+        self._good = counter.good_reps
+        self._speeds = len(counter.speeds)
+
+    def update(self, counter, timestamp):
+        """Call after each processed frame with the frame's timestamp (seconds)."""
+        while self._count < counter.counter:
+            self._count += 1
+            duration = None
+            if len(counter.speeds) > self._speeds:
+                duration = counter.speeds[self._speeds]
+                self._speeds += 1
+            quality = None
+            if counter.good_reps > self._good:
+                self._good += 1
+                quality = "good"
+            elif counter.good_reps + counter.bad_reps >= self._count:
+                quality = "bad"
+            rep = {
+                "rep": self._count,
+                "start_s": round(timestamp - duration, 3) if duration is not None else None,
+                "end_s": round(timestamp, 3),
+                "duration_s": round(duration, 3) if duration is not None else None,
+                "quality": quality,
+            }
+            if hasattr(counter, "current_leg"):
+                rep["leg"] = counter.current_leg
+            if hasattr(counter, "exercise_counts"):
+                rep["exercise"] = counter.exercise
+            self.reps.append(rep)
+
+
+def count_reps_in_video(path, counter, workout_type, stride=1, max_dim=None, progress=None):
+    """
+    Runs every stride-th frame of a video file through a counter and returns the
+    summary with per-rep timings. progress(frames_read, frames_total) is called
+    periodically.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError("Could not open video (unsupported format or corrupt file)")
+
+    try:
+        video_fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        frames_total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+
+        # Rep timings follow the video, not the wall clock
+        video_time = [0.0]
+        counter.clock = lambda: video_time[0]
+        rep_log = RepLog(counter)
+
+        start = time.time()
+        frame_index = 0
+        frames_processed = 0
+        while capture.grab():
+            if frame_index % stride == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                video_time[0] = frame_index / video_fps
+                counter.process_frame(resize_to_max_dim(frame, max_dim), draw=False)
+                rep_log.update(counter, video_time[0])
+                frames_processed += 1
+            frame_index += 1
+            if progress and frame_index % 30 == 0:
+                progress(frame_index, frames_total)
+    finally:
+        capture.release()
+
+    processing_time = time.time() - start
+    duration = frame_index / video_fps
+    if progress:
+        progress(frame_index, frame_index)
+    return {
+        "workout_type": workout_type,
+        "count": counter.counter,
+        "good_reps": counter.good_reps,
+        "bad_reps": counter.bad_reps,
+        "avg_speed": float(counter.avg_speed),
+        **({"counts": counter.exercise_counts()} if hasattr(counter, "exercise_counts") else {}),
+        "reps": rep_log.reps,
+        "video_fps": round(video_fps, 2),
+        "video_duration_s": round(duration, 2),
+        "frames_total": frame_index,
+        "frames_processed": frames_processed,
+        "stride": stride,
+        "processing_time_s": round(processing_time, 2),
+        # > 1 means faster than real time
+        "realtime_factor": round(duration / processing_time, 2) if processing_time > 0 else None,
+    }
+
+
+class VideoJob:
+    """One uploaded video being counted."""
+
+    def __init__(self, workout_type, stride, max_dim):
+        self.job_id = uuid.uuid4().hex
+        self.workout_type = workout_type
+        self.stride = stride
+        self.max_dim = max_dim
+        self.status = "queued"
+        self.frames_read = 0
+        self.frames_total = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self):
+        progress = None
+        if self.status == "done":
+            progress = 1.0
+        elif self.frames_total:
+            progress = round(min(self.frames_read / self.frames_total, 1.0), 3)
+        job = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "workout_type": self.workout_type,
+            "stride": self.stride,
+            "frames_read": self.frames_read,
+            "frames_total": self.frames_total,
+            "progress": progress,
+        }
+        if self.result is not None:
+            job["result"] = self.result
+        if self.error is not None:
+            job["error"] = self.error
+        return job
+
+
+class VideoJobManager:
+    """Runs video jobs on a dedicated thread pool and keeps finished jobs for a while."""
+
+    def __init__(self, counter_factories, max_workers=1, job_ttl=3600, max_pending=4):
+        self.counter_factories = counter_factories
+        self.job_ttl = job_ttl
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="video-job")
+        self._jobs = {}
+        self._queued = {}  # job_id -> (future, upload path) until the job starts
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, counter_factories):
+        """Builds a job manager configured from environment variables."""
+        return cls(
+            counter_factories,
+            max_workers=int(os.getenv("VIDEO_WORKERS", "1")),
+            job_ttl=float(os.getenv("VIDEO_JOB_TTL_SECONDS", "3600")),
+            max_pending=int(os.getenv("VIDEO_QUEUE_DEPTH", "4")),
+        )
+
+    def pending(self):
+        """Jobs queued or running."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.finished_at is None)
+
+    def full(self):
+        return self.pending() >= self.max_pending
+
+    def submit(self, path, workout_type, stride=1, max_dim=None):
+        """
+        Queues a video file for counting. The file is deleted when the job ends.
+        Raises VideoQueueFull (leaving the file to the caller) when max_pending
+        jobs are already queued or running.
+        """
+        job = VideoJob(workout_type, stride, max_dim)
+        with self._lock:
+            self._sweep_finished()
+            pending = sum(1 for queued in self._jobs.values() if queued.finished_at is None)
+            if pending >= self.max_pending:
+                raise VideoQueueFull(f"{pending} video jobs already queued or running")
+            self._jobs[job.job_id] = job
+            self._queued[job.job_id] = (self._executor.submit(self._run, job, path), path)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._sweep_finished()
+            return self._jobs.get(job_id)
+
+    def _run(self, job, path):
+        with self._lock:
+            self._queued.pop(job.job_id, None)
+        job.status = "running"
+
+        def progress(frames_read, frames_total):
+            job.frames_read = frames_read
+            job.frames_total = frames_total
+
+        counter = None
+        try:
+            counter = self.counter_factories[job.workout_type]()
+            job.result = count_reps_in_video(path, counter, job.workout_type, job.stride, job.max_dim, progress)
+            job.status = "done"
+            print(f"Video job {job.job_id}: {job.result['count']} reps, "
+                  f"{job.result['realtime_factor']}x real time")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"Video job {job.job_id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            if counter is not None:
+                counter.close()
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _sweep_finished(self):
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job.status] = by_status.get(job.status, 0) + 1
+            return by_status
+
+    def shutdown(self):
+        """Stops the pool. Jobs that never started are cancelled and their uploads deleted."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            for job_id, (future, path) in list(self._queued.items()):
+                if not future.cancelled():
+                    continue  # Started after all; _run deletes its file
+                del self._queued[job_id]
+                job = self._jobs[job_id]
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
@@ -0,0 +1,137 @@
+"""
+Client for a pose worker subprocess speaking the framed protocol on stdin/stdout.
+
+Responses are read against a deadline (POSE_WORKER_TIMEOUT_S): a worker that
+hangs without exiting, e.g. on a wedged MediaPipe graph, is treated as dead
+instead of holding its sessions' requests forever.
+"""
+
+import itertools
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+
+from workers.protocol import ProtocolError, read_message, write_message
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pose_worker.py")
+
+# A starting worker answers its first ping once its pose graphs are loaded
+WORKER_START_TIMEOUT = 300
+
+
+def worker_timeout():
+    """Seconds to wait for a worker's response, from POSE_WORKER_TIMEOUT_S (default 30)."""
+    return float(os.getenv("POSE_WORKER_TIMEOUT_S", "30"))
+
+
+class PoseWorkerError(Exception):
+    """Raised when the worker process is gone or answers out of protocol."""
+
+
+class _DeadlineReader:
+    """Reads a pipe's file descriptor, raising PoseWorkerError once the deadline has passed."""
+
+    def __init__(self, fd, timeout):
+        self.fd = fd
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+
+    def read(self, size):
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0 or not select.select([self.fd], [], [], remaining)[0]:
+            raise PoseWorkerError(f"no response within {self.timeout:g}s")
+        return os.read(self.fd, size)
+
+
+class PoseWorkerProcess:
+    """A long-lived pose worker subprocess. Requests are sent one at a time."""
+
+    def __init__(self, exercises=("squats", "pushups", "lunges"), preload=True, env=None, timeout=None):
+        command = [sys.executable, WORKER_SCRIPT, "--exercises", ",".join(exercises)]
+        if not preload:
+            command.append("--no-preload")
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env,
+        )
+        self.timeout = timeout or worker_timeout()
+        # Set once a request times out: the response stream is out of step from then on
+        self.failed = None
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        # Reported on every response, so reading them never waits for the worker
+        self.live_sessions = 0
+        self.frames_processed = 0
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def request(self, header, payload=b"", timeout=None):
+        """
+        Sends one request and waits for its response, at most timeout seconds
+        (default: the worker's timeout). Returns (header, payload).
+        """
+        with self._lock:
+            if self.failed:
+                raise PoseWorkerError(f"Pose worker {self.pid} failed earlier: {self.failed}")
+            if not self.is_alive():
+                raise PoseWorkerError(f"Pose worker {self.pid} exited with code {self.process.returncode}")
+            header = {**header, "request_id": next(self._request_ids)}
+            # Reads the pipe unbuffered, so select sees every byte not read yet
+            reader = _DeadlineReader(self.process.stdout.fileno(), timeout or self.timeout)
+            try:
+                write_message(self.process.stdin, header, payload)
+                message = read_message(reader)
+            except PoseWorkerError as e:
+                self.failed = str(e)
+                raise PoseWorkerError(f"Pose worker {self.pid} failed: {e}")
+            except (OSError, ValueError, ProtocolError) as e:
+                raise PoseWorkerError(f"Pose worker {self.pid} failed: {e}")
+            if message is None:
+                raise PoseWorkerError(f"Pose worker {self.pid} closed its output")
+            response, response_payload = message
+            if response.pop("request_id", None) != header["request_id"]:
+                raise PoseWorkerError(f"Pose worker {self.pid} answered out of order")
+            self.live_sessions = response.pop("worker_sessions", self.live_sessions)
+            self.frames_processed = response.pop("worker_frames", self.frames_processed)
+            return response, response_payload
+
+    def wait_ready(self):
+        """Waits until the worker answers a ping (after preloading its pose graphs)."""
+        self.request({"op": "ping"}, timeout=max(self.timeout, WORKER_START_TIMEOUT))
+
+    def process_frame(self, session_id, workout_type, frame_bytes, response_mode="frame",
+                      image_format="jpeg", quality=None, max_dim=None, timestamp=None):
+        """Runs one frame through the worker. Returns (image_bytes or None, result)."""
+        result, image_bytes = self.request({
+            "op": "frame",
+            "session_id": session_id,
+            "workout_type": workout_type,
+            "response_mode": response_mode,
+            "image_format": image_format,
+            "quality": quality,
+            "max_dim": max_dim,
+            "timestamp": timestamp,
+        }, frame_bytes)
+        return image_bytes or None, result
+
+    def close(self, timeout=5):
+        """Closes stdin so the worker exits, killing it if it does not."""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
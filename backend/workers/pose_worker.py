@@ -0,0 +1,173 @@
+"""
+Long-lived pose worker process.
+
+Loads the counter modules and warms a pose graph once, then serves frames for
+many sessions over the framed protocol in workers/protocol.py, on stdin/stdout
+or on a Unix socket. Each session keeps its own counters between frames, so rep
+state survives across requests and no frame pays for a model load.
+
+Requests (header fields; the JPEG frame goes in the payload for "frame"):
+  {"op": "frame", "session_id", "workout_type", "response_mode", "image_format", "quality", "max_dim", "timestamp"}
+  {"op": "reset", "session_id", "workout_type"}
+  {"op": "close_session", "session_id"}
+  {"op": "stats"} / {"op": "ping"}
+Every response header is a JSON object ("error" set on failure); the payload is
+the annotated image for frame requests in "frame" mode. Frame responses carry
+the worker-side stage timings in "stage_seconds" for the server's metrics, and
+every response carries the worker's "worker_sessions" and "worker_frames", so
+the server knows them without asking (a stats request would queue behind frames).
+
+Usage:
+  python workers/pose_worker.py [--exercises squats,lunges] [--socket /tmp/pose.sock]
+"""
+
+import argparse
+import os
+import socketserver
+import sys
+import time
+
+# Add backend root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from counters import AUTO_WORKOUT, EXERCISES, load_counter_class
+from frame_pipeline import run_frame_pipeline
+from session_registry import CounterSessionRegistry
+from startup import lazy_counter_factory
+from workers.protocol import ProtocolError, read_message, write_message
+
+
+class PoseWorker:
+    """Per-session counters, with pose graphs drawn from the process's warmed graph pool."""
+
+    def __init__(self, exercises=EXERCISES, preload=True):
+        for workout_type in exercises:
+            load_counter_class(workout_type)
+        # "auto" sessions choose between the worker's other exercises
+        detectable = tuple(workout_type for workout_type in exercises if workout_type != AUTO_WORKOUT)
+        self.counter_factories = {
+            workout_type: lazy_counter_factory(workout_type, exercises=detectable) for workout_type in exercises
+        }
+        self.registry = CounterSessionRegistry.from_env(self.counter_factories)
+        self.frames_processed = 0
+        if preload:
+            self.preload()
+
+    def preload(self):
+        """Warms one pose graph per exercise and parks it in the graph pool for the first session."""
+        blank = np.zeros((480, 640, 3), dtype=np.uint8)
+        for workout_type, create_counter in self.counter_factories.items():
+            start = time.time()
+            counter = create_counter()
+            counter.process_frame(blank, draw=False)
+            counter.close()
+            print(f"Preloaded {workout_type} pose graph in {(time.time() - start) * 1000:.0f} ms", file=sys.stderr)
+
+    def handle(self, header, payload):
+        """Handles one request. Returns (response_header, response_payload)."""
+        op = header.get("op")
+        session_id = header.get("session_id", "default")
+        workout_type = header.get("workout_type")
+
+        if op == "frame":
+            if workout_type not in self.counter_factories:
+                return {"error": "Invalid workout type"}, b""
+            timings = {}
+            with self.registry.use_counter(session_id, workout_type) as counter:
+                image_bytes, result = run_frame_pipeline(
+                    counter, payload,
+                    header.get("response_mode", "frame"),
+                    header.get("image_format", "jpeg"),
+                    header.get("quality"),
+                    header.get("max_dim"),
+                    timings,
+                    header.get("timestamp"),
+                )
+            self.frames_processed += 1
+            result["stage_seconds"] = timings
+            return result, image_bytes or b""
+        if op == "reset":
+            if workout_type not in self.counter_factories:
+                return {"error": "Invalid workout type"}, b""
+            self.registry.reset_counter(session_id, workout_type)
+            return {"status": "reset", "session_id": session_id, "workout_type": workout_type}, b""
+        if op == "close_session":
+            return {"closed": self.registry.remove_session(session_id)}, b""
+        if op == "stats":
+            return {**self.registry.stats(), "frames_processed": self.frames_processed, "pid": os.getpid()}, b""
+        if op == "ping":
+            return {"status": "ok", "pid": os.getpid()}, b""
+        return {"error": f"Unknown op: {op}"}, b""
+
+    def serve_stream(self, reader, writer):
+        """Answers requests from a binary stream until EOF."""
+        while True:
+            try:
+                message = read_message(reader)
+            except ProtocolError as e:
+                write_message(writer, {"error": str(e)})
+                return
+            if message is None:
+                return
+            header, payload = message
+            try:
+                response, response_payload = self.handle(header, payload)
+            except Exception as e:
+                print(f"Error handling {header.get('op')} request: {e}", file=sys.stderr)
+                response, response_payload = {"error": f"Worker error: {str(e)}"}, b""
+            if "request_id" in header:
+                response["request_id"] = header["request_id"]
+            response["worker_sessions"] = self.registry.live_sessions()
+            response["worker_frames"] = self.frames_processed
+            write_message(writer, response, response_payload)
+
+
+def claim_stdout():
+    """
+    Reserves stdout for protocol messages. The counters print to stdout, so fd 1 is
+    pointed at stderr (catching Python and native writes) and the returned stream
+    writes to the original stdout.
+    """
+    sys.stdout.flush()
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return protocol_out
+
+
+def serve_unix_socket(worker, path):
+    """Serves the protocol on a Unix socket, one thread per connection."""
+    if os.path.exists(path):
+        os.unlink(path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            worker.serve_stream(self.rfile, self.wfile)
+
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        print(f"Pose worker listening on {path}", file=sys.stderr)
+        server.serve_forever()
+
+
+def main(default_exercises=EXERCISES):
+    parser = argparse.ArgumentParser(description="Long-lived pose worker")
+    parser.add_argument("--exercises", default=",".join(default_exercises),
+                        help="Comma-separated exercises to load (squats, pushups, lunges, auto)")
+    parser.add_argument("--socket", help="Serve on this Unix socket path instead of stdin/stdout")
+    parser.add_argument("--no-preload", action="store_true", help="Skip the warm-up inference")
+    args = parser.parse_args()
+
+    exercises = [exercise.strip() for exercise in args.exercises.split(",") if exercise.strip()]
+    if args.socket is None:
+        # Claim stdout before the counter modules print their import banners
+        protocol_out = claim_stdout()
+        worker = PoseWorker(exercises, preload=not args.no_preload)
+        worker.serve_stream(sys.stdin.buffer, protocol_out)
+    else:
+        worker = PoseWorker(exercises, preload=not args.no_preload)
+        serve_unix_socket(worker, args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Length-prefixed message framing for the pose worker processes.
+
+Every message is an 8-byte big-endian prefix (JSON header length, payload
+length), the UTF-8 JSON header, then the raw payload (a JPEG frame in requests,
+the annotated image in responses; empty when there is none). The same framing
+is used over stdin/stdout pipes and Unix sockets.
+"""
+
+import json
+import struct
+
+PREFIX = struct.Struct(">II")
+# Guards against reading garbage (e.g. stray prints on the pipe) as a huge length
+MAX_HEADER_BYTES = 1024 * 1024
+MAX_PAYLOAD_BYTES = 64 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """Raised when a stream does not contain a valid framed message."""
+
+
+def pack_message(header, payload=b""):
+    """Encodes one message as bytes."""
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    payload = payload or b""
+    return PREFIX.pack(len(header_bytes), len(payload)) + header_bytes + payload
+
+
+def write_message(stream, header, payload=b""):
+    """Writes one message to a binary stream and flushes it."""
+    stream.write(pack_message(header, payload))
+    stream.flush()
+
+
+def _read_exact(stream, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_message(stream):
+    """Reads one message from a binary stream. Returns (header, payload), or None at EOF."""
+    prefix = _read_exact(stream, PREFIX.size)
+    if prefix is None:
+        return None
+    header_len, payload_len = PREFIX.unpack(prefix)
+    if header_len > MAX_HEADER_BYTES or payload_len > MAX_PAYLOAD_BYTES:
+        raise ProtocolError(f"Message too large (header {header_len} bytes, payload {payload_len} bytes)")
+
+    header_bytes = _read_exact(stream, header_len)
+    payload = _read_exact(stream, payload_len) if payload_len else b""
+    if header_bytes is None or payload is None:
+        raise ProtocolError("Stream closed in the middle of a message")
+    try:
+        return json.loads(header_bytes), payload
+    except ValueError as e:
+        raise ProtocolError(f"Invalid message header: {e}")
@@ -1,23 +1,14 @@
-import sys, json, cv2, numpy as np
-from counters.squat_counter import FinalSquatCounter
+"""
+Persistent squats worker. Preloads the squats pose graph and serves frames for many
+sessions over the framed protocol (see workers/pose_worker.py) on stdin/stdout,
+or on a Unix socket with --socket PATH.
+"""
+import sys, os
 
-counter = FinalSquatCounter()
+# Add backend root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-img_bytes = sys.stdin.buffer.read()
-img_array = np.frombuffer(img_bytes, np.uint8)
-frame = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+from workers.pose_worker import main
 
-processed = counter.process_frame(frame)
-
-_, jpeg = cv2.imencode(".jpg", processed)
-
-result = {
-    "frame": jpeg.tobytes().hex(),
-    "count": counter.counter,
-    "stage": counter.stage,
-    "avg_speed": counter.avg_speed,
-    "good_reps": counter.good_reps,
-    "bad_reps": counter.bad_reps,
-}
-
-print(json.dumps(result))
+if __name__ == "__main__":
+    main(default_exercises=("squats",))
@@ -1,4 +1,5 @@
 import { useEffect, useRef, useState } from "react";
+import { useSessionId } from "@/hooks/useSessionId";
 
 type ExerciseType = "lunge" | "pushup" | "squat";
 
@@ -18,6 +19,8 @@ interface WorkoutStats {
 export default function WorkoutCamera({ exercise, onStatsChange }: WorkoutCameraProps) {
   const videoRef = useRef<HTMLVideoElement>(null);
   const canvasRef = useRef<HTMLCanvasElement>(null);
+  // Backend keeps separate rep state per session
+  const sessionId = useSessionId();
   const [processedUrl, setProcessedUrl] = useState<string | null>(null);
   const [stats, setStats] = useState<WorkoutStats>({
     count: 0,
@@ -55,6 +58,8 @@ export default function WorkoutCamera({ exercise, onStatsChange }: WorkoutCamera
 
     // Draw frame on canvas
     ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
+    // Capture time in seconds, so the backend times reps by the camera, not by arrival
+    const capturedAt = performance.now() / 1000;
 
     // Convert canvas → blob
     const blob: Blob | null = await new Promise((resolve) =>
@@ -73,6 +78,8 @@ export default function WorkoutCamera({ exercise, onStatsChange }: WorkoutCamera
       squat: "squats"
     };
     form.append("workout_type", workoutTypeMap[exercise]);
+    form.append("session_id", sessionId);
+    form.append("timestamp", capturedAt.toString());
 
     try {
       // Use localhost backend
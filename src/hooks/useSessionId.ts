@@ -0,0 +1,20 @@
+import { useRef } from 'react';
+
+function createSessionId(): string {
+  // crypto.randomUUID only exists in secure contexts (https or localhost), not when
+  // the app is opened over plain http on a LAN address
+  if (typeof crypto !== 'undefined' && typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID();
+  }
+  const random = () => Math.random().toString(36).slice(2, 10);
+  return `${Date.now().toString(36)}-${random()}-${random()}`;
+}
+
+// Stable id for this component's backend session, created on first render only
+export function useSessionId(): string {
+  const sessionIdRef = useRef<string>();
+  if (sessionIdRef.current === undefined) {
+    sessionIdRef.current = createSessionId();
+  }
+  return sessionIdRef.current;
+}
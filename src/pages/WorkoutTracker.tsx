@@ -4,6 +4,7 @@ import { Button } from '@/components/ui/button';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { Camera, StopCircle, Play, RotateCcw, Activity, Target, Timer, TrendingUp } from 'lucide-react';
 import { gsap } from 'gsap';
+import { useSessionId } from '@/hooks/useSessionId';
 
 // Workout types
 type WorkoutType = 'squats' | 'pushups' | 'lunges';
@@ -32,6 +33,8 @@ export default function WorkoutTracker() {
   const consecutiveDownFramesRef = useRef<number>(0);
   const stableFrameCountRef = useRef<number>(0);
   const angleBufferRef = useRef<number[]>([]);
+  // Backend keeps separate rep state per session
+  const sessionId = useSessionId();
   
   const [isTracking, setIsTracking] = useState(false);
   const [selectedWorkout, setSelectedWorkout] = useState<WorkoutType>('squats');
@@ -56,6 +59,8 @@ export default function WorkoutTracker() {
       if (!ctx) return;
       
       ctx.drawImage(videoRef.current, 0, 0, canvasRef.current.width, canvasRef.current.height);
+      // Capture time in seconds, so the backend times reps by the camera, not by arrival
+      const capturedAt = performance.now() / 1000;
       
       // Convert to blob
       const blob: Blob | null = await new Promise((resolve) =>
@@ -75,6 +80,8 @@ export default function WorkoutTracker() {
       const form = new FormData();
       form.append('file', blob, 'frame.jpg');
       form.append('workout_type', workoutTypeMap[selectedWorkout]);
+      form.append('session_id', sessionId);
+      form.append('timestamp', capturedAt.toString());
 
       // Use localhost backend
       const response = await fetch('http://localhost:8000/process-frame', {
@@ -342,7 +349,7 @@ export default function WorkoutTracker() {
     fetch('http://localhost:8000/reset-counter', {
       method: 'POST',
       headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-      body: `workout_type=${workoutTypeMap[selectedWorkout]}`
+      body: `workout_type=${workoutTypeMap[selectedWorkout]}&session_id=${sessionId}`
     }).catch(console.error);
     
     // Reinitialize MediaPipe if it was tracking before reset